@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import tracemalloc
+
+from pytest import mark
+
+from storyscript.Api import Api
+
+from .Generator import Generator
+
+
+@mark.parametrize('count', [10, 50])
+def test_bundle_imports(benchmark, parser, size, count):
+    """
+    Measures compiling an entrypoint importing many stories.
+    """
+    files = Generator.imports(count, size // 10)
+    benchmark(Api.load_map, files)
+
+
+def peak(function, *args):
+    """
+    Calls a function, returning the peak of the memory it allocated.
+    """
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@mark.parametrize('entrypoint', [True, False])
+def test_bundle_memory(benchmark, parser, size, entrypoint):
+    """
+    Measures the peak memory of compiling a thousand stories, either
+    imported by an entrypoint or on their own. The peak, in MiB, is
+    reported in the extra info of the benchmark.
+    """
+    files = Generator.imports(1000, size // 50)
+    if not entrypoint:
+        files.pop('main.story')
+    result = benchmark.pedantic(peak, args=(Api.load_map, files), rounds=1)
+    benchmark.extra_info['peak'] = round(result / 2 ** 20, 1)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import time
+
+from pytest import fixture, mark
+
+from storyscript.Finder import Finder
+
+
+@fixture
+def tree(tmpdir, size):
+    """
+    A repository with a story in every directory, next to other files, and
+    a vendored directory with many more files.
+    """
+    tmpdir.mkdir('.git')
+    tmpdir.join('.gitignore').write('build/\n')
+    for i in range(size // 10):
+        directory = tmpdir.mkdir('dir{}'.format(i)).mkdir('sub')
+        directory.join('one.story').write('x = 1')
+        for j in range(10):
+            directory.join('file{}.txt'.format(j)).write('')
+        vendored = tmpdir.join('node_modules', 'module{}'.format(i))
+        build = tmpdir.join('build', 'dir{}'.format(i))
+        for j in range(10):
+            vendored.ensure('file{}.js'.format(j))
+            build.ensure('file{}.story'.format(j))
+    # Listings of directories changed in the last second are not cached
+    mtime = time.time() - 10
+    for path in tmpdir.visit():
+        path.setmtime(mtime)
+    tmpdir.setmtime(mtime)
+    return str(tmpdir)
+
+
+@mark.parametrize('jobs', [None, 4])
+def test_finder_stories(benchmark, tree, jobs):
+    """
+    Measures finding the stories of a directory.
+    """
+    def stories():
+        Finder.cache.clear()
+        return Finder.stories(tree, jobs=jobs)
+    benchmark(stories)
+
+
+def test_finder_stories_cached(benchmark, tree):
+    """
+    Measures finding the stories of a directory again, when nothing was
+    changed.
+    """
+    Finder.stories(tree)
+    benchmark(Finder.stories, tree)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+
+class Generator:
+    """
+    Generates synthetic stories of a given size and shape, to be used as
+    benchmark corpora.
+    """
+
+    shapes = ('assignments', 'nesting', 'expressions', 'services', 'inline',
+              'blocks')
+
+    @staticmethod
+    def assignments(size):
+        """
+        Flat assignments, with a condition and a comment every few lines.
+        """
+        lines = []
+        for i in range(size // 3):
+            lines.append('a{} = {} + 1  # increments {}'.format(i, i, i))
+            lines.append('if a{} > 2'.format(i))
+            lines.append('\tb{} = a{} * 2'.format(i, i))
+        return '\n'.join(lines)
+
+    @staticmethod
+    def nesting(size, depth=20):
+        """
+        Blocks nested up to depth, repeated to fill the story.
+        """
+        lines = []
+        while len(lines) < size:
+            for level in range(depth):
+                indent = '\t' * level
+                lines.append('{}foreach items{} as item'.format(indent, level))
+                lines.append('{}\tx{} = item'.format(indent, level))
+        return '\n'.join(lines[:size])
+
+    @staticmethod
+    def expressions(size, length=20):
+        """
+        Assignments of long arithmetic and boolean expressions.
+        """
+        operators = ('+', '-', '*', '/', '%')
+        lines = []
+        for i in range(size):
+            terms = ['{} {}'.format(j, operators[j % len(operators)])
+                     for j in range(length)]
+            lines.append('x{} = {} x{} > 1 and true'.format(i, ' '.join(terms),
+                                                            i))
+        return '\n'.join(lines)
+
+    @staticmethod
+    def services(size, count=50):
+        """
+        Calls to many different services, with arguments and when blocks.
+        """
+        lines = []
+        i = 0
+        while len(lines) < size:
+            service = 'service{}'.format(i % count)
+            lines.append('{} run id:{} text:"hello"'.format(service, i))
+            lines.append('{} listen as event'.format(service))
+            lines.append('\twhen event message as message')
+            lines.append('\t\tx{} = message'.format(i))
+            i += 1
+        return '\n'.join(lines[:size])
+
+    @staticmethod
+    def inline(size, depth=4):
+        """
+        Assignments of nested inline service calls.
+        """
+        lines = []
+        for i in range(size):
+            expression = 'random number'
+            for level in range(depth):
+                expression = 'service{} get id:({})'.format(level, expression)
+            lines.append('x{} = ({})'.format(i, expression))
+        return '\n'.join(lines)
+
+    @staticmethod
+    def blocks(size, every=10):
+        """
+        Many small blocks, with an inline service call every few blocks.
+        """
+        lines = []
+        for i in range(size // 2):
+            lines.append('if a{} > 0'.format(i))
+            if i % every:
+                lines.append('\tx{} = a{}'.format(i, i))
+            else:
+                lines.append('\tx{} = (service get id:a{})'.format(i, i))
+        return '\n'.join(lines)
+
+    @classmethod
+    def story(cls, shape, size):
+        """
+        Generates a story of the given shape, about size lines long.
+        """
+        return getattr(cls, shape)(size)
+
+    @classmethod
+    def imports(cls, count, size):
+        """
+        Generates an entrypoint importing count stories of the given size,
+        as a mapping of paths to sources.
+        """
+        files = {}
+        lines = []
+        for i in range(count):
+            files['module{}.story'.format(i)] = cls.assignments(size)
+            lines.append('import "module{}" as module{}'.format(i, i))
+        files['main.story'] = '\n'.join(lines)
+        return files
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from pytest import mark
+
+from storyscript.compiler.Lines import Lines
+
+
+def append(count):
+    lines = Lines()
+    for i in range(1, count + 1):
+        lines.append('set', str(i), name=['a'], args=[1], parent=None)
+        lines.set_name(['a'])
+    return lines
+
+
+@mark.parametrize('count', [1000, 10000, 50000])
+def test_lines_append(benchmark, count):
+    benchmark(append, count)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from pytest import mark
+
+from storyscript.compiler import Preprocessor
+
+from .Generator import Generator
+
+
+@mark.parametrize('depth', [20, 100])
+def test_preprocess_nesting(benchmark, parser, size, depth):
+    """
+    Measures the preprocessor on deeply nested blocks.
+    """
+    story = Generator.nesting(size, depth=depth)
+
+    def setup():
+        return (parser.parse(story),), {}
+
+    benchmark.pedantic(Preprocessor.process, setup=setup, rounds=5)
+
+
+def test_preprocess_blocks(benchmark, parser, size):
+    """
+    Measures the preprocessor on thousands of blocks, few of them with
+    inline expressions.
+    """
+    story = Generator.blocks(size * 10)
+
+    def setup():
+        return (parser.parse(story),), {}
+
+    benchmark.pedantic(Preprocessor.process, setup=setup, rounds=5)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from storyscript.Serializer import Serializer
+from storyscript.Story import Story
+from storyscript.compiler import Compiler, Preprocessor
+
+
+def compile_tree(tree):
+    """
+    Compiles a preprocessed tree, like Compiler.compile does.
+    """
+    compiler = Compiler.compiler()
+    compiler.parse_tree(tree)
+    return compiler.lines
+
+
+def test_clean_source(benchmark, source):
+    benchmark(Story.clean_source, source)
+
+
+def test_lex(benchmark, parser, story):
+    benchmark(parser.lex, story)
+
+
+def test_parse(benchmark, parser, story):
+    benchmark(parser.parse, story)
+
+
+def test_preprocess(benchmark, parser, story):
+    """
+    Measures the preprocessor, on a new tree every round since it changes
+    the tree.
+    """
+    def setup():
+        return (parser.parse(story),), {}
+
+    benchmark.pedantic(Preprocessor.process, setup=setup, rounds=5)
+
+
+def test_compile(benchmark, parser, story):
+    def setup():
+        return (Preprocessor.process(parser.parse(story)),), {}
+
+    benchmark.pedantic(compile_tree, setup=setup, rounds=5)
+
+
+def test_json(benchmark, parser, story):
+    compiled = Compiler.compile(parser.parse(story))
+    benchmark(Serializer.json, compiled)
+
+
+def test_json_compact(benchmark, parser, story):
+    compiled = Compiler.compile(parser.parse(story))
+    benchmark(Serializer.json, compiled, compact=True)
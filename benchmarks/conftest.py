@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from pytest import fixture
+
+from storyscript.Story import Story
+from storyscript.parser import Parser
+
+from .Generator import Generator
+
+
+def pytest_addoption(parser):
+    parser.addoption('--story-size', type=int, default=500,
+                     help='Number of lines of the generated stories')
+
+
+@fixture
+def size(request):
+    return request.config.getoption('story_size')
+
+
+@fixture(params=Generator.shapes)
+def source(request, size):
+    return Generator.story(request.param, size)
+
+
+@fixture
+def story(source):
+    """
+    The generated source, without comments, as the parser receives it.
+    """
+    return Story(source).story
+
+
+@fixture(scope='session')
+def parser():
+    """
+    A parser whose grammar is already loaded, so that loading it is not
+    measured.
+    """
+    parser = Parser()
+    parser.lark()
+    return parser
@@ -53,7 +53,10 @@ setup(name='storyscript',
       zip_safe=True,
       install_requires=requirements,
       extras_require={
-          'docs': extras
+          'docs': extras,
+          'fast': ['orjson'],
+          'msgpack': ['msgpack'],
+          'cbor': ['cbor2']
       },
       entry_points={
           'console_scripts': ['storyscript=storyscript.Cli:Cli.main']
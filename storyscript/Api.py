@@ -1,4 +1,9 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import concurrent.futures
+import multiprocessing
+import weakref
+
 from .Bundle import Bundle
 from .Story import Story
 from .exceptions import StoryError
@@ -8,6 +13,10 @@ class Api:
     """
     Exposes functionalities for external use
     """
+    concurrency = 4
+    executor = None
+    semaphores = weakref.WeakKeyDictionary()
+
     @staticmethod
     def loads(string, debug=False):
         """
@@ -53,3 +62,100 @@ class Api:
                 raise e
             else:
                 raise StoryError.internal_error(e)
+
+    @staticmethod
+    def load_item(item):
+        """
+        Load a story of a batch, returning its index with its result or its
+        error.
+        """
+        index, string, debug = item
+        try:
+            return index, Api.loads(string, debug=debug)
+        except StoryError as error:
+            return index, error
+
+    @classmethod
+    def loads_many(cls, strings, jobs=None, debug=False):
+        """
+        Load many independent stories, yielding the index of each story with
+        its result, or its error, as soon as it's compiled. With more than
+        one job, stories are compiled by a pool of processes, so they may
+        finish out of order.
+        """
+        items = ((index, string, debug)
+                 for index, string in enumerate(strings))
+        if jobs is None or jobs < 2:
+            yield from map(cls.load_item, items)
+            return
+        with multiprocessing.Pool(jobs) as pool:
+            yield from pool.imap_unordered(cls.load_item, items)
+
+    @classmethod
+    def default_executor(cls):
+        """
+        Gets the thread pool used when no executor is given.
+        """
+        if cls.executor is None:
+            cls.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=cls.concurrency)
+        return cls.executor
+
+    @classmethod
+    def semaphore(cls, loop):
+        """
+        Gets the semaphore bounding the compilations of an event loop.
+        """
+        if loop not in cls.semaphores:
+            cls.semaphores[loop] = asyncio.Semaphore(cls.concurrency)
+        return cls.semaphores[loop]
+
+    @staticmethod
+    def release(loop, semaphore):
+        """
+        Releases a semaphore from an executor thread, unless its loop has
+        been closed in the meantime.
+        """
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:
+            pass
+
+    @classmethod
+    async def run(cls, function, args, executor, timeout):
+        """
+        Runs a function in an executor, waiting at most timeout seconds.
+        At most Api.concurrency functions run at once: others wait for
+        their turn without blocking the loop. Work cancelled or timed out
+        after starting can't be interrupted, so it holds its place until
+        it finishes.
+        """
+        if executor is None:
+            executor = cls.default_executor()
+        loop = asyncio.get_event_loop()
+        semaphore = cls.semaphore(loop)
+        await semaphore.acquire()
+        try:
+            future = executor.submit(function, *args)
+        except BaseException:
+            semaphore.release()
+            raise
+        future.add_done_callback(
+            lambda future: cls.release(loop, semaphore))
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+    @classmethod
+    async def aloads(cls, string, debug=False, executor=None, timeout=None):
+        """
+        Load story from a string, without blocking the event loop.
+        """
+        return await cls.run(cls.loads, (string, debug), executor, timeout)
+
+    @classmethod
+    async def aload_map(cls, files, debug=False, executor=None,
+                        timeout=None):
+        """
+        Load multiple stories from a file mapping, without blocking the
+        event loop.
+        """
+        return await cls.run(cls.load_map, (files, debug), executor, timeout)
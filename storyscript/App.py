@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
-import json
+import io
 
 from .Bundle import Bundle
+from .Emitter import Emitter
+from .Serializer import Serializer
 from .compiler.Preprocessor import Preprocessor
 from .parser import Grammar
 
@@ -12,24 +14,51 @@ class App:
     """
 
     @staticmethod
-    def parse(path, ignored_path=None, ebnf=None, preprocess=False):
+    def parse(path, ignored_path=None, ebnf=None, preprocess=False,
+              jobs=None):
         """
         Parses stories found in path, returning their trees
         """
-        bundle = Bundle.from_path(path, ignored_path=ignored_path)
-        stories = bundle.bundle_trees(ebnf=ebnf)
+        bundle = Bundle.from_path(path, ignored_path=ignored_path, jobs=jobs)
+        stories = bundle.bundle_trees(ebnf=ebnf, jobs=jobs)
         if preprocess:
             for story, tree in stories.items():
                 stories[story] = Preprocessor.process(tree)
         return stories
 
     @staticmethod
-    def compile(path, ignored_path=None, ebnf=None):
+    def write(stream, path, ignored_path=None, ebnf=None, jobs=None,
+              cache=None, compact=False, format='json', profiler=None):
+        """
+        Parses and compiles stories found in path, writing JSON to stream
+        as soon as every story is compiled. The orjson format is JSON dumped
+        with orjson. Other formats are binary, and written once all stories
+        are compiled.
+        """
+        bundle = Bundle.from_path(path, ignored_path=ignored_path,
+                                  cache=cache, profiler=profiler, jobs=jobs)
+        if format in Serializer.texts:
+            fast = format == 'orjson'
+            if fast:
+                Serializer.package('orjson')
+            emitter = Emitter(stream, compact=compact, profiler=profiler,
+                              fast=fast)
+            emitter.write(bundle, ebnf=ebnf, jobs=jobs)
+            return
+        encoder = Serializer.encoder(format)
+        stream.write(encoder(bundle.bundle(ebnf=ebnf, jobs=jobs)))
+
+    @classmethod
+    def compile(cls, path, ignored_path=None, ebnf=None, jobs=None,
+                cache=None, compact=False, profiler=None):
         """
         Parses and compiles stories found in path, returning JSON
         """
-        bundle = Bundle.from_path(path, ignored_path=ignored_path)
-        return json.dumps(bundle.bundle(ebnf=ebnf), indent=2)
+        stream = io.StringIO()
+        cls.write(stream, path, ignored_path=ignored_path, ebnf=ebnf,
+                  jobs=jobs, cache=cache, compact=compact,
+                  profiler=profiler)
+        return stream.getvalue()
 
     @staticmethod
     def lex(path, ebnf=None):
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import os
+import tempfile
+
+
+class AtomicFile:
+    """
+    Writes files atomically, so that concurrent processes never read
+    incomplete files. Files are written to a temporary file in the same
+    directory, which replaces them once written, or is removed on failure.
+    """
+
+    @staticmethod
+    @contextlib.contextmanager
+    def open(path, mode='w', **options):
+        """
+        Opens a temporary file to write path with. Options are passed on to
+        NamedTemporaryFile.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        f = tempfile.NamedTemporaryFile(mode, dir=directory, delete=False,
+                                        **options)
+        try:
+            with f:
+                yield f
+            os.replace(f.name, path)
+        except BaseException:
+            os.remove(f.name)
+            raise
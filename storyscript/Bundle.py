@@ -1,89 +1,80 @@
 # -*- coding: utf-8 -*-
+import functools
+import multiprocessing
 import os
-import subprocess
 
+from .Finder import Finder
 from .Story import Story
+from .exceptions import CompilerError, StoryError
 
 
 class Bundle:
     """
-    Bundles all stories that must be compiled together.
+    Bundles all stories that must be compiled together. When a profiler
+    is given, the phases of parsing and compiling each story are recorded.
     """
+    worker_files = None
+    worker_cache = None
 
-    def __init__(self, story_files={}):
+    def __init__(self, story_files=None, cache=None, profiler=None):
         self.stories = {}
+        if story_files is None:
+            story_files = {}
         self.story_files = story_files
-
-    @staticmethod
-    def gitignores():
-        """
-        Get the list of files ignored by git
-        """
-        command = ['git', 'ls-files', '--others', '--ignored',
-                   '--exclude-standard']
-        p = subprocess.run(command, stdout=subprocess.PIPE, encoding='utf8')
-        if p.returncode != 0:
-            return []
-        return p.stdout.split('\n')
+        self.cache = cache
+        self.entries = {}
+        self.parsed = {}
+        self.profiler = profiler
 
     @staticmethod
     def ignores(path):
-        ignores = []
         if os.path.isdir(path):
-            for root, subdirs, files in os.walk(path):
-                for file in files:
-                    if file.endswith('.story'):
-                        story = os.path.relpath(os.path.join(root, file))
-                        ignores.append(story)
-            return ignores
-        return [os.path.relpath(path)]
-
-    @staticmethod
-    def filter_path(root, filename, ignores):
-        if filename.endswith('.story'):
-            path = os.path.relpath(os.path.join(root, filename))
-            if path not in ignores:
-                return path
-        return None
+            return set(Finder.stories(path, prune=False))
+        return {os.path.relpath(path)}
 
     @classmethod
-    def parse_directory(cls, directory, ignored_path=None):
+    def parse_directory(cls, directory, ignored_path=None, jobs=None):
         """
-        Parse a directory to find stories.
+        Parse a directory to find stories. Hidden and vendored directories,
+        and those ignored by git, are not walked.
         """
-        paths = []
-        ignores = cls.gitignores()
+        paths = Finder.stories(directory, jobs=jobs)
         if ignored_path:
-            ignores = ignores + cls.ignores(ignored_path)
-        for root, subdirs, files in os.walk(directory):
-            for file in files:
-                path = cls.filter_path(root, file, ignores)
-                if path:
-                    paths.append(path)
+            ignores = cls.ignores(ignored_path)
+            paths = [path for path in paths if path not in ignores]
         return paths
 
     @classmethod
-    def from_path(cls, path, ignored_path=None):
+    def from_path(cls, path, ignored_path=None, cache=None, profiler=None,
+                  jobs=None):
         """
         Load a bundle of stories from the filesystem.
         If a directory is given. all `.story` files in the directory will be
         loaded.
         """
-        bundle = Bundle()
+        bundle = Bundle(cache=cache, profiler=profiler)
         if os.path.isdir(path):
-            for story in cls.parse_directory(path, ignored_path=ignored_path):
+            stories = cls.parse_directory(path, ignored_path=ignored_path,
+                                          jobs=jobs)
+            for story in stories:
                 bundle.load_story(story)
             return bundle
         bundle.load_story(path)
         return bundle
 
-    def load_story(self, path):
+    def read_story(self, path):
         """
-        Reads a story file and adds it to the loaded stories
+        Gets the source of a story, reading it unless it's already loaded
         """
         if path not in self.story_files:
             self.story_files[path] = Story.read(path)
-        return Story(self.story_files[path])
+        return self.story_files[path]
+
+    def load_story(self, path):
+        """
+        Reads a story file and adds it to the loaded stories
+        """
+        return Story(self.read_story(path))
 
     def find_stories(self):
         """
@@ -99,48 +90,206 @@ class Bundle:
         services.sort()
         return services
 
-    def compile_modules(self, stories, ebnf):
-        self.compile(stories, ebnf)
+    def phases(self, storypath):
+        """
+        Gets the function recording the phases of a story, if profiling.
+        """
+        if self.profiler is None:
+            return None
+        return functools.partial(self.profiler.phase, storypath)
 
-    def parse_modules(self, stories, ebnf):
-        self.parse(stories, ebnf)
+    def parse_story(self, storypath, ebnf):
+        """
+        Parses a story, unless it has already been parsed.
+        """
+        if storypath not in self.parsed:
+            story = self.load_story(storypath)
+            story.parse(ebnf=ebnf, profiler=self.phases(storypath))
+            self.parsed[storypath] = story
+        return self.parsed[storypath]
 
-    def parse(self, stories, ebnf):
+    def cached(self, storypath, ebnf):
+        """
+        Gets the cached entry of a story, looking it up once per bundle.
+        """
+        if self.cache is None:
+            return None
+        if storypath not in self.entries:
+            source = self.read_story(storypath)
+            self.entries[storypath] = self.cache.get(source, ebnf)
+        return self.entries[storypath]
+
+    def import_cycle(self, storypath, module, ebnf):
+        """
+        Makes the error for a story importing a module that imports it back.
+        """
+        story = self.parse_story(storypath, ebnf)
+        error = CompilerError('import_cycle', tree=story.imports()[module])
+        return StoryError(error, story.story, path=storypath)
+
+    def visit(self, storypath, ebnf, visited, importers, cached=False):
+        """
+        Parses a story and the modules it imports, yielding them after their
+        own modules. Importers holds the stories being visited, to find
+        import cycles. When cached is set, stories found in the cache are not
+        parsed and are yielded as None. Stories already in the bundle are
+        skipped, with their modules.
+        """
+        if storypath in visited or storypath in self.stories:
+            return
+        story = None
+        entry = None
+        if cached:
+            entry = self.cached(storypath, ebnf)
+        if entry is None:
+            story = self.parse_story(storypath, ebnf)
+            modules = story.imports()
+        else:
+            modules = entry['modules']
+        importers.append(storypath)
+        for module in modules:
+            if module in importers:
+                raise self.import_cycle(storypath, module, ebnf)
+            yield from self.visit(module, ebnf, visited, importers,
+                                  cached=cached)
+        importers.pop()
+        visited.add(storypath)
+        yield storypath, story
+
+    def sort(self, stories, ebnf, cached=False):
         """
-        Parse stories.
+        Parses stories and their modules, yielding them so that every module
+        comes before the stories importing it. Stories are parsed as they
+        are needed, so that each can be compiled before the next is parsed.
         """
+        visited = set()
         for storypath in stories:
-            story = self.load_story(storypath)
-            story.parse(ebnf=ebnf)
-            self.parse_modules(story.modules(), ebnf)
+            yield from self.visit(storypath, ebnf, visited, [], cached=cached)
+
+    def parse(self, stories, ebnf):
+        """
+        Parse stories, returning the paths of those added to the bundle.
+        """
+        added = []
+        for storypath, story in self.sort(stories, ebnf):
             self.stories[storypath] = story.tree
+            added.append(storypath)
+        return added
+
+    def compile_story(self, storypath, story, ebnf):
+        """
+        Compiles a story, storing the result in the cache when it's enabled.
+        """
+        story.compile(profiler=self.phases(storypath))
+        self.stories[storypath] = story.compiled
+        if self.cache is not None:
+            source = self.story_files[storypath]
+            modules = list(story.imports())
+            self.cache.set(source, ebnf, story.compiled, modules)
+        # The tree is not needed once compiled, so it's released rather
+        # than kept until the whole bundle is compiled.
+        self.parsed.pop(storypath, None)
 
     def compile(self, stories, ebnf):
         """
-        Reads and parses a story, then compiles its modules and finally
-        compiles the story itself.
+        Parses stories and their modules, compiling each of them once,
+        modules first. Stories found in the cache are not compiled again.
+        Returns the paths of the stories added to the bundle.
         """
+        added = []
+        for storypath, story in self.sort(stories, ebnf, cached=True):
+            if story is None:
+                self.stories[storypath] = self.entries[storypath]['compiled']
+            else:
+                self.compile_story(storypath, story, ebnf)
+            added.append(storypath)
+        return added
+
+    @classmethod
+    def init_worker(cls, story_files, cache):
+        """
+        Initializes a worker process with the story files and the cache of
+        the bundle.
+        """
+        cls.worker_files = story_files
+        cls.worker_cache = cache
+
+    @classmethod
+    def run_worker(cls, task):
+        """
+        Parses or compiles a story and its modules in a worker process,
+        returning the results and the cache or None on errors.
+        """
+        method, storypath, ebnf = task
+        cache = None
+        if cls.worker_cache is not None:
+            cache = cls.worker_cache.empty()
+        bundle = Bundle(story_files=cls.worker_files, cache=cache)
+        try:
+            getattr(bundle, method)([storypath], ebnf)
+        except Exception:
+            # Errors are raised again by the main process, so that they are
+            # reported with their full context.
+            return None
+        return bundle.stories, cache
+
+    def run_parallel(self, method, stories, ebnf, jobs):
+        """
+        Parses or compiles stories with a pool of processes, yielding the
+        paths of the stories added to the bundle. Results are merged in the
+        same order as they would be by a sequential run.
+        """
+        tasks = [(method, storypath, ebnf) for storypath in stories]
+        args = (self.story_files, self.cache)
+        with multiprocessing.Pool(jobs, self.init_worker, args) as pool:
+            results = pool.imap(self.run_worker, tasks)
+            for storypath, result in zip(stories, results):
+                if result is None:
+                    yield from getattr(self, method)([storypath], ebnf)
+                    continue
+                worker_stories, cache = result
+                for path, story in worker_stories.items():
+                    if path not in self.stories:
+                        self.stories[path] = story
+                        yield path
+                if cache is not None:
+                    self.cache.merge(cache)
+
+    def run(self, method, stories, ebnf, jobs):
+        """
+        Parses or compiles stories, in parallel when more jobs are allowed,
+        yielding the paths of the stories added to the bundle. Stories are
+        handled in process when profiling.
+        """
+        parallel = jobs is not None and jobs > 1 and len(stories) > 1
+        if parallel and self.profiler is None:
+            yield from self.run_parallel(method, stories, ebnf, jobs)
+            return
         for storypath in stories:
-            story = self.load_story(storypath)
-            story.parse(ebnf=ebnf)
-            self.compile_modules(story.modules(), ebnf)
-            story.compile()
-            self.stories[storypath] = story.compiled
+            yield from getattr(self, method)([storypath], ebnf)
+
+    def stream(self, ebnf=None, jobs=None):
+        """
+        Compiles the bundle, yielding every story with its compiled tree as
+        soon as it's compiled.
+        """
+        for storypath in self.run('compile', self.find_stories(), ebnf, jobs):
+            yield storypath, self.stories[storypath]
 
-    def bundle(self, ebnf=None):
+    def bundle(self, ebnf=None, jobs=None):
         """
         Makes the bundle
         """
         entrypoint = self.find_stories()
-        self.compile(entrypoint, ebnf)
+        list(self.run('compile', entrypoint, ebnf, jobs))
         return {'stories': self.stories, 'services': self.services(),
                 'entrypoint': entrypoint}
 
-    def bundle_trees(self, ebnf=None):
+    def bundle_trees(self, ebnf=None, jobs=None):
         """
         Makes a bundle of syntax trees
         """
-        self.parse(self.find_stories(), ebnf)
+        list(self.run('parse', self.find_stories(), ebnf, jobs))
         return self.stories
 
     def lex(self, ebnf=None):
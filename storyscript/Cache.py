@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import io
+import json
+import os
+
+from .AtomicFile import AtomicFile
+from .Version import version
+from .parser import Parser
+
+
+class Cache:
+    """
+    Stores compiled stories by a hash of their source, so that unchanged
+    stories don't have to be compiled again. Entries are kept in memory and,
+    unless directory is None, on disk. The entries of the cache a cache was
+    made from are shared, but are not pickled with it.
+    """
+
+    def __init__(self, directory='.storyscript-cache'):
+        self.directory = directory
+        self.memory = {}
+        self.shared = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        state = dict(vars(self))
+        state['shared'] = {}
+        return state
+
+    def empty(self):
+        """
+        Gets a cache using the same directory, with no hits or misses and
+        sharing the entries of this one.
+        """
+        cache = Cache(directory=self.directory)
+        cache.shared = self.memory
+        return cache
+
+    def merge(self, cache):
+        """
+        Adds the hits, misses and entries of another cache to this one.
+        """
+        self.hits += cache.hits
+        self.misses += cache.misses
+        self.memory.update(cache.memory)
+
+    @staticmethod
+    def digest(ebnf):
+        """
+        Gets the hash of the grammar used to compile stories.
+        """
+        return Parser(ebnf=ebnf).hashed_grammar()[1]
+
+    def key(self, source, ebnf):
+        """
+        Builds the key of a story. Stories are compiled again when they are
+        changed, or when either storyscript or the grammar are.
+        """
+        data = '\n'.join((version, self.digest(ebnf), source))
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, '{}.json'.format(key))
+
+    def load(self, key):
+        """
+        Loads an entry from disk. Missing or broken entries are ignored.
+        """
+        if self.directory is None:
+            return None
+        try:
+            with io.open(self.path(key), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def dump(self, key, entry):
+        """
+        Dumps an entry to disk, atomically. Entries that can't be written
+        are not cached.
+        """
+        if self.directory is None:
+            return
+        path = self.path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with AtomicFile.open(path) as f:
+                json.dump(entry, f)
+        except Exception:
+            return
+
+    def get(self, source, ebnf):
+        """
+        Gets the cached entry of a story, made of its compiled tree and of
+        the modules it imports.
+        """
+        key = self.key(source, ebnf)
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self.shared.get(key)
+        if entry is None:
+            entry = self.load(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.memory[key] = entry
+        return entry
+
+    def set(self, source, ebnf, compiled, modules):
+        """
+        Stores the entry of a story.
+        """
+        key = self.key(source, ebnf)
+        entry = {'compiled': compiled, 'modules': modules}
+        self.memory[key] = entry
+        self.dump(key, entry)
@@ -1,22 +1,34 @@
 # -*- coding: utf-8 -*-
-import io
 import os
 
 import click
 
 from click_alias import ClickAliasedGroup
 
-from .App import App
+from .AtomicFile import AtomicFile
 from .Project import Project
 from .Version import version as app_version
-from .exceptions import StoryError
 
 
 class Cli:
+    """
+    The command line. Commands import the compiler when they run, so that
+    commands that don't need it start quickly.
+    """
 
     version_help = 'Prints Storyscript version'
     silent_help = 'Silent mode. Return syntax errors only.'
     ebnf_help = 'Load the grammar from a file. Useful for development'
+    jobs_help = 'Number of processes used to parse and compile stories'
+    cache_help = 'Compile again only the stories changed since the last run'
+    watch_help = 'Compile stories again every time they change'
+    socket_help = 'Path of the socket. Defaults to a per-user location'
+    compact_help = 'Output JSON without indentation'
+    format_help = 'Format of the output. Binary formats need their package'
+    formats = ('json', 'orjson', 'msgpack', 'cbor')
+    profile_help = 'Print the time spent by each phase, as a table or JSON'
+    memory_help = 'Profile the memory allocated by each phase too. Slow'
+    pstats_help = 'Profile the run with cProfile, saving the stats to a file'
 
     @click.group(invoke_without_command=True, cls=ClickAliasedGroup)
     @click.option('--version', '-v', is_flag=True, help=version_help)
@@ -42,13 +54,16 @@ class Cli:
     @click.option('--preprocess', is_flag=True)
     @click.option('--ignore', default=None,
                   help='Specify path of ignored files')
-    def parse(path, debug, ebnf, raw, ignore, preprocess):
+    @click.option('--jobs', default=1, help=jobs_help)
+    def parse(path, debug, ebnf, raw, ignore, preprocess, jobs):
         """
         Parses stories, producing the abstract syntax tree.
         """
+        from .App import App
+        from .exceptions import StoryError
         try:
             trees = App.parse(path, ignored_path=ignore, ebnf=ebnf,
-                              preprocess=preprocess)
+                              preprocess=preprocess, jobs=jobs)
             for story, tree in trees.items():
                 click.echo('File: {}'.format(story))
                 if raw:
@@ -78,36 +93,142 @@ class Cli:
     @click.option('--ebnf', help=ebnf_help)
     @click.option('--ignore', default=None,
                   help='Specify path of ignored files')
-    def compile(path, output, json, silent, debug, ebnf, ignore):
+    @click.option('--jobs', default=1, help=jobs_help)
+    @click.option('--cache', is_flag=True, help=cache_help)
+    @click.option('--watch', '-w', is_flag=True, help=watch_help)
+    @click.option('--compact', is_flag=True, help=compact_help)
+    @click.option('--format', 'format', default='json', help=format_help,
+                  type=click.Choice(formats))
+    @click.option('--profile', default=None, help=profile_help,
+                  type=click.Choice(['table', 'json']))
+    @click.option('--memory', is_flag=True, help=memory_help)
+    @click.option('--pstats', default=None, help=pstats_help)
+    def compile(path, output, json, silent, debug, ebnf, ignore, jobs,
+                cache, watch, compact, format, profile, memory, pstats):
         """
         Compiles stories and prints the resulting json
         """
+        from .Cache import Cache
+        from .Profiler import Profiler
+        from .exceptions import StoryError
+        if cache:
+            cache = Cache()
+        elif watch:
+            cache = Cache(directory=None)
+        else:
+            cache = None
+        options = {'ignored_path': ignore, 'ebnf': ebnf, 'jobs': jobs,
+                   'cache': cache}
+        if format != 'json':
+            json = True
+        if watch:
+            Cli.watch(path, output, json, silent, compact, format, options)
+            return
+        profiler = None
+        if profile or pstats:
+            profiler = Profiler(memory=memory, pstats=pstats)
+            options['profiler'] = profiler
         try:
-            results = App.compile(path, ignored_path=ignore,
-                                  ebnf=ebnf)
-            if not silent:
-                if json:
-                    if output:
-                        with io.open(output, 'w') as f:
-                            f.write(results)
-                        exit()
-                    click.echo(results)
-                else:
-                    msg = 'Script syntax passed!'
-                    click.echo(click.style(msg, fg='green'))
+            if profiler is None:
+                Cli.output(path, output, json, silent, compact, format,
+                           options)
+            else:
+                with profiler:
+                    Cli.output(path, output, json, silent, compact, format,
+                               options)
+            if profile:
+                Cli.profile(profiler, profile)
+            if not silent and cache:
+                msg = 'Cache: {} hits, {} misses'
+                click.echo(msg.format(cache.hits, cache.misses), err=True)
         except StoryError as e:
             if debug:
                 raise e
             else:
-                e.echo()
+                e.echo(err=Cli.prints(output, json, silent))
                 exit(1)
         except Exception as e:
             if debug:
                 raise e
             else:
-                StoryError.internal_error(e).echo()
+                error = StoryError.internal_error(e)
+                error.echo(err=Cli.prints(output, json, silent))
                 exit(1)
 
+    @staticmethod
+    def profile(profiler, profile):
+        """
+        Prints the results of the profiler.
+        """
+        if profile == 'json':
+            import json
+            click.echo(json.dumps(profiler.results(), indent=2), err=True)
+        else:
+            click.echo(profiler.table(), err=True)
+
+    @staticmethod
+    def write(output, path, compact, format, options):
+        """
+        Compiles stories, writing them to the output file. The file is
+        replaced only once all stories have been compiled.
+        """
+        from .App import App
+        if format in ('json', 'orjson'):
+            opened = AtomicFile.open(output, 'w', encoding='utf-8')
+        else:
+            opened = AtomicFile.open(output, 'wb')
+        with opened as f:
+            App.write(f, path, compact=compact, format=format, **options)
+
+    @staticmethod
+    def prints(output, json, silent):
+        """
+        Whether the compiled stories are printed, in which case errors are
+        printed to stderr, not to be mixed up with them.
+        """
+        return json and not silent and not output
+
+    @staticmethod
+    def output(path, output, json, silent, compact, format, options):
+        """
+        Compiles stories, writing them to the output file or printing them.
+        JSON is printed as soon as every story is compiled.
+        """
+        from .App import App
+        if silent:
+            App.compile(path, **options)
+        elif json is False:
+            App.compile(path, **options)
+            click.echo(click.style('Script syntax passed!', fg='green'))
+        elif output:
+            Cli.write(output, path, compact, format, options)
+        elif format in ('json', 'orjson'):
+            App.write(click.get_text_stream('stdout'), path,
+                      compact=compact, format=format, **options)
+            click.echo()
+        else:
+            App.write(click.get_binary_stream('stdout'), path,
+                      format=format, **options)
+
+    @staticmethod
+    def watch(path, output, json, silent, compact, format, options):
+        """
+        Compiles stories every time they change. Unchanged stories are
+        taken from the cache, so they are not compiled again.
+        """
+        from .Watcher import Watcher
+        from .exceptions import StoryError
+        watcher = Watcher(path, ignored_path=options['ignored_path'])
+        for changes in watcher.watch():
+            try:
+                Cli.output(path, output, json, silent, compact, format,
+                           options)
+            except StoryError as e:
+                e.echo(err=Cli.prints(output, json, silent))
+            except Exception as e:
+                error = StoryError.internal_error(e)
+                error.echo(err=Cli.prints(output, json, silent))
+
     @staticmethod
     @main.command(aliases=['l'])
     @click.argument('path', default=os.getcwd())
@@ -117,6 +238,8 @@ class Cli:
         """
         Shows lexer tokens for given stories
         """
+        from .App import App
+        from .exceptions import StoryError
         try:
             results = App.lex(path, ebnf=ebnf)
             for file, tokens in results.items():
@@ -142,8 +265,30 @@ class Cli:
         """
         Prints the grammar specification
         """
+        from .App import App
         click.echo(App.grammar())
 
+    @staticmethod
+    @main.command(aliases=['s'])
+    @click.option('--socket', default=None, help=socket_help)
+    @click.option('--debug', is_flag=True)
+    def serve(socket, debug):
+        """
+        Serves compile, parse and lex requests over a Unix socket
+        """
+        from .Server import Server
+        from .exceptions import StoryError
+        server = Server(path=socket)
+        click.echo('Listening on {}'.format(server.path), err=True)
+        try:
+            server.serve()
+        except StoryError as e:
+            if debug:
+                raise e
+            else:
+                e.echo()
+                exit(1)
+
     @staticmethod
     @main.command(aliases=['n'])
     @click.argument('name')
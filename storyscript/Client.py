@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import socket
+
+from .Version import version
+
+
+class Client:
+    """
+    Sends requests to a compile server. When no server is running, requests
+    are handled in process instead. The compiler is only imported then, so
+    that clients start quickly.
+    """
+
+    def __init__(self, path=None, timeout=None):
+        if path is None:
+            path = self.socket_path()
+        self.path = path
+        self.timeout = timeout
+
+    @staticmethod
+    def socket_path():
+        """
+        Gets the default path of the socket, in a directory private to the
+        user. The version is part of the name, so that clients only talk to
+        servers of the same version.
+        """
+        directory = os.environ.get('XDG_RUNTIME_DIR')
+        if directory is None:
+            cache = os.environ.get('XDG_CACHE_HOME')
+            if cache is None:
+                cache = os.path.join(os.path.expanduser('~'), '.cache')
+            directory = os.path.join(cache, 'storyscript')
+        return os.path.join(directory, 'storyscript-{}.sock'.format(version))
+
+    def request(self, method, params):
+        """
+        Sends a request to the server, returning its response.
+        """
+        request = json.dumps({'method': method, 'params': params})
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(self.timeout)
+            client.connect(self.path)
+            client.sendall(request.encode('utf-8') + b'\n')
+            with client.makefile('rb') as stream:
+                return json.loads(stream.readline())
+
+    def call(self, method, **params):
+        """
+        Calls a method of the server, or in process when there's no server.
+        """
+        try:
+            response = self.request(method, params)
+        except (FileNotFoundError, ConnectionRefusedError):
+            from .Server import Server
+            return getattr(Server, method)(**params)
+        if 'error' in response:
+            from .exceptions import StoryError
+            raise StoryError.unnamed_error(response['error'])
+        return response['result']
+
+    def loads(self, string):
+        """
+        Compiles a story from a string.
+        """
+        return self.call('loads', string=string)
+
+    def load_map(self, files):
+        """
+        Compiles multiple stories from a file mapping.
+        """
+        return self.call('load_map', files=files)
+
+    def parse(self, source):
+        """
+        Parses a story, returning its pretty-printed tree.
+        """
+        return self.call('parse', source=source)
+
+    def lex(self, source):
+        """
+        Lexes a story, returning the type and value of its tokens.
+        """
+        return self.call('lex', source=source)
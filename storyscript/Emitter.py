@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from .Serializer import Serializer
+
+
+class Emitter:
+    """
+    Writes a bundle as JSON to a stream, one story at a time as soon as it's
+    compiled, so that the whole document is never held in memory.
+    """
+
+    def __init__(self, stream, compact=False, profiler=None, fast=False):
+        self.stream = stream
+        self.compact = compact
+        self.fast = fast
+        self.profiler = profiler
+        self.indent = 2
+        self.separators = (',', ': ')
+        if compact:
+            self.indent = None
+            self.separators = (',', ':')
+
+    def newline(self, level):
+        """
+        Starts a new line, indented at the given level.
+        """
+        if self.indent is None:
+            return ''
+        return '\n' + ' ' * self.indent * level
+
+    def dumps(self, data, level):
+        """
+        Dumps data nested at the given level.
+        """
+        dumped = Serializer.json(data, compact=self.compact,
+                                 fast=self.fast)
+        if self.compact:
+            return dumped
+        return dumped.replace('\n', self.newline(level))
+
+    def key(self, key, level):
+        """
+        Writes the key of an item of an object nested at the given level.
+        """
+        self.stream.write(self.newline(level))
+        self.stream.write(Serializer.json(key))
+        self.stream.write(self.separators[1])
+
+    def dump(self, storypath, story):
+        """
+        Dumps a compiled story, recording the time it takes if profiling.
+        """
+        if self.profiler is None:
+            return self.dumps(story, 2)
+        with self.profiler.phase(storypath, 'json'):
+            return self.dumps(story, 2)
+
+    def header(self):
+        """
+        Writes the start of the document, up to the stories.
+        """
+        self.stream.write('{')
+        self.key('stories', 1)
+        self.stream.write('{')
+
+    def write_stories(self, bundle, ebnf, jobs):
+        """
+        Writes the stories as they are compiled. The start of the document is
+        written with the first story, so that nothing is written when it
+        can't be compiled. When a later story can't, the truncated document
+        is ended with a new line.
+        """
+        separator = None
+        try:
+            for storypath, story in bundle.stream(ebnf=ebnf, jobs=jobs):
+                if separator is None:
+                    self.header()
+                    separator = ''
+                self.stream.write(separator)
+                self.key(storypath, 2)
+                self.stream.write(self.dump(storypath, story))
+                separator = self.separators[0]
+        except BaseException:
+            if separator is not None:
+                self.stream.write('\n')
+            raise
+        if separator is None:
+            self.header()
+        elif separator:
+            self.stream.write(self.newline(1))
+
+    def write(self, bundle, ebnf=None, jobs=None):
+        """
+        Compiles a bundle, writing it to the stream.
+        """
+        entrypoint = bundle.find_stories()
+        self.write_stories(bundle, ebnf, jobs)
+        self.stream.write('}' + self.separators[0])
+        self.key('services', 1)
+        self.stream.write(self.dumps(bundle.services(), 1))
+        self.stream.write(self.separators[0])
+        self.key('entrypoint', 1)
+        self.stream.write(self.dumps(entrypoint, 1))
+        self.stream.write(self.newline(0) + '}')
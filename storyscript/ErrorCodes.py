@@ -70,6 +70,7 @@ class ErrorCodes:
                             'An indented block is required to follow here')
     block_expected_before = ('E0046',
                              'An indented block is required to be before here')
+    import_cycle = ('E0047', 'Stories can not import each other in a cycle')
 
     @staticmethod
     def is_error(error_name):
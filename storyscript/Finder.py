@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import concurrent.futures
+import os
+import threading
+import time
+
+from .Gitignore import Gitignore
+
+
+class Finder:
+    """
+    Finds the stories in a directory, listing it with scandir. When pruning,
+    hidden and vendored directories, and those ignored by git, are not
+    walked and stories ignored by git are left out. The subdirectories of
+    the directory can be walked by a pool of threads.
+    """
+    vendored = ('node_modules', '__pycache__')
+    cache = {}
+    cache_lock = threading.Lock()
+
+    def __init__(self, prune=True, gitignore=None):
+        self.prune = prune
+        self.gitignore = gitignore
+        self.mtimes = {}
+
+    @classmethod
+    def pruned(cls, name):
+        """
+        Whether a directory is pruned because of its name.
+        """
+        return name.startswith('.') or name in cls.vendored
+
+    @staticmethod
+    def child(path, entry):
+        if path == os.curdir:
+            return entry.name
+        return entry.path
+
+    @staticmethod
+    def location(location, name):
+        """
+        Gets the location of an entry in the repository, from the one of
+        its directory.
+        """
+        if location is None:
+            return None
+        if location == '':
+            return name
+        return '{}/{}'.format(location, name)
+
+    def ignored(self, location, directory=False):
+        if location is None:
+            return False
+        return self.gitignore.check(location, directory=directory)
+
+    def skipped(self, name, location):
+        """
+        Whether a subdirectory is not walked.
+        """
+        if self.prune:
+            return self.pruned(name) or self.ignored(location, True)
+        return False
+
+    def scan(self, path, location):
+        """
+        Lists a directory, returning its stories and the subdirectories to
+        walk with their location in the repository. Directories that can't
+        be listed are skipped, like os.walk does.
+        """
+        stories = []
+        subdirs = []
+        try:
+            self.mtimes[path] = os.stat(path).st_mtime_ns
+            with os.scandir(path) as iterator:
+                entries = list(iterator)
+            names = [entry.name for entry in entries]
+            if location is not None and '.gitignore' not in names:
+                self.gitignore.missing(location)
+            for entry in entries:
+                if entry.is_dir():
+                    child_location = self.location(location, entry.name)
+                    if entry.is_symlink():
+                        continue
+                    if self.skipped(entry.name, child_location):
+                        continue
+                    subdirs.append((self.child(path, entry), child_location))
+                elif entry.name.endswith('.story'):
+                    child_location = self.location(location, entry.name)
+                    if not self.ignored(child_location):
+                        stories.append(self.child(path, entry))
+        except OSError:
+            pass
+        return stories, subdirs
+
+    def walk(self, path, location):
+        """
+        Walks a directory, finding the stories in the same order as os.walk
+        would.
+        """
+        stories = []
+        stack = [(path, location)]
+        while stack:
+            found, subdirs = self.scan(*stack.pop())
+            stories += found
+            stack += reversed(subdirs)
+        return stories
+
+    def find(self, directory, jobs=None):
+        """
+        Finds the stories in a directory, walking each of its subdirectories
+        in a thread when more jobs are allowed.
+        """
+        path = os.path.relpath(directory)
+        location = None
+        if self.gitignore is not None:
+            location = self.gitignore.relative(directory)
+        if jobs is None or jobs < 2:
+            return self.walk(path, location)
+        stories, subdirs = self.scan(path, location)
+        with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+            results = executor.map(lambda subdir: self.walk(*subdir), subdirs)
+            for found in results:
+                stories += found
+        return stories
+
+    @staticmethod
+    def mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def stamps(self):
+        """
+        Gets the modification times of the directories walked and of the
+        ignore files read.
+        """
+        stamps = dict(self.mtimes)
+        if self.gitignore is not None:
+            for path in self.gitignore.paths:
+                stamps[path] = self.mtime(path)
+        return stamps
+
+    @classmethod
+    def fresh(cls, stamps):
+        """
+        Whether nothing was changed since the stamps were taken.
+        """
+        for path, mtime in stamps.items():
+            if cls.mtime(path) != mtime:
+                return False
+        return True
+
+    @staticmethod
+    def racy(stamps, started):
+        """
+        Whether something was changed too close to the walk, as it could be
+        changed again without changing its modification time.
+        """
+        limit = int((started - 1) * 1e9)
+        for mtime in stamps.values():
+            if mtime is not None and mtime >= limit:
+                return True
+        return False
+
+    @classmethod
+    def stories(cls, directory, prune=True, jobs=None):
+        """
+        Finds the stories in a directory. Results are cached by the
+        modification times of the directories walked and of the ignore
+        files read, so that finding them again only has to check those.
+        """
+        key = (os.path.abspath(directory), os.getcwd(), prune)
+        with cls.cache_lock:
+            cached = cls.cache.get(key)
+        if cached is not None and cls.fresh(cached[0]):
+            return list(cached[1])
+        gitignore = None
+        if prune:
+            gitignore = Gitignore.from_path(directory)
+        finder = cls(prune=prune, gitignore=gitignore)
+        started = time.time()
+        stories = finder.find(directory, jobs=jobs)
+        stamps = finder.stamps()
+        if not cls.racy(stamps, started):
+            with cls.cache_lock:
+                cls.cache[key] = (stamps, list(stories))
+        return stories
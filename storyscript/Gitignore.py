@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import re
+import struct
+import subprocess
+
+
+class Gitignore:
+    """
+    Matches paths against the ignore files of the git repository they are
+    in, as git does. The rules of a .gitignore apply to its directory, with
+    the rules of deeper files and later lines taking precedence. Each file
+    is compiled to a single pattern and read only when a path under its
+    directory is first matched. Like git, files that are tracked are not
+    ignored, reading them from the index of the repository once a path is
+    excluded, or asking git when the index can't be read. The paths of the
+    files read, or looked for, are kept in paths.
+    """
+    hash_sizes = {'sha1': 20, 'sha256': 32}
+
+    def __init__(self, root=None):
+        self.root = root
+        self.excludes = None
+        self.groups = {}
+        self.directories = {}
+        self.index = None
+        self.paths = []
+        if root is not None:
+            exclude = os.path.join(root, '.git', 'info', 'exclude')
+            self.paths = [self.global_excludes(), exclude]
+            rules = self.read(self.paths[0]) + self.read(exclude)
+            self.excludes = self.compile(rules)
+
+    @staticmethod
+    def global_excludes():
+        """
+        Gets the path of the user's excludes file, where git looks for it
+        when core.excludesFile is not set.
+        """
+        config = os.environ.get('XDG_CONFIG_HOME')
+        if config is None:
+            config = os.path.join(os.path.expanduser('~'), '.config')
+        return os.path.join(config, 'git', 'ignore')
+
+    @staticmethod
+    def find_root(path):
+        """
+        Finds the root of the repository containing a path, if any.
+        """
+        path = os.path.abspath(path)
+        while True:
+            if os.path.exists(os.path.join(path, '.git')):
+                return path
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(root=cls.find_root(path))
+
+    @staticmethod
+    def translate(pattern):
+        """
+        Translates a glob to a regular expression. Wildcards don't match
+        slashes, unless they are double asterisks making up a whole part of
+        the path.
+        """
+        regex = ''
+        i = 0
+        length = len(pattern)
+        while i < length:
+            char = pattern[i]
+            i += 1
+            if char == '*':
+                if pattern.startswith('*', i) and (i == 1 or
+                                                   pattern[i - 2] == '/'):
+                    if i + 1 == length:
+                        regex += '.*'
+                        i += 1
+                        continue
+                    if pattern[i + 1] == '/':
+                        regex += '(?:.*/)?'
+                        i += 2
+                        continue
+                regex += '[^/]*'
+            elif char == '?':
+                regex += '[^/]'
+            elif char == '[':
+                end = pattern.find(']', i + 1)
+                if end == -1:
+                    regex += '\\['
+                    continue
+                chars = pattern[i:end].replace('\\', '\\\\')
+                if chars[0] in '!^':
+                    chars = '^/' + chars[1:]
+                regex += '[{}]'.format(chars)
+                i = end + 1
+            elif char == '\\' and i < length:
+                regex += re.escape(pattern[i])
+                i += 1
+            else:
+                regex += re.escape(char)
+        return regex
+
+    @classmethod
+    def rule(cls, line):
+        """
+        Parses a line of an ignore file to a rule, made of the regular
+        expression for the paths it matches, whether it's negated and
+        whether it matches only directories. Blank lines and comments are
+        not rules.
+        """
+        stripped = line.rstrip(' ')
+        if stripped.endswith('\\') and stripped != line:
+            stripped += ' '
+        line = stripped
+        if line == '' or line.startswith('#'):
+            return None
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        directories = line.endswith('/')
+        line = line.rstrip('/')
+        if line == '':
+            return None
+        if '/' in line:
+            regex = cls.translate(line.lstrip('/'))
+        else:
+            regex = '(?:.*/)?' + cls.translate(line)
+        return regex, negated, directories
+
+    @classmethod
+    def read(cls, path):
+        """
+        Reads the rules of an ignore file, if it exists.
+        """
+        try:
+            with io.open(path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return []
+        rules = []
+        for line in lines:
+            rule = cls.rule(line)
+            if rule:
+                rules.append(rule)
+        return rules
+
+    @staticmethod
+    def compile(rules):
+        """
+        Compiles rules to a pattern matching files and one matching
+        directories. Later rules are tried first, and the group matched is
+        named after the index of the rule, to tell whether it's negated.
+        """
+        if rules == []:
+            return None
+        files = []
+        directories = []
+        for index in reversed(range(len(rules))):
+            regex, negated, only_directories = rules[index]
+            group = '(?P<r{}>{})'.format(index, regex)
+            directories.append(group)
+            if not only_directories:
+                files.append(group)
+        negations = [rule[1] for rule in rules]
+        files_pattern = None
+        if files:
+            files_pattern = re.compile('|'.join(files))
+        return files_pattern, re.compile('|'.join(directories)), negations
+
+    @staticmethod
+    def match(group, path, directory):
+        """
+        Matches a path against a compiled ignore file, returning whether it's
+        ignored, or None when no rule matches it.
+        """
+        files, directories, negations = group
+        pattern = files
+        if directory:
+            pattern = directories
+        if pattern is None:
+            return None
+        match = pattern.fullmatch(path)
+        if match is None:
+            return None
+        return not negations[int(match.lastgroup[1:])]
+
+    @staticmethod
+    def varint(data, offset):
+        """
+        Reads an offset encoded integer, as used by version 4 indexes,
+        returning it and the offset after it.
+        """
+        byte = data[offset]
+        offset += 1
+        value = byte & 0x7f
+        while byte & 0x80:
+            byte = data[offset]
+            offset += 1
+            value = ((value + 1) << 7) | (byte & 0x7f)
+        return value, offset
+
+    @classmethod
+    def hash_size(cls, root):
+        """
+        Gets the size of the object hashes of a repository, from its object
+        format, or None when the format is unknown.
+        """
+        path = os.path.join(root, '.git', 'config')
+        try:
+            with io.open(path, 'r', encoding='utf-8') as f:
+                config = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        match = re.search(r'^\s*objectformat\s*=\s*(\S+)', config,
+                          re.IGNORECASE | re.MULTILINE)
+        if match is None:
+            return cls.hash_sizes['sha1']
+        return cls.hash_sizes.get(match.group(1).lower())
+
+    @classmethod
+    def read_index(cls, path, hash_size=20):
+        """
+        Reads the paths of the files tracked in a git index, or None when
+        the index can't be read. Split indexes, keeping most entries in a
+        shared index, are not read either.
+        """
+        try:
+            with io.open(path, 'rb') as f:
+                data = f.read()
+            signature, version, count = struct.unpack('>4sII', data[:12])
+            if signature != b'DIRC' or version not in (2, 3, 4):
+                return None
+            names = []
+            name = b''
+            offset = 12
+            flags_offset = 40 + hash_size
+            for _ in range(count):
+                flags_end = offset + flags_offset + 2
+                flags = struct.unpack('>H', data[flags_end - 2:flags_end])[0]
+                start = flags_end
+                if flags & 0x4000:
+                    start += 2
+                if version == 4:
+                    strip, start = cls.varint(data, start)
+                    end = data.index(b'\0', start)
+                    name = name[:len(name) - strip] + data[start:end]
+                    offset = end + 1
+                else:
+                    end = data.index(b'\0', start)
+                    name = data[start:end]
+                    offset += ((end - offset) // 8 + 1) * 8
+                names.append(name)
+            end = len(data) - hash_size
+            while offset < end:
+                extension, size = struct.unpack('>4sI',
+                                                data[offset:offset + 8])
+                if extension == b'link':
+                    return None
+                offset += 8 + size
+            if offset != end:
+                return None
+        except (OSError, struct.error, ValueError, IndexError):
+            return None
+        return names
+
+    @staticmethod
+    def ls_files(root):
+        """
+        Asks git for the paths of the files tracked in a repository, for
+        when its index can't be read. Without git, nothing is tracked.
+        """
+        command = ['git', 'ls-files', '--cached', '-z']
+        try:
+            process = subprocess.run(command, cwd=root, check=True,
+                                     stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.CalledProcessError):
+            return []
+        return [name for name in process.stdout.split(b'\0') if name]
+
+    @staticmethod
+    def tree(names):
+        """
+        Gets the paths of tracked files and the directories containing them.
+        """
+        files = set()
+        directories = set()
+        for name in names:
+            path = name.decode('utf-8', 'surrogateescape')
+            files.add(path)
+            while '/' in path:
+                path = path.rsplit('/', 1)[0]
+                if path in directories:
+                    break
+                directories.add(path)
+        return files, directories
+
+    def tracked(self, relative, directory=False):
+        """
+        Whether a file is tracked, or a directory contains tracked files.
+        """
+        if self.index is None:
+            path = os.path.join(self.root, '.git', 'index')
+            self.paths.append(path)
+            names = None
+            hash_size = self.hash_size(self.root)
+            if hash_size is not None:
+                names = self.read_index(path, hash_size=hash_size)
+            if names is None:
+                names = self.ls_files(self.root)
+            self.index = self.tree(names)
+        files, directories = self.index
+        if directory:
+            return relative in directories
+        return relative in files
+
+    def group(self, base):
+        """
+        Gets the compiled .gitignore of a directory of the repository.
+        """
+        if base not in self.groups:
+            path = os.path.join(self.root, base, '.gitignore')
+            self.paths.append(path)
+            self.groups[base] = self.compile(self.read(path))
+        return self.groups[base]
+
+    def missing(self, base):
+        """
+        Records that a directory has no .gitignore, so that it's not looked
+        for.
+        """
+        self.groups.setdefault(base, None)
+
+    def relative(self, path):
+        """
+        Gets a path relative to the root of the repository, separated by
+        slashes, or None when it's not in the repository.
+        """
+        if self.root is None:
+            return None
+        relative = os.path.relpath(os.path.abspath(path), self.root)
+        if relative == os.curdir:
+            return ''
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return None
+        return '/'.join(relative.split(os.sep))
+
+    def ignored(self, path, directory=False):
+        """
+        Checks whether git ignores a path. Directories must be told apart,
+        as some rules match only them.
+        """
+        relative = self.relative(path)
+        if not relative:
+            return False
+        return self.check(relative, directory=directory)
+
+    def matched(self, relative, directory):
+        """
+        Checks whether the rules of the ignore files exclude a path relative
+        to the root of the repository.
+        """
+        parts = relative.split('/')
+        if parts[-1] == '.git':
+            return True
+        groups = [('', self.excludes)]
+        for index in range(len(parts)):
+            base = '/'.join(parts[:index])
+            groups.append((base, self.group(base)))
+        for base, group in reversed(groups):
+            if group is None:
+                continue
+            name = relative
+            if base:
+                name = relative[len(base) + 1:]
+            result = self.match(group, name, directory)
+            if result is not None:
+                return result
+        return False
+
+    def excluded(self, relative, directory=False):
+        """
+        Checks whether a path is excluded, either by the rules or because
+        its directory is. The results for directories are kept.
+        """
+        if directory and relative in self.directories:
+            return self.directories[relative]
+        parent = relative.rpartition('/')[0]
+        if parent and self.excluded(parent, directory=True):
+            result = True
+        else:
+            result = self.matched(relative, directory)
+        if directory:
+            self.directories[relative] = result
+        return result
+
+    def check(self, relative, directory=False):
+        """
+        Checks whether git ignores a path relative to the root of the
+        repository: it's excluded and not tracked, nor does it contain
+        tracked files.
+        """
+        if not self.excluded(relative, directory=directory):
+            return False
+        return not self.tracked(relative, directory=directory)
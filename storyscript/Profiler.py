@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import cProfile
+import contextlib
+import time
+import tracemalloc
+
+
+class Profiler:
+    """
+    Records the time spent by every phase of compiling each story and,
+    when memory is enabled, the memory they allocate. When pstats is given,
+    the whole run is also profiled with cProfile, dumping the stats to it.
+    """
+    phases = ('lex', 'parse', 'transform', 'preprocess', 'compile', 'json')
+
+    def __init__(self, memory=False, pstats=None):
+        self.memory = memory
+        self.pstats = pstats
+        self.profile = None
+        self.stories = {}
+
+    def start(self):
+        if self.memory:
+            tracemalloc.start()
+        if self.pstats:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stop(self):
+        if self.profile:
+            self.profile.disable()
+            self.profile.dump_stats(self.pstats)
+            self.profile = None
+        if self.memory:
+            tracemalloc.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @contextlib.contextmanager
+    def phase(self, story, name):
+        """
+        Records a phase of a story. Phases recorded many times are added up.
+        """
+        memory = 0
+        if self.memory:
+            memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases = self.stories.setdefault(story, {})
+            phase = phases.setdefault(name, {'time': 0, 'memory': 0})
+            phase['time'] += time.perf_counter() - start
+            if self.memory:
+                phase['memory'] += tracemalloc.get_traced_memory()[0] - memory
+
+    def totals(self):
+        """
+        Adds up the phases of all stories.
+        """
+        totals = {}
+        for phases in self.stories.values():
+            for name, phase in phases.items():
+                total = totals.setdefault(name, {'time': 0, 'memory': 0})
+                total['time'] += phase['time']
+                total['memory'] += phase['memory']
+        return totals
+
+    def results(self):
+        return {'stories': self.stories, 'totals': self.totals()}
+
+    @staticmethod
+    def cell(phase, unit):
+        """
+        Formats the time of a phase in milliseconds, or its memory in KiB.
+        """
+        if phase is None:
+            return '-'
+        if unit == 'time':
+            return '{:.2f}'.format(phase['time'] * 1000)
+        return '{:.1f}'.format(phase['memory'] / 1024)
+
+    @classmethod
+    def rows(cls, stories, totals, names, unit):
+        """
+        Builds the rows of a table, one for every story and one for totals.
+        """
+        rows = []
+        for story in sorted(stories, key=str):
+            phases = stories[story]
+            cells = [cls.cell(phases.get(name), unit) for name in names]
+            rows.append([str(story)] + cells)
+        cells = [cls.cell(totals[name], unit) for name in names]
+        rows.append(['total'] + cells)
+        return rows
+
+    def table(self):
+        """
+        Formats the results as a table of milliseconds and, when memory is
+        enabled, of KiB allocated.
+        """
+        totals = self.totals()
+        names = [name for name in self.phases if name in totals]
+        units = [('time', 'ms')]
+        if self.memory:
+            units.append(('memory', 'KiB'))
+        tables = []
+        for unit, label in units:
+            rows = [['story ({})'.format(label)] + names]
+            rows += self.rows(self.stories, totals, names, unit)
+            widths = [max(len(row[i]) for row in rows)
+                      for i in range(len(rows[0]))]
+            lines = []
+            for row in rows:
+                cells = [row[0].ljust(widths[0])]
+                for cell, width in zip(row[1:], widths[1:]):
+                    cells.append(cell.rjust(width))
+                lines.append('  '.join(cells))
+            tables.append('\n'.join(lines))
+        return '\n\n'.join(tables)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import importlib
+import json
+
+from .exceptions import StoryError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Serializer:
+    """
+    Serializes compiled stories. JSON is dumped with the standard library,
+    or with orjson when asked for, which is faster but writes non-ASCII
+    characters and floats differently. Binary formats need their own
+    package.
+    """
+    texts = ('json', 'orjson')
+    packages = {'msgpack': 'msgpack', 'cbor': 'cbor2'}
+
+    @staticmethod
+    def json(data, compact=False, fast=False):
+        """
+        Dumps data as JSON, indented by two spaces unless compact. When fast,
+        orjson dumps it if it can.
+        """
+        if fast and orjson is not None:
+            option = 0 if compact else orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(data, option=option).decode('utf-8')
+            except TypeError:
+                # NOTE: orjson can't dump integers wider than 64 bits
+                pass
+        if compact:
+            return json.dumps(data, separators=(',', ':'))
+        return json.dumps(data, indent=2)
+
+    @staticmethod
+    def package(name):
+        """
+        Imports the package needed by a binary format.
+        """
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            message = 'Missing package {}: pip install {}'
+            raise StoryError.unnamed_error(message.format(name, name))
+
+    @classmethod
+    def msgpack(cls, data):
+        return cls.package('msgpack').packb(data, use_bin_type=True)
+
+    @classmethod
+    def cbor(cls, data):
+        return cls.package('cbor2').dumps(data)
+
+    @classmethod
+    def encoder(cls, format):
+        """
+        Gets the function encoding data in a binary format, making sure
+        that its package is installed.
+        """
+        cls.package(cls.packages[format])
+        return getattr(cls, format)
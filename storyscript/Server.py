@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import socket
+import threading
+
+from .Api import Api
+from .Client import Client
+from .Story import Story
+from .exceptions import StoryError
+from .parser import Parser
+
+
+class Server:
+    """
+    Serves the Api over a Unix socket, so that stories are compiled by a
+    long running process that keeps the parser loaded.
+    Requests and responses are JSON objects, one per line.
+    """
+    methods = ('loads', 'load_map', 'parse', 'lex')
+
+    def __init__(self, path=None):
+        if path is None:
+            path = Client.socket_path()
+        self.path = path
+        # The compiler is not thread-safe, so requests are handled one
+        # at a time.
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def loads(string):
+        return Api.loads(string)
+
+    @staticmethod
+    def load_map(files):
+        return Api.load_map(files)
+
+    @staticmethod
+    def parse(source):
+        """
+        Parses a story, returning its pretty-printed tree.
+        """
+        story = Story(source)
+        story.parse()
+        return story.tree.pretty()
+
+    @staticmethod
+    def lex(source):
+        """
+        Lexes a story, returning the type and value of its tokens.
+        """
+        return [[token.type, token.value] for token in Story(source).lex()]
+
+    @classmethod
+    def call(cls, request):
+        """
+        Calls the method of a request, returning the response.
+        """
+        method = request.get('method')
+        if method not in cls.methods:
+            return {'error': 'Unknown method: {}'.format(method)}
+        params = request.get('params', {})
+        if isinstance(params, dict) is False:
+            return {'error': 'Invalid params'}
+        try:
+            return {'result': getattr(cls, method)(**params)}
+        except StoryError as error:
+            error.with_color = False
+            return {'error': error.message()}
+        except Exception as error:
+            return {'error': StoryError.internal_error(error).message()}
+
+    def respond(self, line):
+        """
+        Responds to a request line.
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'error': 'Invalid request'}
+        if isinstance(request, dict) is False:
+            return {'error': 'Invalid request'}
+        with self.lock:
+            return self.call(request)
+
+    def handle(self, connection):
+        """
+        Handles the requests of a connection, until it's closed.
+        """
+        with connection, connection.makefile('rwb') as stream:
+            for line in stream:
+                response = json.dumps(self.respond(line))
+                stream.write(response.encode('utf-8') + b'\n')
+                stream.flush()
+
+    def running(self):
+        """
+        Checks whether a server is already listening on the socket.
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            try:
+                client.connect(self.path)
+            except OSError:
+                return False
+        return True
+
+    def bind(self):
+        """
+        Creates the socket, removing the one left by a stopped server.
+        """
+        if self.running():
+            message = 'A server is already running at {}'.format(self.path)
+            raise StoryError.unnamed_error(message)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        server.listen()
+        return server
+
+    def serve(self):
+        """
+        Loads the parser, then serves requests until interrupted.
+        """
+        Parser().lark()
+        server = self.bind()
+        try:
+            while True:
+                connection, address = server.accept()
+                thread = threading.Thread(target=self.handle,
+                                          args=(connection,), daemon=True)
+                thread.start()
+        finally:
+            server.close()
+            os.remove(self.path)
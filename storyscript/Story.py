@@ -1,11 +1,10 @@
 # -*- coding: utf-8 -*-
 import io
 import os
-import re
 
 from lark.exceptions import UnexpectedInput, UnexpectedToken
 
-from .compiler import Compiler
+from .compiler import Compiler, Preprocessor
 from .exceptions import CompilerError, StoryError, StorySyntaxError
 from .parser import Parser
 
@@ -16,32 +15,90 @@ class Story:
     compiling it.
     """
 
+    # Regular expressions are lexed where an operand is expected, that is
+    # after these characters and keywords.
+    operators = '\n=([{,:+-*%<>!'
+    keywords = ('and', 'or', 'not', 'if', 'while', 'return', 'raise',
+                'foreach')
+
     def __init__(self, story, path=None):
         self.story = self.clean_source(story)
         self.path = path
 
     @staticmethod
-    def remove_comments(source):
-        """
-        Removes inline comments from source.
-        """
-        return re.sub(r'#[^#\n]+', '', source)
+    def comment(source, start):
+        """
+        Finds the end of the comment at start, returning it with what the
+        comment is replaced by. Block comments are replaced by their
+        newlines, so that line numbers don't change.
+        """
+        if source.startswith('###', start):
+            end = source.find('###', start + 3)
+            if end == -1:
+                end = len(source)
+            else:
+                end += 3
+            return end, '\n' * source.count('\n', start, end)
+        end = source.find('\n', start)
+        if end == -1:
+            end = len(source)
+        return end, ''
 
-    @staticmethod
-    def delete_line(match):
-        """
-        Clears the contents of a line.
-        """
-        return re.sub(r'.*', '', match.group())
+    @classmethod
+    def operand(cls, source, index):
+        """
+        Whether an operand is expected at index, where a slash starts a
+        regular expression rather than a division.
+        """
+        end = index
+        while end > 0 and source[end - 1] in ' \t':
+            end -= 1
+        if end == 0 or source[end - 1] in cls.operators:
+            return True
+        start = end
+        while start > 0 and (source[start - 1].isalnum() or
+                             source[start - 1] == '_'):
+            start -= 1
+        return source[start:end] in cls.keywords
 
     @classmethod
     def clean_source(cls, source):
         """
-        Cleans a story by removing all comments.
-        """
-        return re.sub(
-            r'###[^#]+###', cls.delete_line, cls.remove_comments(source)
-        )
+        Cleans a story by removing all comments, in a single pass that skips
+        strings and regular expressions.
+        """
+        if '#' not in source:
+            return source
+        length = len(source)
+        # The next position of each character, found only once passed.
+        found = {'#': -1, '"': -1, "'": -1, '/': -1}
+        parts = []
+        start = position = 0
+        while True:
+            for char, index in found.items():
+                if index < position:
+                    index = source.find(char, position)
+                    found[char] = length if index == -1 else index
+            comment = found['#']
+            if comment == length:
+                break
+            quote = min(found['"'], found["'"], found['/'])
+            if quote < comment:
+                end = source.find(source[quote], quote + 1)
+                if source[quote] == '/':
+                    if end == -1 or not cls.operand(source, quote):
+                        end = quote
+                elif end == -1:
+                    # NOTE: unclosed strings run to the end of the story
+                    break
+                position = end + 1
+                continue
+            end, replacement = cls.comment(source, comment)
+            parts.append(source[start:comment])
+            parts.append(replacement)
+            start = position = end
+        parts.append(source[start:])
+        return ''.join(parts)
 
     @classmethod
     def read(cls, path):
@@ -79,14 +136,36 @@ class Story:
         """
         return StoryError(error, self.story, path=self.path)
 
-    def parse(self, ebnf=None):
+    def profile_parse(self, parser, profiler):
+        """
+        Parses the story, recording each phase. The story is lexed on its
+        own first, since the parser lexes it while parsing. The parse tables
+        are loaded beforehand, not to be counted in the first story's phases.
+        """
+        if self.story == '':
+            return parser.parse(self.story)
+        parser.lark()
+        with profiler('lex'):
+            parser.lex(self.story)
+        with profiler('parse'):
+            tree = parser.lark_parse(self.story)
+        if parser.transforms_inline():
+            return tree
+        with profiler('transform'):
+            return parser.transform(tree)
+
+    def parse(self, ebnf=None, profiler=None):
         """
-        Parses the story, storing the tree
+        Parses the story, storing the tree. The profiler is called with the
+        name of each phase, returning a context manager recording it.
         """
         parser = Parser(ebnf=ebnf)
         e = None
         try:
-            self.tree = parser.parse(self.story)
+            if profiler is None:
+                self.tree = parser.parse(self.story)
+            else:
+                self.tree = self.profile_parse(parser, profiler)
         except StorySyntaxError as error:
             e = self.error(error)
         except UnexpectedToken as error:
@@ -96,25 +175,43 @@ class Story:
         if e is not None:
             raise e
 
-    def modules(self):
+    def imports(self):
         """
-        Gets the modules of a story from its tree.
+        Gets the import trees of a story, by module path.
         """
-        modules = []
+        imports = {}
         for module in self.tree.find_data('imports'):
             path = module.string.child(0).value[1:-1]
             if path.endswith('.story') is False:
                 path = '{}.story'.format(path)
-            modules.append(path)
-        return modules
+            imports.setdefault(path, module)
+        return imports
+
+    def modules(self):
+        """
+        Gets the modules of a story from its tree.
+        """
+        return list(self.imports())
+
+    def profile_compile(self, profiler):
+        """
+        Compiles the story, recording each phase.
+        """
+        with profiler('preprocess'):
+            tree = Preprocessor.process(self.tree)
+        with profiler('compile'):
+            return Compiler.compile_tree(tree)
 
-    def compile(self):
+    def compile(self, profiler=None):
         """
         Compiles the story and stores the result.
         """
         e = None
         try:
-            self.compiled = Compiler.compile(self.tree)
+            if profiler is None:
+                self.compiled = Compiler.compile(self.tree)
+            else:
+                self.compiled = self.profile_compile(profiler)
         except (CompilerError, StorySyntaxError) as error:
             e = self.error(error)
         if e is not None:
@@ -126,10 +223,10 @@ class Story:
         """
         return Parser(ebnf=ebnf).lex(self.story)
 
-    def process(self, ebnf=None):
+    def process(self, ebnf=None, profiler=None):
         """
         Parse and compile a story, returning the compiled JSON
         """
-        self.parse(ebnf=ebnf)
-        self.compile()
+        self.parse(ebnf=ebnf, profiler=profiler)
+        self.compile(profiler=profiler)
         return self.compiled
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+from .Bundle import Bundle
+
+
+class Watcher:
+    """
+    Watches the stories found in a path, polling them for changes.
+    """
+
+    def __init__(self, path, ignored_path=None, interval=0.5):
+        self.path = path
+        self.ignored_path = ignored_path
+        self.interval = interval
+        self.snapshot = {}
+
+    def stories(self):
+        """
+        Finds the stories to watch.
+        """
+        if os.path.isdir(self.path):
+            return Bundle.parse_directory(self.path,
+                                          ignored_path=self.ignored_path)
+        return [self.path]
+
+    def take_snapshot(self):
+        """
+        Gets the modification time and size of every story.
+        """
+        snapshot = {}
+        for story in self.stories():
+            try:
+                stat = os.stat(story)
+            except OSError:
+                continue
+            snapshot[story] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def changes(self):
+        """
+        Gets the stories added, changed or removed since the last snapshot.
+        """
+        snapshot = self.take_snapshot()
+        stories = set(snapshot) | set(self.snapshot)
+        changes = []
+        for story in stories:
+            if snapshot.get(story) != self.snapshot.get(story):
+                changes.append(story)
+        self.snapshot = snapshot
+        return sorted(changes)
+
+    def watch(self):
+        """
+        Yields the stories once, then the changed stories every time some
+        of them change.
+        """
+        self.changes()
+        yield sorted(self.snapshot)
+        while True:
+            time.sleep(self.interval)
+            changes = self.changes()
+            if changes:
+                yield changes
@@ -1,11 +1,39 @@
 # -*- coding: utf-8 -*-
-from .Api import Api
+import sys
+import types
+
 from .Version import version
 
 
 __version__ = version = version
 
 
-loads = Api.loads
-load = Api.load
-load_map = Api.load_map
+class Storyscript(types.ModuleType):
+    """
+    Loads the Api only when it's used, so that importing storyscript, for
+    example to run the command line, doesn't load the compiler.
+    """
+    api = ('Api', 'loads', 'load', 'load_map')
+
+    def __getattr__(self, name):
+        if name not in self.api:
+            message = "module '{}' has no attribute '{}'"
+            raise AttributeError(message.format(self.__name__, name))
+        from .Api import Api
+        self.Api = Api
+        self.loads = Api.loads
+        self.load = Api.load
+        self.load_map = Api.load_map
+        return getattr(self, name)
+
+    def __setattr__(self, name, value):
+        """
+        Importing storyscript.Api sets the module on the package, which must
+        not hide the class.
+        """
+        if name == 'Api' and isinstance(value, types.ModuleType):
+            value = value.Api
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = Storyscript
@@ -69,10 +69,7 @@ class Compiler:
         """
         Simplifies an expression with only one leaf to its respective value
         """
-        entity = tree.or_expression.and_expression.cmp_expression. \
-            arith_expression.mul_expression.unary_expression.pow_expression. \
-            primary_expression.entity
-        args = [Objects.entity(entity)]
+        args = [Objects.entity(tree.or_expression.entity)]
         kwargs = {}
         # name is required for 'set' only
         if name is not None:
@@ -398,11 +395,17 @@ class Compiler:
         return Compiler()
 
     @classmethod
-    def compile(cls, tree, debug=False):
-        tree = Preprocessor.process(tree)
+    def compile_tree(cls, tree):
+        """
+        Compiles a preprocessed tree.
+        """
         compiler = cls.compiler()
         compiler.parse_tree(tree)
         lines = compiler.lines
         return {'tree': lines.lines, 'services': lines.get_services(),
                 'entrypoint': lines.first(), 'modules': lines.modules,
                 'functions': lines.functions, 'version': version}
+
+    @classmethod
+    def compile(cls, tree, debug=False):
+        return cls.compile_tree(Preprocessor.process(tree))
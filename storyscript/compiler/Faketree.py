@@ -68,4 +68,5 @@ class FakeTree:
             self.block.children = children
         else:
             self.block.children = [assignment, self.block.child(0)]
+        self.block.reset_position()
         return assignment
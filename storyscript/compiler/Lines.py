@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import bisect
+import math
+
 from ..exceptions import StorySyntaxError
 
 
@@ -8,36 +11,53 @@ class Lines:
     """
     def __init__(self):
         self.lines = {}
+        self.ordered = []
         self.variables = []
         self.services = []
         self.functions = {}
         self.output_scopes = {}
         self.modules = {}
 
-    def sort(self):
+    @staticmethod
+    def sort_key(line):
         """
-        Returns ordered line numbers
+        Gets the sorting key of a line number.
         Inserted fake lines ('.' suffix) must appear before their inserted
         line, but after their original's line previous line.
         """
         # Generates this sorting: 0, 1.0.9, 1.0, 1.1, 1, 2
-        return sorted(self.lines.keys(), reverse=True,
-                      key=lambda x: list(map(
-                          lambda i: -int(i), x.split('.'))))
+        return tuple(map(int, line.split('.'))) + (math.inf,)
+
+    def index(self, line):
+        """
+        Adds a line number to the ordered index of lines. Lines are mostly
+        added in order, so they are appended without searching when possible.
+        """
+        item = (self.sort_key(line), line)
+        if self.ordered and item < self.ordered[-1]:
+            bisect.insort(self.ordered, item)
+            return
+        self.ordered.append(item)
+
+    def sort(self):
+        """
+        Returns ordered line numbers
+        """
+        return [line for key, line in self.ordered]
 
     def first(self):
         """
         Gets the first line.
         """
-        if self.lines:
-            return self.sort()[0]
+        if self.ordered:
+            return self.ordered[0][1]
 
     def last(self):
         """
         Gets the last line
         """
-        if self.lines:
-            return self.sort()[-1]
+        if self.ordered:
+            return self.ordered[-1][1]
 
     def set_name(self, name):
         """
@@ -61,7 +81,7 @@ class Lines:
         in if/elif/else and try/catch/finally blocks.
         """
         methods = ['if', 'elif', 'try', 'catch']
-        for line_number in self.sort()[::-1]:
+        for key, line_number in reversed(self.ordered):
             if self.lines[line_number]['method'] in methods:
                 self.lines[line_number]['exit'] = line
                 break
@@ -92,22 +112,21 @@ class Lines:
         """
         Creates the base dictionary for a given line.
         """
-        dictionary = {
-            line: {
-                'method': method,
-                'ln': line,
-                'output': output,
-                'name': name,
-                'service': service,
-                'command': command,
-                'function': function,
-                'args': args,
-                'enter': enter,
-                'exit': exit,
-                'parent': parent
-            }
+        if line not in self.lines:
+            self.index(line)
+        self.lines[line] = {
+            'method': method,
+            'ln': line,
+            'output': output,
+            'name': name,
+            'service': service,
+            'command': command,
+            'function': function,
+            'args': args,
+            'enter': enter,
+            'exit': exit,
+            'parent': parent
         }
-        self.lines = {**self.lines, **dictionary}
 
     def service_method(self, service, line):
         """
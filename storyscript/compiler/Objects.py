@@ -77,7 +77,7 @@ class Objects:
         if len(names) > 1:
             for name in names[1:]:
                 fragment = Tree('path_fragment', [Token('NAME', name)])
-                tree.children.append(fragment)
+                tree.append(fragment)
         return tree
 
     @classmethod
@@ -228,13 +228,21 @@ class Objects:
         tree.expect(operator in types, 'compiler_error_no_operator')
         return types[operator]
 
+    @classmethod
+    def operand(cls, tree):
+        """
+        Compiles an operand of an expression. Expressions with a single
+        operand are replaced by it while parsing, so an operand can be an
+        entity or an expression of any precedence.
+        """
+        return getattr(cls, tree.data)(tree)
+
     @classmethod
     def expression(cls, tree):
         """
         Compiles an expression object with the given tree.
         """
-        assert tree.child(0).data == 'or_expression'
-        return cls.or_expression(tree.child(0))
+        return cls.operand(tree.child(0))
 
     @classmethod
     def absolute_expression(cls, tree):
@@ -267,11 +275,7 @@ class Objects:
         """
         Compiles a primary expression object with the given tree.
         """
-        if tree.child(0).data == 'entity':
-            return cls.entity(tree.entity)
-        else:
-            assert tree.child(0).data == 'or_expression'
-            return cls.or_expression(tree.child(0))
+        return cls.operand(tree.child(0))
 
     @classmethod
     def pow_expression(cls, tree):
@@ -279,14 +283,13 @@ class Objects:
         Compiles a pow expression object with the given tree.
         """
         if len(tree.children) == 1:
-            assert tree.child(0).data == 'primary_expression'
-            return cls.primary_expression(tree.child(0))
+            return cls.operand(tree.child(0))
 
         assert tree.child(1).type == 'POWER'
         return cls.build_binary_expression(
                     tree, tree.child(1),
-                    cls.primary_expression(tree.child(0)),
-                    cls.unary_expression(tree.child(2)))
+                    cls.operand(tree.child(0)),
+                    cls.operand(tree.child(2)))
 
     @classmethod
     def unary_expression(cls, tree):
@@ -294,8 +297,7 @@ class Objects:
         Compiles an unary expression object with the given tree.
         """
         if len(tree.children) == 1:
-            assert tree.child(0).data == 'pow_expression'
-            return cls.pow_expression(tree.child(0))
+            return cls.operand(tree.child(0))
 
         assert tree.child(0).data == 'unary_operator'
         return cls.build_unary_expression(
@@ -308,15 +310,14 @@ class Objects:
         Compiles a mul_expression object with the given tree.
         """
         if len(tree.children) == 1:
-            assert tree.child(0).data == 'unary_expression'
-            return cls.unary_expression(tree.child(0))
+            return cls.operand(tree.child(0))
 
         assert tree.child(1).data == 'mul_operator'
         op = tree.child(1).child(0)
         return cls.build_binary_expression(
                     tree, op,
-                    cls.mul_expression(tree.child(0)),
-                    cls.unary_expression(tree.child(2)))
+                    cls.operand(tree.child(0)),
+                    cls.operand(tree.child(2)))
 
     @classmethod
     def arith_expression(cls, tree):
@@ -324,15 +325,14 @@ class Objects:
         Compiles a binary expression object with the given tree.
         """
         if len(tree.children) == 1:
-            assert tree.child(0).data == 'mul_expression'
-            return cls.mul_expression(tree.child(0))
+            return cls.operand(tree.child(0))
 
         assert tree.child(1).data == 'arith_operator'
         op = tree.child(1).child(0)
         return cls.build_binary_expression(
                     tree, op,
-                    cls.arith_expression(tree.child(0)),
-                    cls.mul_expression(tree.child(2)))
+                    cls.operand(tree.child(0)),
+                    cls.operand(tree.child(2)))
 
     @classmethod
     def cmp_expression(cls, tree):
@@ -340,15 +340,14 @@ class Objects:
         Compiles a comparison expression object with the given tree.
         """
         if len(tree.children) == 1:
-            assert tree.child(0).data == 'arith_expression'
-            return cls.arith_expression(tree.child(0))
+            return cls.operand(tree.child(0))
 
         assert tree.child(1).data == 'cmp_operator'
         op = tree.child(1).child(0)
         return cls.build_binary_expression(
                     tree, op,
-                    cls.cmp_expression(tree.child(0)),
-                    cls.arith_expression(tree.child(2)))
+                    cls.operand(tree.child(0)),
+                    cls.operand(tree.child(2)))
 
     @classmethod
     def and_expression(cls, tree):
@@ -356,15 +355,14 @@ class Objects:
         Compiles an AND expression object with the given tree.
         """
         if len(tree.children) == 1:
-            assert tree.child(0).data == 'cmp_expression'
-            return cls.cmp_expression(tree.child(0))
+            return cls.operand(tree.child(0))
 
         assert tree.child(1).type == 'AND'
         op = tree.child(1)
         return cls.build_binary_expression(
                     tree, op,
-                    cls.and_expression(tree.child(0)),
-                    cls.cmp_expression(tree.child(2)))
+                    cls.operand(tree.child(0)),
+                    cls.operand(tree.child(2)))
 
     @classmethod
     def or_expression(cls, tree):
@@ -372,15 +370,14 @@ class Objects:
         Compiles an OR expression object with the given tree.
         """
         if len(tree.children) == 1:
-            assert tree.child(0).data == 'and_expression'
-            return cls.and_expression(tree.child(0))
+            return cls.operand(tree.child(0))
 
         assert tree.child(1).type == 'OR'
         op = tree.child(1)
         return cls.build_binary_expression(
                     tree, op,
-                    cls.or_expression(tree.child(0)),
-                    cls.and_expression(tree.child(2)))
+                    cls.operand(tree.child(0)),
+                    cls.operand(tree.child(2)))
 
     @classmethod
     def assertion(cls, tree):
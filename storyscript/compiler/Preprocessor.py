@@ -30,31 +30,41 @@ class Preprocessor:
 
     @classmethod
     def visit(cls, node, block, entity, pred, fun):
-        if not hasattr(node, 'children') or len(node.children) == 0:
-            return
-
-        if node.data == 'block':
-            # the block in which the fake assignments should be inserted
-            block = node
-            # only generate a fake_block once for every line
-            block = cls.fake_tree(block)
-        elif node.data == 'entity':
-            # set the parent where the inline_expression path should be
-            # inserted
-            entity = node
+        """
+        Visits the tree with an explicit stack, calling fun on the nodes that
+        match pred once their children have been visited. The fake tree of a
+        block is only created when the block has a matching node.
+        """
+        fake_trees = {}
+        stack = [(node, block, entity, False)]
+        while stack:
+            node, block, entity, visited = stack.pop()
+            if visited:
+                assert entity is not None
+                assert block is not None
+                fake_tree = fake_trees.get(id(block))
+                if fake_tree is None:
+                    fake_tree = cls.fake_tree(block)
+                    fake_trees[id(block)] = fake_tree
+                # Evaluate from leaf to the top
+                fun(node, fake_tree, entity)
+                continue
 
-        for c in node.children:
-            cls.visit(c, block, entity, pred, fun)
+            if not hasattr(node, 'children') or len(node.children) == 0:
+                continue
 
-        if pred(node):
-            assert entity is not None
-            assert block is not None
-            fake_tree = block
-            if not isinstance(fake_tree, FakeTree):
-                fake_tree = cls.fake_tree(block)
+            if node.data == 'block':
+                # the block in which the fake assignments should be inserted
+                block = node
+            elif node.data == 'entity':
+                # set the parent where the inline_expression path should be
+                # inserted
+                entity = node
 
-            # Evaluate from leaf to the top
-            fun(node, fake_tree, entity)
+            if pred(node):
+                stack.append((node, block, entity, True))
+            for child in reversed(node.children):
+                stack.append((child, block, entity, False))
 
     @staticmethod
     def is_inline_expression(n):
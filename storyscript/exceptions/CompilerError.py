@@ -12,6 +12,9 @@ class ConstDict:
         self.data = data
 
     def __getattr__(self, attr):
+        if attr.startswith('__'):
+            # Special methods looked up by pickle and copy are never data
+            raise AttributeError(attr)
         return self.data[attr]
 
 
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import copyreg
 import os
 
 import click
@@ -178,11 +179,11 @@ class StoryError(SyntaxError):
         self.process()
         return f'{self.error_code()}: {self.hint()}'
 
-    def echo(self):
+    def echo(self, err=False):
         """
-        Prints the message
+        Prints the message, to stderr when err is True
         """
-        click.echo(self.message())
+        click.echo(self.message(), err=err)
 
     @staticmethod
     def unnamed_error(message):
@@ -193,3 +194,16 @@ class StoryError(SyntaxError):
         url = 'https://github.com/storyscript/storyscript/issues'
         message = 'Internal error occured: {}\nPlease report at {}'
         return StoryError.unnamed_error(message.format(error, url))
+
+    @staticmethod
+    def reduce_error(error):
+        """
+        Pickles lark errors by their attributes, since they can't be created
+        again from their arguments. This lets errors be raised by other
+        processes.
+        """
+        return copyreg.__newobj__, (type(error), ), error.__dict__
+
+
+copyreg.pickle(UnexpectedCharacters, StoryError.reduce_error)
+copyreg.pickle(UnexpectedToken, StoryError.reduce_error)
@@ -9,3 +9,11 @@ class CustomIndenter(Indenter):
     INDENT_type = '_INDENT'
     DEDENT_type = '_DEDENT'
     tab_len = 8
+
+    def process(self, stream):
+        """
+        Processes the stream with a fresh indentation state, so that the
+        indenter of a cached parser is not affected by previous failed
+        parses.
+        """
+        return Indenter.process(self.__class__(), stream)
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import io
+import os
+import threading
 
 from lark import Lark
 
 from .Grammar import Grammar
 from .Indenter import CustomIndenter
+from .Tables import Tables
 from .Transformer import Transformer
 from .Tree import Tree
 
@@ -14,6 +18,11 @@ class Parser:
     Wraps up the parser submodule and exposes parsing and lexing
     functionalities.
     """
+    cache = {}
+    grammars = {}
+    cache_lock = threading.Lock()
+    parse_lock = threading.Lock()
+
     def __init__(self, algo='lalr', ebnf=None):
         self.algo = algo
         self.ebnf = ebnf
@@ -32,17 +41,117 @@ class Parser:
         """
         return Transformer()
 
+    @classmethod
+    def clear_cache(cls):
+        """
+        Drops all the cached Lark instances and grammars
+        """
+        with cls.cache_lock:
+            cls.cache.clear()
+            cls.grammars.clear()
+
     def grammar(self):
         if self.ebnf:
             with io.open(self.ebnf, 'r') as f:
                 return f.read()
         return Grammar().build()
 
+    @staticmethod
+    def digest(grammar):
+        """
+        Hashes the grammar
+        """
+        return hashlib.sha1(grammar.encode('utf-8')).hexdigest()
+
+    def grammar_key(self):
+        """
+        Identifies the grammar without building or reading it, by the path
+        and modification time of the ebnf file when there is one.
+        """
+        if self.ebnf:
+            path = os.path.abspath(self.ebnf)
+            return (path, os.path.getmtime(self.ebnf))
+        return None
+
+    def hashed_grammar(self):
+        """
+        Gets the grammar and its digest. Both are memoized for the whole
+        process, so that the grammar is built and hashed only once, or again
+        when the ebnf file changes.
+        """
+        key = self.grammar_key()
+        if key not in self.grammars:
+            grammar = self.grammar()
+            self.grammars[key] = (grammar, self.digest(grammar))
+        return self.grammars[key]
+
+    def cache_key(self):
+        """
+        Builds the key under which the Lark instance for a grammar is cached.
+        """
+        return (self.algo, self.grammar_key())
+
+    def transforms_inline(self):
+        """
+        Whether trees are transformed while parsing, which lark supports
+        only with lalr.
+        """
+        return self.algo == 'lalr'
+
+    def build_lark(self, grammar):
+        """
+        Initialize Lark with the given grammar. With lalr, the transformer
+        is applied as every rule is reduced, building Storyscript's trees
+        directly rather than transforming lark's trees afterwards.
+        """
+        options = {'parser': self.algo, 'postlex': self.indenter()}
+        if self.transforms_inline():
+            options['transformer'] = self.transformer()
+            options['tree_class'] = Tree
+        return Lark(grammar, **options)
+
+    def load_lark(self, grammar, digest):
+        """
+        Loads the Lark instance for the grammar from the stored parse tables,
+        building and storing it when they are not available.
+        """
+        path = Tables.path(self.algo, digest)
+        lark = Tables.load(path)
+        if lark is None:
+            lark = self.build_lark(grammar)
+            Tables.dump(lark, path)
+        return lark
+
     def lark(self):
         """
-        Get the grammar and initialize Lark.
+        Get the grammar and the Lark instance for it. Lark instances are
+        cached for the whole process, so that the parse tables are loaded
+        only once.
+        """
+        key = self.cache_key()
+        with self.cache_lock:
+            if key not in self.cache:
+                grammar, digest = self.hashed_grammar()
+                self.cache[key] = self.load_lark(grammar, digest)
+            return self.cache[key]
+
+    def lark_parse(self, source):
+        """
+        Parses the source string. The tree is transformed only when the
+        transformer is applied while parsing.
         """
-        return Lark(self.grammar(), parser=self.algo, postlex=self.indenter())
+        source = '{}\n'.format(source)
+        lark = self.lark()
+        # Lark instances keep the lexer state, so they can't be shared by
+        # concurrent parses.
+        with self.parse_lock:
+            return lark.parse(source)
+
+    def transform(self, tree):
+        """
+        Transforms a tree produced by lark.
+        """
+        return self.transformer().transform(tree)
 
     def parse(self, source):
         """
@@ -50,13 +159,15 @@ class Parser:
         """
         if source == '':
             return Tree('empty', [])
-        source = '{}\n'.format(source)
-        lark = self.lark()
-        tree = lark.parse(source)
-        return self.transformer().transform(tree)
+        tree = self.lark_parse(source)
+        if self.transforms_inline():
+            return tree
+        return self.transform(tree)
 
     def lex(self, source):
         """
         Lexes the source string
         """
-        return self.lark().lex(source)
+        lark = self.lark()
+        with self.parse_lock:
+            return list(lark.lex(source))
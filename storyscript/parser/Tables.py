@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import copyreg
+import hashlib
+import io
+import os
+import pickle
+
+import lark
+from lark.parsers import lalr_analysis
+
+from .Transformer import Transformer
+from ..AtomicFile import AtomicFile
+from ..Version import version
+
+
+class Tables:
+    """
+    Stores Lark instances, and their parse tables, on disk so that they
+    don't have to be built again by every new process.
+    """
+    # Bumped when the stored instances change, such as their callbacks
+    revision = 2
+
+    @staticmethod
+    def directory():
+        """
+        Gets the directory where parse tables are stored.
+        """
+        cache = os.environ.get('XDG_CACHE_HOME')
+        if cache is None:
+            cache = os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(cache, 'storyscript')
+
+    @staticmethod
+    def hooks():
+        """
+        Hashes the names of the transformer's hooks. Lark instances are
+        stored with a callback for each rule, using the hooks there were.
+        Special names are left out, as pickling adds some to the class.
+        """
+        hooks = [name for name in vars(Transformer)
+                 if not name.startswith('__')]
+        names = ' '.join(sorted(hooks))
+        return hashlib.sha1(names.encode('utf-8')).hexdigest()[:8]
+
+    @classmethod
+    def prefix(cls):
+        """
+        Gets the start of the names of the files. The versions of
+        storyscript and lark, the revision and the transformer's hooks are
+        part of it, so that upgrades don't load stale tables.
+        """
+        return 'tables-{}-{}-r{}-{}-'.format(version, lark.__version__,
+                                             cls.revision, cls.hooks())
+
+    @classmethod
+    def path(cls, algo, digest):
+        """
+        Gets the path of the file for the given grammar digest.
+        """
+        name = '{}{}-{}.pickle'.format(cls.prefix(), algo, digest)
+        return os.path.join(cls.directory(), name)
+
+    @staticmethod
+    def prune(directory, prefix):
+        """
+        Removes the files stored with another prefix, which are outdated as
+        they would never be loaded again.
+        """
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith('tables-') and not name.startswith(prefix):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def action(name):
+        """
+        Gets a parser action. Lark compares actions by identity, so they
+        must be unpickled as the original objects.
+        """
+        return getattr(lalr_analysis, name)
+
+    @classmethod
+    def reduce_action(cls, action):
+        return cls.action, (action.name,)
+
+    @staticmethod
+    def load(path):
+        """
+        Loads a Lark instance from path. Missing or broken files are ignored.
+        """
+        try:
+            with io.open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    @classmethod
+    def dump(cls, lark, path):
+        """
+        Dumps a Lark instance to path atomically, removing outdated files.
+        """
+        directory = os.path.dirname(path)
+        prefix = cls.prefix()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with AtomicFile.open(path, 'wb') as f:
+                pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+                pickler.dispatch_table = copyreg.dispatch_table.copy()
+                pickler.dispatch_table[lalr_analysis.Action] = \
+                    cls.reduce_action
+                pickler.dump(lark)
+        except Exception:
+            return
+        cls.prune(directory, prefix)
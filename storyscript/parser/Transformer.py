@@ -35,7 +35,7 @@ class Transformer(LarkTransformer):
         fragment = tree.service_fragment
         if fragment.output is None:
             output = Tree('output', [fragment.command.child(0)])
-            fragment.children.append(output)
+            fragment.append(output)
 
     @staticmethod
     def arguments(matches):
@@ -81,7 +81,7 @@ class Transformer(LarkTransformer):
                 cls.implicit_output(matches[0])
             if matches[1].block.rules:
                 for argument in matches[1].find_data('arguments'):
-                    matches[0].service_fragment.children.append(argument)
+                    matches[0].service_fragment.append(argument)
                 return Tree('service_block', [matches[0]])
         return Tree('service_block', matches)
 
@@ -99,17 +99,59 @@ class Transformer(LarkTransformer):
         Transform zero-argument expression into service blocks
         """
         if len(matches) == 1:
-            path = matches[0].follow_node_chain([
-                'expression', 'or_expression', 'and_expression',
-                'cmp_expression', 'arith_expression', 'mul_expression',
-                'unary_expression', 'pow_expression', 'primary_expression',
-                'entity', 'path'
-            ])
+            path = matches[0].follow_node_chain(['expression', 'or_expression',
+                                                 'entity', 'path'])
             if path is not None:
                 service_fragment = Tree('service_fragment', [])
                 service = Tree('service', [path, service_fragment])
                 return Tree('service_block', [service])
         return Tree('absolute_expression', matches)
 
-    def __getattr__(self, attribute, *args):
-        return lambda matches: Tree(attribute, matches)
+    @staticmethod
+    def collapse(data, matches):
+        """
+        Replaces an expression that has a single operand with the operand,
+        so that values aren't nested in every level of precedence.
+        """
+        if len(matches) == 1:
+            return matches[0]
+        return Tree(data, matches)
+
+    @classmethod
+    def and_expression(cls, matches):
+        return cls.collapse('and_expression', matches)
+
+    @classmethod
+    def cmp_expression(cls, matches):
+        return cls.collapse('cmp_expression', matches)
+
+    @classmethod
+    def arith_expression(cls, matches):
+        return cls.collapse('arith_expression', matches)
+
+    @classmethod
+    def mul_expression(cls, matches):
+        return cls.collapse('mul_expression', matches)
+
+    @classmethod
+    def unary_expression(cls, matches):
+        return cls.collapse('unary_expression', matches)
+
+    @classmethod
+    def pow_expression(cls, matches):
+        return cls.collapse('pow_expression', matches)
+
+    @staticmethod
+    def primary_expression(matches):
+        """
+        Replaces a primary expression with its entity or, in parentheses,
+        its or_expression. Or expressions are never collapsed, so that they
+        mark where parentheses were.
+        """
+        return matches[0]
+
+    def __default__(self, data, children, meta):
+        """
+        Transforms the rules without a transformation of their own.
+        """
+        return Tree(data, children)
@@ -11,12 +11,50 @@ class Tree(LarkTree):
     enhancements.
     """
 
+    # Trees with fewer children are scanned, rather than indexed
+    index_size = 8
+    _index = None
+    # Bumped when trees are renamed, invalidating the indexes of their parents
+    renames = 0
+    _first_token = None
+    # The trees that found their first token through this one
+    _heads = None
+
+    def children_index(self):
+        """
+        Gets the first child tree for each rule name. The index is built
+        lazily and again when the children have changed, or when any tree
+        has been renamed, as trees don't know their parent. Trees must be
+        renamed with rename for indexes to notice.
+        """
+        children = self.children
+        index = self._index
+        if index is None or index[0] is not children or \
+                index[1] != len(children) or index[2] != Tree.renames:
+            names = {}
+            for item in children:
+                if isinstance(item, Tree):
+                    names.setdefault(item.data, item)
+            index = (children, len(children), Tree.renames, names)
+            self._index = index
+        return index[3]
+
+    def reset_index(self):
+        """
+        Drops the children index, after the children have been changed.
+        """
+        self._index = None
+
     @staticmethod
     def walk(tree, path):
-        for item in tree.children:
-            if isinstance(item, Tree):
-                if item.data == path:
-                    return item
+        children = tree.children
+        if len(children) < tree.index_size:
+            for item in children:
+                if isinstance(item, Tree):
+                    if item.data == path:
+                        return item
+            return None
+        return tree.children_index().get(path)
 
     def node(self, path):
         """
@@ -51,16 +89,50 @@ class Tree(LarkTree):
                 children.append(child)
         return children
 
+    def first_token(self):
+        """
+        Finds the first token of the tree, which holds its position. The
+        token is found through the first child and kept until the children
+        change, or those of a tree it was found through. Trees must be
+        changed with insert, append or replace, or reset with
+        reset_position, for the token to be found again.
+        """
+        cached = self._first_token
+        if cached is None:
+            token = None
+            if self.children:
+                child = self.children[0]
+                if isinstance(child, Tree):
+                    token = child.first_token()
+                    if child._heads is None:
+                        child._heads = {}
+                    child._heads[id(self)] = self
+                elif isinstance(child, Token):
+                    token = child
+            cached = (token,)
+            self._first_token = cached
+        return cached[0]
+
+    def reset_position(self):
+        """
+        Drops the first token, after the children have been changed, along
+        with those of the trees that found theirs through this one.
+        """
+        self._first_token = None
+        heads = self._heads
+        if heads:
+            self._heads = None
+            for head in heads.values():
+                head.reset_position()
+
     def _find_position(self, position):
         """
-        Finds the request positional attribute of a tree, by finding the
-        first token its first token and returning the token's positional
-        attribute
+        Finds the request positional attribute of a tree, by finding its
+        first token and returning the token's positional attribute
         """
-        for child in self.children:
-            if isinstance(child, Token):
-                return str(getattr(child, position))
-            return child._find_position(position)
+        token = self.first_token()
+        if token is not None:
+            return str(getattr(token, position))
 
     def line(self):
         """
@@ -85,18 +157,31 @@ class Tree(LarkTree):
         Inserts an item into the current tree.
         """
         self.children.insert(0, item)
+        self.reset_index()
+        self.reset_position()
+
+    def append(self, item):
+        """
+        Appends an item to the current tree.
+        """
+        self.children.append(item)
+        self.reset_index()
+        self.reset_position()
 
     def rename(self, new_name):
         """
-        Renames the current tree
+        Renames the current tree, invalidating the indexes of its parent
         """
         self.data = new_name
+        Tree.renames += 1
 
     def replace(self, index, item):
         """
         Replaces a child at the given index
         """
         self.children[index] = item
+        self.reset_index()
+        self.reset_position()
 
     def extract_path(self):
         """
@@ -115,11 +200,7 @@ class Tree(LarkTree):
         Whether the current expression tree is an unary expression leaf
         """
         e = self
-        nodes = ['expression',
-                 'or_expression', 'and_expression', 'cmp_expression',
-                 'arith_expression', 'mul_expression', 'unary_expression',
-                 'pow_expression', 'primary_expression', 'entity']
-        for n in nodes:
+        for n in ['expression', 'or_expression', 'entity']:
             if e.data != n:
                 return False
             if len(e.children) != 1:
@@ -159,4 +240,7 @@ class Tree(LarkTree):
                 return None
 
     def __getattr__(self, attribute):
-        return self.node(attribute)
+        if attribute.startswith('__'):
+            # Special methods looked up by pickle and copy are never nodes
+            raise AttributeError(attribute)
+        return self.walk(self, attribute)
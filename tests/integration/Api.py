@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import concurrent.futures
 from unittest.mock import patch
 
 from pytest import raises
 
 from storyscript.Api import Api
 from storyscript.Bundle import Bundle
+from storyscript.Cache import Cache
 from storyscript.Story import Story
 from storyscript.exceptions import StoryError
 
@@ -98,3 +101,69 @@ def test_compiler_only_comments(parser):
     result = api_result['stories']['a.story']
     assert result['tree'] == {}
     assert result['entrypoint'] is None
+
+
+def test_api_aloads():
+    loop = asyncio.new_event_loop()
+    result = loop.run_until_complete(Api.aloads('x = 0'))
+    loop.close()
+    assert result == Api.loads('x = 0')
+
+
+def test_api_aload_map_process_pool():
+    """
+    Ensures that stories can be compiled by a pool of processes, getting
+    their errors back
+    """
+    loop = asyncio.new_event_loop()
+    with concurrent.futures.ProcessPoolExecutor(1) as executor:
+        files = {'a.story': 'x = 0'}
+        result = loop.run_until_complete(
+            Api.aload_map(files, executor=executor))
+        assert result == Api.load_map(files)
+        with raises(StoryError) as e:
+            loop.run_until_complete(
+                Api.aload_map({'a.story': 'x ='}, executor=executor))
+    loop.close()
+    assert e.value.short_message() == 'E0007: Missing value after `=`'
+
+
+def test_api_loads_many():
+    """
+    Ensures that stories of a batch are compiled independently
+    """
+    results = dict(Api.loads_many(['x = 0', 'foo =', 'y = 1'], jobs=2))
+    assert results[0] == Api.loads('x = 0')
+    assert results[1].short_message() == 'E0007: Missing value after `=`'
+    assert results[2] == Api.loads('y = 1')
+
+
+def test_api_load_map_releases_trees():
+    """
+    Ensures that modules are compiled first, and that the trees of compiled
+    stories are not kept
+    """
+    files = {'a.story': 'import "b" as b\nx = b.y', 'b.story': 'y = 1'}
+    bundle = Bundle(story_files=files)
+    result = bundle.bundle()
+    assert list(result['stories']) == ['b.story', 'a.story']
+    assert bundle.parsed == {}
+    assert result == Api.load_map(files)
+
+
+def test_bundle_memory_cache_jobs():
+    """
+    Ensures that stories compiled by a pool of processes are kept in an
+    in-memory cache, as they are when watching stories
+    """
+    files = {'a.story': 'import "b" as b\nx = b.y', 'b.story': 'y = 1',
+             'c.story': 'z = 2'}
+    cache = Cache(directory=None)
+    first = Bundle(story_files=files, cache=cache).bundle(jobs=2)
+    misses = cache.misses
+    assert cache.hits == 0
+    assert len(cache.memory) == 3
+    second = Bundle(story_files=files, cache=cache).bundle(jobs=2)
+    assert cache.hits > 0
+    assert cache.misses == misses
+    assert second == first
@@ -68,3 +68,16 @@ def test_cli_lex_exit_file_not_found():
     # the error message contains the absolute path too
     assert 'File "this-path-will-never-ever-exist-123456" not found' \
         in e.output
+
+
+def test_cli_compile_json_error(tmpdir):
+    """
+    Ensures that errors are printed to stderr when the JSON is printed,
+    without printing a truncated document
+    """
+    tmpdir.join('a.story').write('foo =\n')
+    runner = CliRunner(mix_stderr=False)
+    e = runner.invoke(Cli.compile, [str(tmpdir), '-j'])
+    assert e.exit_code == 1
+    assert e.stdout == ''
+    assert 'E0007: Missing value after `=`' in e.stderr
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
+import pickle
 import re
 
-from pytest import raises
+from pytest import mark, raises
 
 from storyscript.Story import Story
 from storyscript.exceptions.StoryError import StoryError
@@ -116,3 +117,17 @@ def test_exceptions_block_expected_after(capsys):
     assert lines[0] == 'Error: syntax error in story at line 2, column 1'
     assert lines[2] == '2|    a = 2'
     assert lines[5] == 'E0046: An indented block is required to be before here'
+
+
+@mark.parametrize('source', ['foo =', 'a = $', 'return 0'])
+def test_exceptions_pickle(source):
+    """
+    Ensures that errors can be raised by other processes
+    """
+    with raises(StoryError) as e:
+        Story(source).process()
+    error = pickle.loads(pickle.dumps(e.value))
+    assert error.short_message() == e.value.short_message()
+    error.with_color = False
+    e.value.with_color = False
+    assert error.message() == e.value.message()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from pytest import fixture, raises
+
+from storyscript.Api import Api
+from storyscript.Client import Client
+from storyscript.Server import Server
+from storyscript.exceptions import StoryError
+
+
+@fixture
+def client(tmpdir):
+    """
+    Starts a server in a thread, returning a client connected to it
+    """
+    server = Server(path=str(tmpdir.join('server.sock')))
+    socket = server.bind()
+
+    def serve():
+        connection, address = socket.accept()
+        server.handle(connection)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield Client(path=server.path, timeout=10)
+    socket.close()
+
+
+def test_server_loads(client):
+    assert client.loads('x = 0') == Api.loads('x = 0')
+
+
+def test_server_load_map(client):
+    files = {'a.story': 'import "b" as b', 'b.story': 'x = 0'}
+    assert client.load_map(files) == Api.load_map(files)
+
+
+def test_server_lex(client):
+    assert client.lex('x = 0') == [['NAME', 'x'], ['EQUALS', '='],
+                                   ['INT', '0']]
+
+
+def test_server_error(client):
+    with raises(StoryError) as e:
+        client.loads('foo =')
+    assert e.value.message() == \
+        """Error: syntax error in story at line 1, column 6
+
+1|    foo =
+           ^
+
+E0007: Missing value after `=`"""
+
+
+def test_server_no_server(tmpdir):
+    """
+    Ensures that stories are compiled in process when there's no server
+    """
+    client = Client(path=str(tmpdir.join('server.sock')))
+    assert client.loads('x = 0') == Api.loads('x = 0')
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import subprocess
+import sys
+
+from pytest import mark
+
+
+def imported(module):
+    """
+    Gets the modules loaded by importing a module, as listed by importtime.
+    """
+    command = [sys.executable, '-X', 'importtime', '-c',
+               'import {}'.format(module)]
+    process = subprocess.run(command, stderr=subprocess.PIPE, check=True,
+                             universal_newlines=True)
+    modules = []
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            modules.append(line.split('|')[-1].strip())
+    return modules
+
+
+@mark.parametrize('module', [
+    'storyscript', 'storyscript.Cli', 'storyscript.Client'
+])
+def test_startup(module):
+    """
+    Ensures that the command line and the client don't load the compiler at
+    startup
+    """
+    modules = imported(module)
+    assert module in modules
+    heavy = ['lark', 'asyncio', 'storyscript.Api', 'storyscript.App',
+             'storyscript.compiler', 'storyscript.parser']
+    for name in heavy:
+        assert name not in modules
+
+
+def test_startup_api():
+    """
+    Ensures that the Api class can be imported from the package, before its
+    module is loaded
+    """
+    code = ('from storyscript import Api\n'
+            'assert Api.loads("a = 1")["tree"]\n'
+            'import storyscript.Api\n'
+            'assert storyscript.Api is Api')
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_startup_api_module():
+    """
+    Ensures that the Api class is exposed when its module is loaded first
+    """
+    code = ('import storyscript.Api\n'
+            'from storyscript.Api import Api\n'
+            'assert storyscript.Api is Api')
+    subprocess.run([sys.executable, '-c', code], check=True)
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from io import StringIO
 
+from pytest import mark
+
 from storyscript.Story import Story
 
 
@@ -48,3 +50,37 @@ def test_story_comments_nested():
     stream = StringIO('###\nmultiline\n# nested\n###')
     story = Story.from_stream(stream)
     assert story.story == '\n\n\n'
+
+
+def test_story_comments_inline_block():
+    stream = StringIO('x = 0 ### comment ###\ny = 1')
+    story = Story.from_stream(stream)
+    assert story.story == 'x = 0 \ny = 1'
+
+
+def test_story_comments_strings():
+    stream = StringIO('x = "# not a comment"  # comment\ny = \'###\'')
+    story = Story.from_stream(stream)
+    assert story.story == 'x = "# not a comment"  \ny = \'###\''
+
+
+def test_story_comments_lines():
+    """
+    Ensures that removing comments doesn't change line numbers.
+    """
+    source = 'x = 0\n###\nblock\n###\n# comment\ny = "a\n# b"\nz = 1'
+    story = Story.from_stream(StringIO(source))
+    assert story.story.count('\n') == source.count('\n')
+    assert story.story.splitlines()[-1] == 'z = 1'
+
+
+@mark.parametrize('source, line, value', [
+    ("x = /it's/\ny = 1  # note", '2', 1),
+    ('x = /"/\n# comment\ny = 2', '3', 2)
+])
+def test_story_comments_regular_expressions(source, line, value):
+    """
+    Ensures that quotes in regular expressions don't start strings.
+    """
+    result = Story(source).process()
+    assert result['tree'][line]['args'] == [value]
@@ -1,9 +1,25 @@
 # -*- coding: utf-8 -*-
+import os
+
 from pytest import fixture
 
 from storyscript.parser import Parser
 
 
+@fixture(scope='session')
+def cache_home(tmpdir_factory):
+    return str(tmpdir_factory.mktemp('cache'))
+
+
+@fixture(autouse=True)
+def cache_directory(mocker, cache_home):
+    """
+    Stores parse tables in a temporary directory, rather than in the user's
+    cache.
+    """
+    mocker.patch.dict(os.environ, {'XDG_CACHE_HOME': cache_home})
+
+
 @fixture
 def parser():
     return Parser()
@@ -10,22 +10,21 @@ def get_entity(obj):
     """
     Returns the entity for an expression
     """
-    if obj.mul_expression is not None:
-        obj = obj.mul_expression
-    return obj.unary_expression.pow_expression.primary_expression.entity
+    if obj.data == 'entity':
+        return obj
+    return obj.entity
 
 
 def arith_exp(exp):
     """
-    Returns the binary expression for an expression
+    Returns the top of an expression, holding its operation or its entity
     """
-    return exp.expression.or_expression.and_expression.cmp_expression. \
-        arith_expression
+    return exp.expression.or_expression
 
 
 def test_parser_sum(parser):
     result = parser.parse('3 + 4\n')
-    ar_exp = arith_exp(result.block.rules.absolute_expression)
+    ar_exp = arith_exp(result.block.rules.absolute_expression).arith_expression
     lhs = get_entity(ar_exp.child(0)).values.number
     assert lhs.child(0) == Token('INT', 3)
     op = ar_exp.child(1)
@@ -35,6 +34,20 @@ def test_parser_sum(parser):
     assert rhs.child(0) == Token('INT', 4)
 
 
+def test_parser_expression_collapsed(parser):
+    """
+    Ensures that expressions with a single operand are collapsed, while
+    expressions in parentheses are kept.
+    """
+    result = parser.parse('x = 1\ny = (a)\n')
+    expression = result.child(0).rules.assignment.assignment_fragment
+    assert arith_exp(expression).child(0).data == 'entity'
+    expression = result.child(1).rules.assignment.assignment_fragment
+    parentheses = arith_exp(expression).child(0)
+    assert parentheses.data == 'or_expression'
+    assert parentheses.child(0).data == 'entity'
+
+
 def test_parser_list_path(parser):
     """
     Ensures that paths in lists can be parsed.
@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
-from pytest import raises
+import asyncio
+import concurrent.futures
+import multiprocessing
+import threading
+
+from pytest import fixture, raises
 
 from storyscript.Api import Api
 from storyscript.Bundle import Bundle
@@ -135,3 +140,181 @@ def test_api_load_map_internal_error_debug(patch):
         Api.load_map({}, debug=True)
 
     assert str(e.value) == 'An unknown error.'
+
+
+def test_api_load_item(patch):
+    patch.object(Api, 'loads')
+    result = Api.load_item((0, 'string', False))
+    Api.loads.assert_called_with('string', debug=False)
+    assert result == (0, Api.loads())
+
+
+def test_api_load_item_error(patch):
+    """
+    Ensures that errors are returned, so that they don't stop the batch
+    """
+    error = StoryError(None, None)
+    patch.object(Api, 'loads', side_effect=error)
+    assert Api.load_item((1, 'string', True)) == (1, error)
+
+
+def test_api_loads_many(patch):
+    patch.object(Api, 'load_item')
+    result = list(Api.loads_many(['one', 'two']))
+    Api.load_item.assert_called_with((1, 'two', False))
+    assert result == [Api.load_item(), Api.load_item()]
+
+
+def test_api_loads_many_debug(patch):
+    patch.object(Api, 'load_item')
+    list(Api.loads_many(['one'], debug=True))
+    Api.load_item.assert_called_with((0, 'one', True))
+
+
+def test_api_loads_many_jobs(patch):
+    patch.object(multiprocessing, 'Pool')
+    pool = multiprocessing.Pool().__enter__()
+    pool.imap_unordered.return_value = ['result']
+    result = list(Api.loads_many(['one', 'two'], jobs=2))
+    multiprocessing.Pool.assert_called_with(2)
+    function, items = pool.imap_unordered.call_args[0]
+    assert function == Api.load_item
+    assert list(items) == [(0, 'one', False), (1, 'two', False)]
+    assert result == ['result']
+
+
+@fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_api_default_executor(patch):
+    patch.object(Api, 'executor', None)
+    patch.object(concurrent.futures, 'ThreadPoolExecutor')
+    result = Api.default_executor()
+    concurrent.futures.ThreadPoolExecutor.assert_called_with(max_workers=4)
+    assert Api.executor == concurrent.futures.ThreadPoolExecutor()
+    assert result == Api.executor
+
+
+def test_api_default_executor_created(patch):
+    patch.object(Api, 'executor', 'executor')
+    assert Api.default_executor() == 'executor'
+
+
+def test_api_semaphore(loop):
+    result = Api.semaphore(loop)
+    assert isinstance(result, asyncio.Semaphore)
+    assert Api.semaphore(loop) == result
+    assert Api.semaphore(asyncio.new_event_loop()) != result
+
+
+def test_api_release(magic):
+    loop = magic()
+    semaphore = magic()
+    Api.release(loop, semaphore)
+    loop.call_soon_threadsafe.assert_called_with(semaphore.release)
+
+
+def test_api_release_closed_loop(magic):
+    """
+    Ensures that semaphores are not released when their loop is closed
+    """
+    loop = magic()
+    loop.call_soon_threadsafe.side_effect = RuntimeError
+    Api.release(loop, magic())
+
+
+def test_api_run(loop):
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    run = Api.run(lambda x: x + 1, (1, ), executor, None)
+    assert loop.run_until_complete(run) == 2
+    executor.shutdown()
+
+
+def test_api_run_default_executor(patch, loop):
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    patch.object(Api, 'default_executor', return_value=executor)
+    assert loop.run_until_complete(Api.run(str, (1, ), None, None)) == '1'
+    executor.shutdown()
+
+
+def test_api_run_error(loop):
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    with raises(ValueError):
+        loop.run_until_complete(Api.run(int, ('a', ), executor, None))
+    executor.shutdown()
+
+
+def test_api_run_timeout(loop):
+    """
+    Ensures that slow functions time out, holding their place in the
+    semaphore until they finish
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    event = threading.Event()
+    with raises(asyncio.TimeoutError):
+        loop.run_until_complete(Api.run(event.wait, (), executor, 0.01))
+    semaphore = Api.semaphore(loop)
+    assert semaphore.locked() is False
+    assert semaphore._value == Api.concurrency - 1
+    event.set()
+    executor.shutdown()
+    loop.run_until_complete(asyncio.sleep(0))
+    assert semaphore._value == Api.concurrency
+
+
+def test_api_run_concurrency(patch, loop):
+    """
+    Ensures that only Api.concurrency functions run at once
+    """
+    patch.object(Api, 'concurrency', 1)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    running = []
+
+    def function(x):
+        running.append(x)
+        assert len(running) == 1
+        running.remove(x)
+        return x
+
+    async def run_all():
+        runs = [Api.run(function, (x, ), executor, None) for x in range(4)]
+        return await asyncio.gather(*runs)
+
+    results = loop.run_until_complete(run_all())
+    assert results == [0, 1, 2, 3]
+    executor.shutdown()
+
+
+def test_api_aloads(patch, loop):
+    patch.object(Api, 'run')
+    Api.run.return_value = 'result'
+    result = loop.run_until_complete(Api.aloads('string'))
+    Api.run.assert_called_with(Api.loads, ('string', False), None, None)
+    assert result == 'result'
+
+
+def test_api_aloads_options(patch, loop):
+    patch.object(Api, 'run')
+    aloads = Api.aloads('string', debug=True, executor='executor', timeout=1)
+    loop.run_until_complete(aloads)
+    Api.run.assert_called_with(Api.loads, ('string', True), 'executor', 1)
+
+
+def test_api_aload_map(patch, loop):
+    patch.object(Api, 'run')
+    Api.run.return_value = 'result'
+    result = loop.run_until_complete(Api.aload_map('files'))
+    Api.run.assert_called_with(Api.load_map, ('files', False), None, None)
+    assert result == 'result'
+
+
+def test_api_aload_map_options(patch, loop):
+    patch.object(Api, 'run')
+    aload_map = Api.aload_map('files', debug=True, executor='executor',
+                              timeout=1)
+    loop.run_until_complete(aload_map)
+    Api.run.assert_called_with(Api.load_map, ('files', True), 'executor', 1)
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
-import json
+import io
 
 from pytest import fixture
 
 from storyscript.App import App
 from storyscript.Bundle import Bundle
+from storyscript.Emitter import Emitter
+from storyscript.Serializer import Serializer
 from storyscript.compiler.Preprocessor import Preprocessor
 from storyscript.parser import Grammar
 
@@ -19,14 +21,16 @@ def test_app_parse(bundle):
     Ensures App.parse returns the parsed bundle
     """
     result = App.parse('path')
-    Bundle.from_path.assert_called_with('path', ignored_path=None)
-    Bundle.from_path().bundle_trees.assert_called_with(ebnf=None)
+    Bundle.from_path.assert_called_with('path', ignored_path=None, jobs=None)
+    Bundle.from_path().bundle_trees.assert_called_with(ebnf=None,
+                                                       jobs=None)
     assert result == Bundle.from_path().bundle_trees()
 
 
 def test_app_parse_ignored_path(bundle):
     App.parse('path', ignored_path='ignored')
-    Bundle.from_path.assert_called_with('path', ignored_path='ignored')
+    Bundle.from_path.assert_called_with('path', ignored_path='ignored',
+                                        jobs=None)
 
 
 def test_app_parse_ebnf(bundle):
@@ -34,7 +38,14 @@ def test_app_parse_ebnf(bundle):
     Ensures App.parse supports specifying an ebnf
     """
     App.parse('path', ebnf='ebnf')
-    Bundle.from_path().bundle_trees.assert_called_with(ebnf='ebnf')
+    Bundle.from_path().bundle_trees.assert_called_with(ebnf='ebnf',
+                                                       jobs=None)
+
+
+def test_app_parse_jobs(bundle):
+    App.parse('path', jobs=2)
+    Bundle.from_path.assert_called_with('path', ignored_path=None, jobs=2)
+    Bundle.from_path().bundle_trees.assert_called_with(ebnf=None, jobs=2)
 
 
 def test_app_parse_preprocess(patch, bundle, magic):
@@ -46,33 +57,123 @@ def test_app_parse_preprocess(patch, bundle, magic):
     Bundle.from_path().bundle_trees.return_value = {'foo.story': story}
     result = App.parse('path', preprocess=True)
     assert Preprocessor.process.call_count == 1
-    Bundle.from_path.assert_called_with('path', ignored_path=None)
-    Bundle.from_path().bundle_trees.assert_called_with(ebnf=None)
+    Bundle.from_path.assert_called_with('path', ignored_path=None, jobs=None)
+    Bundle.from_path().bundle_trees.assert_called_with(ebnf=None,
+                                                       jobs=None)
     assert result == {'foo.story': Preprocessor.process(story)}
 
 
-def test_app_compile(patch, bundle):
-    patch.object(json, 'dumps')
-    result = App.compile('path')
-    Bundle.from_path.assert_called_with('path', ignored_path=None)
-    Bundle.from_path().bundle.assert_called_with(ebnf=None)
-    json.dumps.assert_called_with(Bundle.from_path().bundle(), indent=2)
-    assert result == json.dumps()
+def test_app_write(patch, bundle):
+    patch.init(Emitter)
+    patch.object(Emitter, 'write')
+    App.write('stream', 'path')
+    Bundle.from_path.assert_called_with('path', ignored_path=None,
+                                        cache=None, profiler=None,
+                                        jobs=None)
+    Emitter.__init__.assert_called_with('stream', compact=False,
+                                        profiler=None, fast=False)
+    Emitter.write.assert_called_with(Bundle.from_path(), ebnf=None,
+                                     jobs=None)
+
+
+def test_app_write_orjson(patch, bundle):
+    """
+    Ensures App.write dumps JSON with orjson only when asked for
+    """
+    patch.init(Emitter)
+    patch.object(Emitter, 'write')
+    patch.object(Serializer, 'package')
+    App.write('stream', 'path', format='orjson')
+    Serializer.package.assert_called_with('orjson')
+    Emitter.__init__.assert_called_with('stream', compact=False,
+                                        profiler=None, fast=True)
+
+
+def test_app_write_ignored_path(patch, bundle):
+    patch.object(Emitter, 'write')
+    App.write('stream', 'path', ignored_path='ignored')
+    Bundle.from_path.assert_called_with('path', ignored_path='ignored',
+                                        cache=None, profiler=None,
+                                        jobs=None)
+
+
+def test_app_write_ebnf(patch, bundle):
+    """
+    Ensures App.write supports specifying an ebnf file
+    """
+    patch.object(Emitter, 'write')
+    App.write('stream', 'path', ebnf='ebnf')
+    Emitter.write.assert_called_with(Bundle.from_path(), ebnf='ebnf',
+                                     jobs=None)
+
+
+def test_app_write_jobs(patch, bundle):
+    patch.object(Emitter, 'write')
+    App.write('stream', 'path', jobs=2)
+    Bundle.from_path.assert_called_with('path', ignored_path=None,
+                                        cache=None, profiler=None, jobs=2)
+    Emitter.write.assert_called_with(Bundle.from_path(), ebnf=None, jobs=2)
+
+
+def test_app_write_cache(patch, bundle):
+    patch.object(Emitter, 'write')
+    App.write('stream', 'path', cache='cache')
+    Bundle.from_path.assert_called_with('path', ignored_path=None,
+                                        cache='cache', profiler=None,
+                                        jobs=None)
+
+
+def test_app_write_compact(patch, bundle):
+    patch.init(Emitter)
+    patch.object(Emitter, 'write')
+    App.write('stream', 'path', compact=True)
+    Emitter.__init__.assert_called_with('stream', compact=True,
+                                        profiler=None, fast=False)
 
 
-def test_app_compile_ignored_path(patch, bundle):
-    patch.object(json, 'dumps')
-    App.compile('path', ignored_path='ignored')
-    Bundle.from_path.assert_called_with('path', ignored_path='ignored')
+def test_app_write_profiler(patch, bundle):
+    patch.init(Emitter)
+    patch.object(Emitter, 'write')
+    App.write('stream', 'path', profiler='profiler')
+    Bundle.from_path.assert_called_with('path', ignored_path=None,
+                                        cache=None, profiler='profiler',
+                                        jobs=None)
+    Emitter.__init__.assert_called_with('stream', compact=False,
+                                        profiler='profiler', fast=False)
 
 
-def test_app_compile_ebnf(patch, bundle):
+def test_app_write_format(patch, bundle):
     """
-    Ensures App.compile supports specifying an ebnf file
+    Ensures App.write supports binary formats
     """
-    patch.object(json, 'dumps')
-    App.compile('path', ebnf='ebnf')
-    Bundle.from_path().bundle.assert_called_with(ebnf='ebnf')
+    patch.object(Serializer, 'encoder')
+    stream = io.BytesIO()
+    Serializer.encoder.return_value = lambda data: b'data'
+    App.write(stream, 'path', ebnf='ebnf', jobs=2, format='msgpack')
+    Serializer.encoder.assert_called_with('msgpack')
+    Bundle.from_path().bundle.assert_called_with(ebnf='ebnf', jobs=2)
+    assert stream.getvalue() == b'data'
+
+
+def test_app_compile(patch):
+    def write(stream, path, **kwargs):
+        stream.write('json')
+
+    patch.object(App, 'write', side_effect=write)
+    assert App.compile('path') == 'json'
+    kwargs = {'ignored_path': None, 'ebnf': None, 'jobs': None,
+              'cache': None, 'compact': False, 'profiler': None}
+    assert App.write.call_args[0][1] == 'path'
+    assert App.write.call_args[1] == kwargs
+
+
+def test_app_compile_options(patch):
+    patch.object(App, 'write')
+    App.compile('path', ignored_path='ignored', ebnf='ebnf', jobs=2,
+                cache='cache', compact=True, profiler='profiler')
+    kwargs = {'ignored_path': 'ignored', 'ebnf': 'ebnf', 'jobs': 2,
+              'cache': 'cache', 'compact': True, 'profiler': 'profiler'}
+    assert App.write.call_args[1] == kwargs
 
 
 def test_app_lex(bundle):
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+
+from pytest import raises
+
+from storyscript.AtomicFile import AtomicFile
+
+
+def test_atomicfile_open(patch):
+    patch.many(os, ['replace', 'remove'])
+    patch.object(tempfile, 'NamedTemporaryFile')
+    with AtomicFile.open('file.json', 'w', encoding='utf-8') as f:
+        pass
+    directory = os.path.dirname(os.path.abspath('file.json'))
+    tempfile.NamedTemporaryFile.assert_called_with('w', dir=directory,
+                                                   delete=False,
+                                                   encoding='utf-8')
+    assert f == tempfile.NamedTemporaryFile.return_value
+    os.replace.assert_called_with(f.name, 'file.json')
+    assert os.remove.call_count == 0
+
+
+def test_atomicfile_open_write(tmpdir):
+    path = tmpdir.join('file.json')
+    path.write('old')
+    with AtomicFile.open(str(path)) as f:
+        f.write('new')
+        assert path.read() == 'old'
+    assert path.read() == 'new'
+    assert tmpdir.listdir() == [path]
+
+
+def test_atomicfile_open_error(tmpdir):
+    """
+    Ensures that the file is kept and the temporary file removed when
+    writing fails
+    """
+    path = tmpdir.join('file.json')
+    path.write('old')
+    with raises(ValueError):
+        with AtomicFile.open(str(path), 'wb') as f:
+            f.write(b'new')
+            raise ValueError()
+    assert path.read() == 'old'
+    assert tmpdir.listdir() == [path]
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
+import multiprocessing
 import os
-import subprocess
 
-from pytest import fixture
+from pytest import fixture, raises
 
 from storyscript.Bundle import Bundle
+from storyscript.Finder import Finder
 from storyscript.Story import Story
+from storyscript.exceptions import CompilerError, StoryError
 
 
 @fixture
@@ -16,6 +18,10 @@ def bundle(patch):
 def test_bundle_init(bundle):
     assert bundle.stories == {}
     assert bundle.story_files == {}
+    assert bundle.cache is None
+    assert bundle.entries == {}
+    assert bundle.parsed == {}
+    assert bundle.profiler is None
 
 
 def test_bundle_init_files():
@@ -23,38 +29,21 @@ def test_bundle_init_files():
     assert bundle.story_files == {'one.story': 'hello'}
 
 
-def test_bundle_gitignores(patch):
-    """
-    Ensures gitignores uses can produce the list of ignored files.
-    """
-    patch.object(subprocess, 'run')
-    subprocess.run().returncode = 0
-    result = Bundle.gitignores()
-    command = ['git', 'ls-files', '--others', '--ignored',
-               '--exclude-standard']
-    subprocess.run.assert_called_with(command, encoding='utf8',
-                                      stdout=subprocess.PIPE)
-    subprocess.run().stdout.split.assert_called_with('\n')
-    assert result == subprocess.run().stdout.split()
+def test_bundle_init_files_not_shared():
+    Bundle().story_files['one.story'] = 'hello'
+    assert Bundle().story_files == {}
 
 
-def test_bundle_gitignores_failed(patch):
-    """
-    Test what happens when the gitignore command fails
-    """
-    patch.object(subprocess, 'run')
-    subprocess.run().returncode = 1
-    result = Bundle.gitignores()
-    subprocess.run().stdout.split.assert_not_called()
-    assert result == []
+def test_bundle_init_cache():
+    assert Bundle(cache='cache').cache == 'cache'
 
 
 def test_bundle_ignores(patch):
     patch.object(os.path, 'isdir')
-    patch.object(os, 'walk', return_value=[('root', [], ['one.story', 'two'])])
+    patch.object(Finder, 'stories', return_value=['root/one.story'])
     result = Bundle.ignores('path')
-    os.walk.assert_called_with('path')
-    assert result == ['root/one.story']
+    Finder.stories.assert_called_with('path', prune=False)
+    assert result == {'root/one.story'}
 
 
 def test_bundle_ignores_not_dir(patch):
@@ -62,49 +51,25 @@ def test_bundle_ignores_not_dir(patch):
     os.path.isdir.return_value = False
     result = Bundle.ignores('path')
     os.path.relpath.assert_called_with('path')
-    assert result == [os.path.relpath()]
-
-
-def test_bundle_filter_path(patch):
-    patch.object(os.path, 'relpath')
-    result = Bundle.filter_path('./root', 'one.story', [])
-    os.path.relpath.assert_called_with('./root/one.story')
-    assert result == os.path.relpath()
-
-
-def test_bundle_filter_path_ignores():
-    result = Bundle.filter_path('./root', 'one.story', ['root/one.story'])
-    assert result is None
+    assert result == {os.path.relpath()}
 
 
 def test_bundle_parse_directory(patch, bundle):
     """
     Ensures parse_directory can parse a directory
     """
-    patch.object(os, 'walk', return_value=[('root', [], ['one.story', 'two'])])
-    patch.object(Bundle, 'gitignores')
-    result = Bundle.parse_directory('dir')
-    assert Bundle.gitignores.call_count == 1
-    os.walk.assert_called_with('dir')
-    assert result == ['root/one.story']
-
-
-def test_bundle_parse_directory_gitignored(patch, bundle):
-    """
-    Ensures parse_directory does not return gitignored files
-    """
-    patch.object(os, 'walk', return_value=[('./root', [], ['one.story'])])
-    patch.object(Bundle, 'gitignores')
-    Bundle.gitignores.return_value = ['root/one.story']
-    assert Bundle.parse_directory('dir') == []
+    patch.object(Finder, 'stories')
+    result = Bundle.parse_directory('dir', jobs=2)
+    Finder.stories.assert_called_with('dir', jobs=2)
+    assert result == Finder.stories()
 
 
 def test_bundle_parse_directory_ignored_path(patch, bundle):
-    patch.object(os, 'walk', return_value=[('./root', [], ['one.story'])])
-    patch.many(Bundle, ['gitignores', 'ignores'])
-    Bundle.gitignores.return_value = []
-    Bundle.parse_directory('dir', ignored_path='ignored')
+    patch.object(Finder, 'stories', return_value=['one.story', 'two.story'])
+    patch.object(Bundle, 'ignores', return_value={'one.story'})
+    result = Bundle.parse_directory('dir', ignored_path='ignored')
     Bundle.ignores.assert_called_with('ignored')
+    assert result == ['two.story']
 
 
 def test_bundle_from_path(patch):
@@ -128,7 +93,8 @@ def test_bundle_from_path_directory(patch):
     patch.many(Bundle, ['load_story', 'parse_directory'])
     Bundle.parse_directory.return_value = ['one.story']
     Bundle.from_path('path')
-    Bundle.parse_directory.assert_called_with('path', ignored_path=None)
+    Bundle.parse_directory.assert_called_with('path', ignored_path=None,
+                                              jobs=None)
     Bundle.load_story.assert_called_with('one.story')
 
 
@@ -140,7 +106,38 @@ def test_bundle_from_path_directory_ignored(patch):
     patch.init(Bundle)
     patch.many(Bundle, ['load_story', 'parse_directory'])
     Bundle.from_path('path', ignored_path='ignored')
-    Bundle.parse_directory.assert_called_with('path', ignored_path='ignored')
+    Bundle.parse_directory.assert_called_with('path', ignored_path='ignored',
+                                              jobs=None)
+
+
+def test_bundle_from_path_directory_jobs(patch):
+    patch.object(os.path, 'isdir')
+    patch.init(Bundle)
+    patch.many(Bundle, ['load_story', 'parse_directory'])
+    Bundle.from_path('path', jobs=2)
+    Bundle.parse_directory.assert_called_with('path', ignored_path=None,
+                                              jobs=2)
+
+
+def test_bundle_from_path_cache(patch):
+    patch.object(os.path, 'isdir', return_value=False)
+    patch.init(Bundle)
+    patch.object(Bundle, 'load_story')
+    Bundle.from_path('path', cache='cache')
+    Bundle.__init__.assert_called_with(cache='cache', profiler=None)
+
+
+def test_bundle_from_path_profiler(patch):
+    patch.object(os.path, 'isdir', return_value=False)
+    patch.init(Bundle)
+    patch.object(Bundle, 'load_story')
+    Bundle.from_path('path', profiler='profiler')
+    Bundle.__init__.assert_called_with(cache=None, profiler='profiler')
+
+
+def test_bundle_read_story(bundle):
+    bundle.story_files['one.story'] = 'hello'
+    assert bundle.read_story('one.story') == 'hello'
 
 
 def test_bundle_load_story(patch, bundle):
@@ -186,66 +183,399 @@ def test_bundle_services_no_duplicates(bundle):
     assert result == ['one']
 
 
-def test_bundle_compile_modules(patch, bundle):
-    patch.object(Bundle, 'compile')
-    bundle.compile_modules(['stories'], 'ebnf')
-    Bundle.compile.assert_called_with(['stories'], 'ebnf')
+def test_bundle_parse_story(patch, bundle):
+    patch.object(Bundle, 'load_story')
+    result = bundle.parse_story('one.story', 'ebnf')
+    Bundle.load_story.assert_called_with('one.story')
+    Bundle.load_story().parse.assert_called_with(ebnf='ebnf', profiler=None)
+    assert bundle.parsed['one.story'] == Bundle.load_story()
+    assert result == Bundle.load_story()
 
 
-def test_bundle_parse_modules(patch, bundle):
-    patch.object(Bundle, 'parse')
-    bundle.parse_modules(['stories'], 'ebnf')
-    Bundle.parse.assert_called_with(['stories'], 'ebnf')
+def test_bundle_parse_story_profiler(patch, magic):
+    patch.object(Bundle, 'load_story')
+    bundle = Bundle(profiler=magic())
+    bundle.parse_story('one.story', None)
+    profiler = Bundle.load_story().parse.call_args[1]['profiler']
+    profiler('parse')
+    bundle.profiler.phase.assert_called_with('one.story', 'parse')
 
 
-def test_bundle_parse(patch, bundle):
-    patch.many(Bundle, ['parse_modules', 'load_story'])
-    bundle.parse(['one.story'], None)
-    Bundle.load_story.assert_called_with('one.story')
-    story = Bundle.load_story()
-    Bundle.parse_modules.assert_called_with(story.modules(), None)
-    assert bundle.stories['one.story'] == story.tree
+def test_bundle_phases(bundle):
+    assert bundle.phases('one.story') is None
 
 
-def test_bundle_compile(mocker, patch, bundle):
-    patch.many(Bundle, ['compile_modules', 'load_story'])
-    patch.many(Story, ['parse'])
+def test_bundle_parse_story_parsed(patch, bundle):
+    patch.object(Bundle, 'load_story')
+    bundle.parsed['one.story'] = 'story'
+    assert bundle.parse_story('one.story', None) == 'story'
+    assert Bundle.load_story.call_count == 0
 
-    bundle.compile(['one.story'], None)
-    Bundle.load_story.assert_called_with('one.story')
 
-    story = Bundle.load_story()
-    Bundle.compile_modules.assert_called_with(story.modules(), None)
-    story.compile.assert_called()
+def test_bundle_visit(patch, magic, bundle):
+    story = magic()
+    story.imports.return_value = {}
+    patch.object(Bundle, 'parse_story', return_value=story)
+    visited = set()
+    result = list(bundle.visit('one.story', 'ebnf', visited, []))
+    Bundle.parse_story.assert_called_with('one.story', 'ebnf')
+    assert result == [('one.story', story)]
+    assert visited == {'one.story'}
+
+
+def test_bundle_visit_visited(patch, bundle):
+    patch.object(Bundle, 'parse_story')
+    assert list(bundle.visit('one.story', None, {'one.story'}, [])) == []
+    assert Bundle.parse_story.call_count == 0
+
+
+def test_bundle_visit_bundled(patch, bundle):
+    """
+    Ensures that stories already in the bundle are not parsed again
+    """
+    patch.object(Bundle, 'parse_story')
+    bundle.stories['one.story'] = 'compiled'
+    assert list(bundle.visit('one.story', None, set(), [])) == []
+    assert Bundle.parse_story.call_count == 0
+
+
+def test_bundle_visit_modules(patch, magic, bundle):
+    """
+    Ensures that modules are added before the stories importing them
+    """
+    stories = {'one.story': magic(), 'two.story': magic()}
+    stories['one.story'].imports.return_value = {'two.story': 'tree'}
+    stories['two.story'].imports.return_value = {}
+    patch.object(Bundle, 'parse_story',
+                 side_effect=lambda path, ebnf: stories[path])
+    result = bundle.visit('one.story', None, set(), [])
+    assert [path for path, story in result] == ['two.story', 'one.story']
+
+
+def test_bundle_visit_cycle(patch, magic, bundle):
+    story = magic()
+    story.imports.return_value = {'one.story': 'tree'}
+    patch.object(Bundle, 'parse_story', return_value=story)
+    patch.object(Bundle, 'import_cycle', return_value=StoryError(None, None))
+    with raises(StoryError):
+        list(bundle.visit('one.story', None, set(), []))
+    Bundle.import_cycle.assert_called_with('one.story', 'one.story', None)
+
+
+def test_bundle_visit_cached(patch, bundle):
+    """
+    Ensures that cached stories are not parsed, using their cached modules
+    """
+    patch.object(Bundle, 'parse_story')
+    entry = {'modules': ['two.story'], 'compiled': 'compiled'}
+    patch.object(Bundle, 'cached', side_effect=[entry, None])
+    result = list(bundle.visit('one.story', 'ebnf', set(), [], cached=True))
+    Bundle.cached.assert_called_with('two.story', 'ebnf')
+    Bundle.parse_story.assert_called_with('two.story', 'ebnf')
+    assert result == [('two.story', Bundle.parse_story()),
+                      ('one.story', None)]
+
+
+def test_bundle_import_cycle(patch, magic, bundle):
+    patch.init(CompilerError)
+    patch.init(StoryError)
+    story = magic()
+    story.imports.return_value = {'two.story': 'tree'}
+    patch.object(Bundle, 'parse_story', return_value=story)
+    result = bundle.import_cycle('one.story', 'two.story', 'ebnf')
+    Bundle.parse_story.assert_called_with('one.story', 'ebnf')
+    CompilerError.__init__.assert_called_with('import_cycle', tree='tree')
+    error = StoryError.__init__.call_args[0][0]
+    assert isinstance(error, CompilerError)
+    StoryError.__init__.assert_called_with(error, story.story,
+                                           path='one.story')
+    assert isinstance(result, StoryError)
+
+
+def test_bundle_cached(bundle):
+    assert bundle.cached('one.story', None) is None
+
+
+def test_bundle_cached_cache(magic):
+    bundle = Bundle(story_files={'one.story': 'hello'}, cache=magic())
+    result = bundle.cached('one.story', 'ebnf')
+    bundle.cache.get.assert_called_with('hello', 'ebnf')
+    assert bundle.entries['one.story'] == bundle.cache.get()
+    assert result == bundle.cache.get()
+
+
+def test_bundle_cached_looked_up(magic):
+    """
+    Ensures that stories are looked up in the cache only once
+    """
+    bundle = Bundle(cache=magic())
+    bundle.entries['one.story'] = 'entry'
+    assert bundle.cached('one.story', None) == 'entry'
+    assert bundle.cache.get.call_count == 0
+
+
+def test_bundle_sort(patch, bundle):
+    patch.object(Bundle, 'visit', side_effect=[['one'], ['two']])
+    result = list(bundle.sort(['one.story', 'two.story'], 'ebnf'))
+    Bundle.visit.assert_called_with('two.story', 'ebnf', set(), [],
+                                    cached=False)
+    assert Bundle.visit.call_count == 2
+    assert result == ['one', 'two']
+
+
+def test_bundle_sort_cached(patch, bundle):
+    patch.object(Bundle, 'visit', return_value=[])
+    list(bundle.sort(['one.story'], 'ebnf', cached=True))
+    Bundle.visit.assert_called_with('one.story', 'ebnf', set(), [],
+                                    cached=True)
+
+
+def test_bundle_sort_lazy(patch, bundle):
+    """
+    Ensures that stories are parsed only as they are needed
+    """
+    patch.object(Bundle, 'visit', return_value=[])
+    bundle.sort(['one.story'], 'ebnf')
+    assert Bundle.visit.call_count == 0
+
+
+def test_bundle_parse(patch, magic, bundle):
+    story = magic()
+    patch.object(Bundle, 'sort', return_value=[('one.story', story)])
+    result = bundle.parse(['one.story'], None)
+    Bundle.sort.assert_called_with(['one.story'], None)
+    assert bundle.stories['one.story'] == story.tree
+    assert result == ['one.story']
+
+
+def test_bundle_compile_story(magic, bundle):
+    story = magic()
+    bundle.compile_story('one.story', story, None)
+    story.compile.assert_called_with(profiler=None)
     assert bundle.stories['one.story'] == story.compiled
 
 
+def test_bundle_compile_story_release(magic, bundle):
+    """
+    Ensures that parsed stories are released once compiled
+    """
+    bundle.parsed['one.story'] = 'story'
+    bundle.compile_story('one.story', magic(), None)
+    assert bundle.parsed == {}
+
+
+def test_bundle_compile_story_profiler(magic):
+    story = magic()
+    bundle = Bundle(profiler=magic())
+    bundle.compile_story('one.story', story, None)
+    story.compile.call_args[1]['profiler']('compile')
+    bundle.profiler.phase.assert_called_with('one.story', 'compile')
+
+
+def test_bundle_compile_story_cache(magic):
+    story = magic()
+    story.imports.return_value = {'two.story': 'tree'}
+    bundle = Bundle(story_files={'one.story': 'hello'}, cache=magic())
+    bundle.compile_story('one.story', story, 'ebnf')
+    bundle.cache.set.assert_called_with('hello', 'ebnf', story.compiled,
+                                        ['two.story'])
+
+
+def test_bundle_compile(patch, magic, bundle):
+    story = magic()
+    patch.object(Bundle, 'sort', return_value=[('one.story', story)])
+    patch.object(Bundle, 'compile_story')
+    result = bundle.compile(['one.story'], 'ebnf')
+    Bundle.sort.assert_called_with(['one.story'], 'ebnf', cached=True)
+    Bundle.compile_story.assert_called_with('one.story', story, 'ebnf')
+    assert result == ['one.story']
+
+
+def test_bundle_compile_cached(patch, bundle):
+    """
+    Ensures that stories found in the cache are not compiled again
+    """
+    patch.object(Bundle, 'sort', return_value=[('one.story', None)])
+    patch.object(Bundle, 'compile_story')
+    bundle.entries['one.story'] = {'compiled': 'compiled', 'modules': []}
+    result = bundle.compile(['one.story'], None)
+    assert Bundle.compile_story.call_count == 0
+    assert bundle.stories['one.story'] == 'compiled'
+    assert result == ['one.story']
+
+
+def test_bundle_init_worker(patch):
+    patch.many(Bundle, ['worker_files', 'worker_cache'])
+    Bundle.init_worker({'one.story': 'hello'}, 'cache')
+    assert Bundle.worker_files == {'one.story': 'hello'}
+    assert Bundle.worker_cache == 'cache'
+
+
+def test_bundle_run_worker(patch):
+    patch.object(Bundle, 'worker_files', {'one.story': 'hello'})
+    patch.object(Bundle, 'worker_cache', None)
+    patch.object(Bundle, 'compile')
+    result = Bundle.run_worker(('compile', 'one.story', 'ebnf'))
+    Bundle.compile.assert_called_with(['one.story'], 'ebnf')
+    assert result == ({}, None)
+
+
+def test_bundle_run_worker_cache(patch, magic):
+    """
+    Ensures that workers count their own cache hits and misses
+    """
+    patch.object(Bundle, 'worker_cache', magic())
+    patch.object(Bundle, 'compile')
+    result = Bundle.run_worker(('compile', 'one.story', None))
+    assert result == ({}, Bundle.worker_cache.empty())
+
+
+def test_bundle_run_worker_error(patch):
+    """
+    Ensures that workers return None when a story can't be compiled
+    """
+    patch.object(Bundle, 'compile', side_effect=Exception)
+    assert Bundle.run_worker(('compile', 'one.story', None)) is None
+
+
+def test_bundle_run_parallel(patch, bundle):
+    patch.object(multiprocessing, 'Pool')
+    pool = multiprocessing.Pool().__enter__()
+    pool.imap.return_value = [({'a': 'a', 'one': 'one'}, None),
+                              ({'a': 'a', 'two': 'two'}, None)]
+    result = bundle.run_parallel('compile', ['one', 'two'], 'ebnf', 2)
+    assert list(result) == ['a', 'one', 'two']
+    args = (bundle.story_files, None)
+    multiprocessing.Pool.assert_called_with(2, bundle.init_worker, args)
+    tasks = [('compile', 'one', 'ebnf'), ('compile', 'two', 'ebnf')]
+    pool.imap.assert_called_with(bundle.run_worker, tasks)
+    assert list(bundle.stories) == ['a', 'one', 'two']
+
+
+def test_bundle_run_parallel_error(patch, bundle):
+    """
+    Ensures that stories that failed in a worker are compiled again, so that
+    the error is raised in the main process
+    """
+    patch.object(multiprocessing, 'Pool')
+    patch.object(Bundle, 'compile', return_value=['two'])
+    pool = multiprocessing.Pool().__enter__()
+    pool.imap.return_value = [({'one': 'one'}, None), None]
+    result = bundle.run_parallel('compile', ['one', 'two'], None, 2)
+    assert list(result) == ['one', 'two']
+    Bundle.compile.assert_called_with(['two'], None)
+    assert bundle.stories == {'one': 'one'}
+
+
+def test_bundle_run_parallel_cache(patch, magic):
+    """
+    Ensures that the cache hits and misses of workers are counted
+    """
+    patch.object(multiprocessing, 'Pool')
+    pool = multiprocessing.Pool().__enter__()
+    pool.imap.return_value = [({'one': 'one'}, 'cache')]
+    bundle = Bundle(cache=magic())
+    list(bundle.run_parallel('compile', ['one'], None, 2))
+    bundle.cache.merge.assert_called_with('cache')
+
+
+def test_bundle_run(patch, bundle):
+    patch.object(Bundle, 'compile', side_effect=[['a', 'one'], ['two']])
+    patch.object(Bundle, 'run_parallel')
+    result = bundle.run('compile', ['one', 'two'], 'ebnf', None)
+    assert list(result) == ['a', 'one', 'two']
+    Bundle.compile.assert_called_with(['two'], 'ebnf')
+    assert Bundle.run_parallel.call_count == 0
+
+
+def test_bundle_run_one_story(patch, bundle):
+    patch.object(Bundle, 'compile', return_value=['one'])
+    patch.object(Bundle, 'run_parallel')
+    assert list(bundle.run('compile', ['one'], None, 2)) == ['one']
+    Bundle.compile.assert_called_with(['one'], None)
+    assert Bundle.run_parallel.call_count == 0
+
+
+def test_bundle_run_profiler(patch, magic):
+    """
+    Ensures that stories are handled in process when profiling
+    """
+    patch.many(Bundle, ['compile', 'run_parallel'])
+    Bundle.compile.return_value = []
+    bundle = Bundle(profiler=magic())
+    list(bundle.run('compile', ['one', 'two'], None, 2))
+    Bundle.compile.assert_called_with(['two'], None)
+    assert Bundle.run_parallel.call_count == 0
+
+
+def test_bundle_run_jobs(patch, bundle):
+    patch.many(Bundle, ['compile', 'run_parallel'])
+    Bundle.run_parallel.return_value = ['one', 'two']
+    result = bundle.run('compile', ['one', 'two'], 'ebnf', 2)
+    assert list(result) == ['one', 'two']
+    Bundle.run_parallel.assert_called_with('compile', ['one', 'two'],
+                                           'ebnf', 2)
+    assert Bundle.compile.call_count == 0
+
+
+def test_bundle_stream(patch, bundle):
+    patch.many(Bundle, ['find_stories', 'run'])
+    Bundle.run.return_value = ['one']
+    bundle.stories['one'] = 'compiled'
+    assert list(bundle.stream()) == [('one', 'compiled')]
+    Bundle.run.assert_called_with('compile', Bundle.find_stories(), None,
+                                  None)
+
+
+def test_bundle_stream_options(patch, bundle):
+    patch.many(Bundle, ['find_stories', 'run'])
+    list(bundle.stream(ebnf='ebnf', jobs=2))
+    Bundle.run.assert_called_with('compile', Bundle.find_stories(), 'ebnf',
+                                  2)
+
+
 def test_bundle_bundle(patch, bundle):
-    patch.many(Bundle, ['find_stories', 'services', 'compile'])
+    patch.many(Bundle, ['find_stories', 'services', 'run'])
     result = bundle.bundle()
-    Bundle.compile.assert_called_with(Bundle.find_stories(), None)
+    Bundle.run.assert_called_with('compile', Bundle.find_stories(), None,
+                                  None)
     expected = {'stories': bundle.stories, 'services': Bundle.services(),
                 'entrypoint': Bundle.find_stories()}
     assert result == expected
 
 
 def test_bundle_bundle_ebnf(patch, bundle):
-    patch.many(Bundle, ['find_stories', 'services', 'compile'])
+    patch.many(Bundle, ['find_stories', 'services', 'run'])
     bundle.bundle(ebnf='ebnf')
-    Bundle.compile.assert_called_with(Bundle.find_stories(), 'ebnf')
+    Bundle.run.assert_called_with('compile', Bundle.find_stories(), 'ebnf',
+                                  None)
+
+
+def test_bundle_bundle_jobs(patch, bundle):
+    patch.many(Bundle, ['find_stories', 'services', 'run'])
+    bundle.bundle(jobs=2)
+    Bundle.run.assert_called_with('compile', Bundle.find_stories(), None, 2)
 
 
 def test_bundle_bundle_trees(patch, bundle):
-    patch.many(Bundle, ['find_stories', 'parse'])
+    patch.many(Bundle, ['find_stories', 'run'])
     result = bundle.bundle_trees()
-    Bundle.parse.assert_called_with(Bundle.find_stories(), None)
+    Bundle.run.assert_called_with('parse', Bundle.find_stories(), None,
+                                  None)
     assert result == bundle.stories
 
 
 def test_bundle_bundle_trees_ebnf(patch, bundle):
-    patch.many(Bundle, ['find_stories', 'parse'])
+    patch.many(Bundle, ['find_stories', 'run'])
     bundle.bundle_trees(ebnf='ebnf')
-    Bundle.parse.assert_called_with(Bundle.find_stories(), 'ebnf')
+    Bundle.run.assert_called_with('parse', Bundle.find_stories(), 'ebnf',
+                                  None)
+
+
+def test_bundle_bundle_trees_jobs(patch, bundle):
+    patch.many(Bundle, ['find_stories', 'run'])
+    bundle.bundle_trees(jobs=2)
+    Bundle.run.assert_called_with('parse', Bundle.find_stories(), None, 2)
 
 
 def test_bundle_lex(patch, bundle):
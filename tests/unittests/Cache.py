@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import io
+import json
+import os
+import pickle
+
+from pytest import fixture
+
+from storyscript.AtomicFile import AtomicFile
+from storyscript.Cache import Cache
+from storyscript.Version import version
+from storyscript.parser import Parser
+
+
+@fixture
+def cache():
+    return Cache()
+
+
+def test_cache_init(cache):
+    assert cache.directory == '.storyscript-cache'
+    assert cache.memory == {}
+    assert cache.shared == {}
+    assert cache.hits == 0
+    assert cache.misses == 0
+
+
+def test_cache_init_directory():
+    assert Cache(directory='cache').directory == 'cache'
+
+
+def test_cache_empty():
+    cache = Cache(directory='cache')
+    cache.hits = 1
+    cache.memory['key'] = 'entry'
+    result = cache.empty()
+    assert result.directory == 'cache'
+    assert result.hits == 0
+    assert result.memory == {}
+    assert result.shared == {'key': 'entry'}
+
+
+def test_cache_getstate():
+    """
+    Ensures that shared entries are not pickled
+    """
+    cache = Cache().empty()
+    cache.shared['key'] = 'entry'
+    cache.memory['other'] = 'entry'
+    result = pickle.loads(pickle.dumps(cache))
+    assert result.shared == {}
+    assert result.memory == {'other': 'entry'}
+
+
+def test_cache_merge(cache):
+    other = Cache()
+    other.hits = 2
+    other.misses = 1
+    other.memory['key'] = 'entry'
+    cache.merge(other)
+    assert cache.hits == 2
+    assert cache.misses == 1
+    assert cache.memory == {'key': 'entry'}
+
+
+def test_cache_digest(patch, cache):
+    patch.init(Parser)
+    patch.object(Parser, 'hashed_grammar', return_value=('grammar', 'digest'))
+    result = cache.digest('ebnf')
+    Parser.__init__.assert_called_with(ebnf='ebnf')
+    assert result == 'digest'
+
+
+def test_cache_key(patch, cache):
+    patch.object(Cache, 'digest', return_value='digest')
+    result = cache.key('source', 'ebnf')
+    Cache.digest.assert_called_with('ebnf')
+    data = '{}\ndigest\nsource'.format(version).encode('utf-8')
+    assert result == hashlib.sha1(data).hexdigest()
+
+
+def test_cache_path(cache):
+    result = cache.path('key')
+    assert result == os.path.join('.storyscript-cache', 'key.json')
+
+
+def test_cache_load(patch, cache):
+    patch.object(Cache, 'path')
+    patch.object(io, 'open')
+    patch.object(json, 'load')
+    result = cache.load('key')
+    Cache.path.assert_called_with('key')
+    io.open.assert_called_with(Cache.path(), 'r')
+    json.load.assert_called_with(io.open().__enter__())
+    assert result == json.load()
+
+
+def test_cache_load_missing(patch, cache):
+    patch.object(io, 'open', side_effect=FileNotFoundError)
+    assert cache.load('key') is None
+
+
+def test_cache_load_broken(patch, cache):
+    """
+    Ensures that broken entries are ignored
+    """
+    patch.object(io, 'open')
+    patch.object(json, 'load', side_effect=ValueError)
+    assert cache.load('key') is None
+
+
+def test_cache_load_memory(patch):
+    patch.object(io, 'open')
+    assert Cache(directory=None).load('key') is None
+    assert io.open.call_count == 0
+
+
+def test_cache_dump(patch, cache):
+    patch.object(Cache, 'path')
+    patch.object(os, 'makedirs')
+    patch.object(AtomicFile, 'open')
+    patch.object(json, 'dump')
+    cache.dump('key', 'entry')
+    Cache.path.assert_called_with('key')
+    os.makedirs.assert_called_with(cache.directory, exist_ok=True)
+    AtomicFile.open.assert_called_with(Cache.path())
+    f = AtomicFile.open().__enter__()
+    json.dump.assert_called_with('entry', f)
+
+
+def test_cache_dump_memory(patch):
+    patch.object(os, 'makedirs')
+    Cache(directory=None).dump('key', 'entry')
+    assert os.makedirs.call_count == 0
+
+
+def test_cache_dump_unwritable(patch, cache):
+    patch.object(os, 'makedirs', side_effect=PermissionError)
+    patch.object(AtomicFile, 'open')
+    cache.dump('key', 'entry')
+    assert AtomicFile.open.call_count == 0
+
+
+def test_cache_dump_error(patch, tmpdir):
+    """
+    Ensures that entries that can't be written are not cached
+    """
+    cache = Cache(directory=str(tmpdir))
+    cache.dump('key', object())
+    assert tmpdir.listdir() == []
+
+
+def test_cache_get(patch, cache):
+    patch.many(Cache, ['key', 'load'])
+    result = cache.get('source', 'ebnf')
+    Cache.key.assert_called_with('source', 'ebnf')
+    Cache.load.assert_called_with(Cache.key())
+    assert cache.memory[Cache.key()] == Cache.load()
+    assert cache.hits == 1
+    assert result == Cache.load()
+
+
+def test_cache_get_memory(patch, cache):
+    """
+    Ensures that entries kept in memory are not loaded again
+    """
+    patch.object(Cache, 'key', return_value='key')
+    patch.object(Cache, 'load')
+    cache.memory['key'] = 'entry'
+    assert cache.get('source', None) == 'entry'
+    assert Cache.load.call_count == 0
+    assert cache.hits == 1
+
+
+def test_cache_get_shared(patch, cache):
+    """
+    Ensures that entries shared by another cache are used
+    """
+    patch.object(Cache, 'key', return_value='key')
+    patch.object(Cache, 'load')
+    cache.shared['key'] = 'entry'
+    assert cache.get('source', None) == 'entry'
+    assert Cache.load.call_count == 0
+    assert cache.hits == 1
+
+
+def test_cache_get_missing(patch, cache):
+    patch.object(Cache, 'key')
+    patch.object(Cache, 'load', return_value=None)
+    assert cache.get('source', None) is None
+    assert cache.memory == {}
+    assert cache.misses == 1
+
+
+def test_cache_set(patch, cache):
+    patch.object(Cache, 'key', return_value='key')
+    patch.object(Cache, 'dump')
+    cache.set('source', 'ebnf', 'compiled', ['one.story'])
+    Cache.key.assert_called_with('source', 'ebnf')
+    entry = {'compiled': 'compiled', 'modules': ['one.story']}
+    assert cache.memory['key'] == entry
+    Cache.dump.assert_called_with('key', entry)
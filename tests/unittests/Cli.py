@@ -1,16 +1,21 @@
 # -*- coding: utf-8 -*-
-import io
 import os
 
 import click
 from click.testing import CliRunner
 
-from pytest import fixture, mark
+from pytest import fixture, mark, raises
 
 from storyscript.App import App
+from storyscript.AtomicFile import AtomicFile
+from storyscript.Cache import Cache
 from storyscript.Cli import Cli
+from storyscript.Client import Client
+from storyscript.Profiler import Profiler
 from storyscript.Project import Project
+from storyscript.Server import Server
 from storyscript.Version import version
+from storyscript.Watcher import Watcher
 from storyscript.exceptions.CompilerError import CompilerError
 from storyscript.exceptions.StoryError import StoryError
 
@@ -65,6 +70,12 @@ def test_cli_alais_new(patch, runner):
     Project.new.assert_called_with('project')
 
 
+def test_cli_alias_serve(patch, runner, echo):
+    patch.object(Server, 'serve')
+    runner.invoke(Cli.main, ['s'])
+    assert Server.serve.call_count == 1
+
+
 def test_cli_alias_help(runner, echo):
     runner.invoke(Cli.main, 'h')
     click.echo.assert_called_once()
@@ -97,7 +108,8 @@ def test_cli_compile_with_ignore_option(runner, app):
     runner.invoke(Cli.compile, ['path/fake.story',
                                 '--ignore', 'path/sub_dir/my_fake.story'])
     App.compile.assert_called_with('path/fake.story', ebnf=None,
-                                   ignored_path='path/sub_dir/my_fake.story')
+                                   ignored_path='path/sub_dir/my_fake.story',
+                                   jobs=1, cache=None)
 
 
 def test_cli_parse_with_ignore_option(runner, app):
@@ -108,7 +120,7 @@ def test_cli_parse_with_ignore_option(runner, app):
                               'path/sub_dir/my_fake.story'])
     App.parse.assert_called_with('path/fake.story', ebnf=None,
                                  ignored_path='path/sub_dir/my_fake.story',
-                                 preprocess=False)
+                                 preprocess=False, jobs=1)
 
 
 def test_cli_parse(runner, echo, app, tree):
@@ -118,7 +130,8 @@ def test_cli_parse(runner, echo, app, tree):
     App.parse.return_value = {'path': tree}
     runner.invoke(Cli.parse, [])
     App.parse.assert_called_with(os.getcwd(), ebnf=None,
-                                 ignored_path=None, preprocess=False)
+                                 ignored_path=None, preprocess=False,
+                                 jobs=1)
     click.echo.assert_called_with(tree.pretty())
 
 
@@ -137,7 +150,8 @@ def test_cli_parse_path(runner, echo, app):
     """
     runner.invoke(Cli.parse, ['/path'])
     App.parse.assert_called_with('/path', ebnf=None,
-                                 ignored_path=None, preprocess=False)
+                                 ignored_path=None, preprocess=False,
+                                 jobs=1)
 
 
 def test_cli_parse_ebnf(runner, echo, app):
@@ -146,7 +160,18 @@ def test_cli_parse_ebnf(runner, echo, app):
     """
     runner.invoke(Cli.parse, ['--ebnf', 'test.ebnf'])
     App.parse.assert_called_with(os.getcwd(), ebnf='test.ebnf',
-                                 ignored_path=None, preprocess=False)
+                                 ignored_path=None, preprocess=False,
+                                 jobs=1)
+
+
+def test_cli_parse_jobs(runner, echo, app):
+    """
+    Ensures the parse command supports parsing with many processes
+    """
+    runner.invoke(Cli.parse, ['--jobs', '4'])
+    App.parse.assert_called_with(os.getcwd(), ebnf=None,
+                                 ignored_path=None, preprocess=False,
+                                 jobs=4)
 
 
 def test_cli_parse_preprocess(runner, echo, app):
@@ -155,7 +180,8 @@ def test_cli_parse_preprocess(runner, echo, app):
     """
     runner.invoke(Cli.parse, ['--preprocess'])
     App.parse.assert_called_with(os.getcwd(), ebnf=None,
-                                 ignored_path=None, preprocess=True)
+                                 ignored_path=None, preprocess=True,
+                                 jobs=1)
 
 
 def test_cli_parse_debug(runner, echo, app):
@@ -180,7 +206,8 @@ def test_cli_parse_ice(runner, echo, app):
     assert e.exit_code == 1
     click.echo.assert_called_with((
         'Internal error occured: ICE\n'
-        'Please report at https://github.com/storyscript/storyscript/issues'))
+        'Please report at https://github.com/storyscript/storyscript/issues'),
+        err=False)
 
 
 def test_cli_parse_debug_ice(runner, echo, app):
@@ -202,7 +229,7 @@ def test_cli_parse_not_found(runner, echo, app):
     app.parse.side_effect = StoryError(ce, None)
     e = runner.invoke(Cli.parse, ['/a/non/existent/file'])
     assert e.exit_code == 1
-    click.echo.assert_called_with('error')
+    click.echo.assert_called_with('error', err=False)
 
 
 def test_cli_compile(patch, runner, echo, app):
@@ -212,7 +239,7 @@ def test_cli_compile(patch, runner, echo, app):
     patch.object(click, 'style')
     runner.invoke(Cli.compile, [])
     App.compile.assert_called_with(os.getcwd(), ebnf=None,
-                                   ignored_path=None)
+                                   ignored_path=None, jobs=1, cache=None)
     click.style.assert_called_with('Script syntax passed!', fg='green')
     click.echo.assert_called_with(click.style())
 
@@ -223,17 +250,18 @@ def test_cli_compile_path(patch, runner, app):
     """
     runner.invoke(Cli.compile, ['/path'])
     App.compile.assert_called_with('/path', ebnf=None,
-                                   ignored_path=None)
+                                   ignored_path=None, jobs=1, cache=None)
 
 
 def test_cli_compile_output_file(patch, runner, app):
     """
     Ensures the compile command supports specifying an output file.
     """
-    patch.object(io, 'open')
+    patch.object(Cli, 'write')
     runner.invoke(Cli.compile, ['/path', 'hello.story', '-j'])
-    io.open.assert_called_with('hello.story', 'w')
-    io.open().__enter__().write.assert_called_with(App.compile())
+    options = {'ignored_path': None, 'ebnf': None, 'jobs': 1, 'cache': None}
+    Cli.write.assert_called_with('hello.story', '/path', False, 'json',
+                                 options)
 
 
 @mark.parametrize('option', ['--silent', '-s'])
@@ -243,7 +271,7 @@ def test_cli_compile_silent(runner, echo, app, option):
     """
     result = runner.invoke(Cli.compile, [option])
     App.compile.assert_called_with(os.getcwd(), ebnf=None,
-                                   ignored_path=None)
+                                   ignored_path=None, jobs=1, cache=None)
     assert result.output == ''
     assert click.echo.call_count == 0
 
@@ -251,24 +279,257 @@ def test_cli_compile_silent(runner, echo, app, option):
 def test_cli_compile_debug(runner, echo, app):
     runner.invoke(Cli.compile, ['--debug'])
     App.compile.assert_called_with(os.getcwd(), ebnf=None,
-                                   ignored_path=None)
+                                   ignored_path=None, jobs=1, cache=None)
 
 
 @mark.parametrize('option', ['--json', '-j'])
-def test_cli_compile_json(runner, echo, app, option):
+def test_cli_compile_json(patch, runner, echo, app, option):
     """
     Ensures --json outputs json
     """
+    patch.object(App, 'write')
     runner.invoke(Cli.compile, [option])
-    App.compile.assert_called_with(os.getcwd(), ebnf=None,
-                                   ignored_path=None)
-    click.echo.assert_called_with(App.compile())
+    args, kwargs = App.write.call_args
+    assert args[1] == os.getcwd()
+    assert kwargs == {'compact': False, 'ebnf': None, 'ignored_path': None,
+                      'jobs': 1, 'cache': None, 'format': 'json'}
+    click.echo.assert_called_with()
+    assert App.compile.call_count == 0
+
+
+def test_cli_compile_compact(patch, runner, echo, app):
+    """
+    Ensures --compact outputs json without indentation
+    """
+    patch.object(App, 'write')
+    runner.invoke(Cli.compile, ['-j', '--compact'])
+    assert App.write.call_args[1]['compact'] is True
+
+
+def test_cli_compile_format(patch, runner, echo, app):
+    """
+    Ensures --format outputs the stories in a binary format
+    """
+    patch.object(Cli, 'output')
+    runner.invoke(Cli.compile, ['/path', '--format', 'msgpack'])
+    options = {'ignored_path': None, 'ebnf': None, 'jobs': 1, 'cache': None}
+    Cli.output.assert_called_with('/path', None, True, False, False,
+                                  'msgpack', options)
 
 
 def test_cli_compile_ebnf(runner, echo, app):
     runner.invoke(Cli.compile, ['--ebnf', 'test.ebnf'])
     App.compile.assert_called_with(os.getcwd(), ebnf='test.ebnf',
-                                   ignored_path=None)
+                                   ignored_path=None, jobs=1, cache=None)
+
+
+def test_cli_compile_jobs(runner, echo, app):
+    """
+    Ensures the compile command supports compiling with many processes
+    """
+    runner.invoke(Cli.compile, ['--jobs', '4'])
+    App.compile.assert_called_with(os.getcwd(), ebnf=None,
+                                   ignored_path=None, jobs=4, cache=None)
+
+
+def test_cli_compile_cache(runner, echo, app):
+    """
+    Ensures the compile command can use the cache, printing its hits and
+    misses
+    """
+    runner.invoke(Cli.compile, ['--cache'])
+    cache = App.compile.call_args[1]['cache']
+    assert isinstance(cache, Cache)
+    message = 'Cache: {} hits, {} misses'.format(cache.hits, cache.misses)
+    click.echo.assert_any_call(message, err=True)
+
+
+def test_cli_compile_profile(patch, runner, echo, app):
+    """
+    Ensures the compile command can profile the phases of compiling stories
+    """
+    patch.many(Profiler, ['start', 'stop', 'table'])
+    runner.invoke(Cli.compile, ['/path', '--profile', 'table'])
+    profiler = App.compile.call_args[1]['profiler']
+    assert isinstance(profiler, Profiler)
+    assert profiler.memory is False
+    assert Profiler.start.call_count == 1
+    assert Profiler.stop.call_count == 1
+    click.echo.assert_called_with(Profiler.table(), err=True)
+
+
+def test_cli_compile_profile_memory(patch, runner, echo, app):
+    patch.many(Profiler, ['start', 'stop'])
+    patch.object(Cli, 'profile')
+    runner.invoke(Cli.compile, ['--profile', 'json', '--memory', '--pstats',
+                                'stats'])
+    profiler = App.compile.call_args[1]['profiler']
+    assert profiler.memory is True
+    assert profiler.pstats == 'stats'
+    Cli.profile.assert_called_with(profiler, 'json')
+
+
+def test_cli_compile_pstats(patch, runner, echo, app):
+    """
+    Ensures that --pstats profiles the run without printing the phases
+    """
+    patch.many(Profiler, ['start', 'stop'])
+    patch.object(Cli, 'profile')
+    runner.invoke(Cli.compile, ['--pstats', 'stats'])
+    assert App.compile.call_args[1]['profiler'].pstats == 'stats'
+    assert Profiler.stop.call_count == 1
+    assert Cli.profile.call_count == 0
+
+
+def test_cli_profile(patch, magic, echo):
+    profiler = magic()
+    Cli.profile(profiler, 'table')
+    click.echo.assert_called_with(profiler.table(), err=True)
+
+
+def test_cli_profile_json(patch, magic, echo):
+    profiler = magic()
+    profiler.results.return_value = {'totals': {}}
+    Cli.profile(profiler, 'json')
+    click.echo.assert_called_with('{\n  "totals": {}\n}', err=True)
+
+
+def test_cli_compile_watch(patch, runner, app):
+    """
+    Ensures the compile command can watch stories, keeping the compiled ones
+    in memory
+    """
+    patch.object(Cli, 'watch')
+    runner.invoke(Cli.compile, ['--watch', '/path'])
+    cache = Cli.watch.call_args[0][-1]['cache']
+    options = {'ignored_path': None, 'ebnf': None, 'jobs': 1, 'cache': cache}
+    Cli.watch.assert_called_with('/path', None, False, False, False, 'json',
+                                 options)
+    assert cache.directory is None
+    assert app.compile.call_count == 0
+
+
+def test_cli_compile_watch_cache(patch, runner, app):
+    patch.object(Cli, 'watch')
+    runner.invoke(Cli.compile, ['--watch', '--cache'])
+    cache = Cli.watch.call_args[0][-1]['cache']
+    assert cache.directory == '.storyscript-cache'
+
+
+def test_cli_write(patch, app):
+    """
+    Ensures Cli.write replaces the output file once stories are compiled
+    """
+    patch.object(App, 'write')
+    patch.object(AtomicFile, 'open')
+    Cli.write('hello.json', '/path', False, 'json', {'ebnf': None})
+    AtomicFile.open.assert_called_with('hello.json', 'w', encoding='utf-8')
+    f = AtomicFile.open().__enter__()
+    App.write.assert_called_with(f, '/path', compact=False, format='json',
+                                 ebnf=None)
+
+
+def test_cli_write_orjson(patch, app):
+    patch.object(App, 'write')
+    patch.object(AtomicFile, 'open')
+    Cli.write('hello.json', '/path', False, 'orjson', {})
+    AtomicFile.open.assert_called_with('hello.json', 'w', encoding='utf-8')
+
+
+def test_cli_write_binary(patch, app):
+    patch.object(App, 'write')
+    patch.object(AtomicFile, 'open')
+    Cli.write('hello.cbor', '/path', False, 'cbor', {})
+    AtomicFile.open.assert_called_with('hello.cbor', 'wb')
+    f = AtomicFile.open().__enter__()
+    App.write.assert_called_with(f, '/path', compact=False, format='cbor')
+
+
+def test_cli_write_error(patch, app, tmpdir):
+    """
+    Ensures Cli.write keeps the output file when compiling fails
+    """
+    patch.object(App, 'write', side_effect=Exception('error'))
+    output = tmpdir.join('hello.json')
+    output.write('old')
+    with raises(Exception):
+        Cli.write(str(output), '/path', False, 'json', {})
+    assert output.read() == 'old'
+    assert tmpdir.listdir() == [output]
+
+
+def test_cli_output(patch, echo, app):
+    patch.object(click, 'style')
+    Cli.output('/path', None, False, False, False, 'json', {'ebnf': 'ebnf'})
+    App.compile.assert_called_with('/path', ebnf='ebnf')
+    click.style.assert_called_with('Script syntax passed!', fg='green')
+    click.echo.assert_called_with(click.style())
+
+
+def test_cli_output_silent(patch, echo, app):
+    Cli.output('/path', None, True, True, False, 'json', {})
+    App.compile.assert_called_with('/path')
+    assert click.echo.call_count == 0
+
+
+def test_cli_output_json(patch, echo, app):
+    patch.object(App, 'write')
+    patch.object(click, 'get_text_stream')
+    Cli.output('/path', None, True, False, True, 'json', {})
+    click.get_text_stream.assert_called_with('stdout')
+    App.write.assert_called_with(click.get_text_stream(), '/path',
+                                 compact=True, format='json')
+    click.echo.assert_called_with()
+
+
+def test_cli_output_orjson(patch, echo, app):
+    patch.object(App, 'write')
+    patch.object(click, 'get_text_stream')
+    Cli.output('/path', None, True, False, False, 'orjson', {})
+    App.write.assert_called_with(click.get_text_stream(), '/path',
+                                 compact=False, format='orjson')
+
+
+def test_cli_output_file(patch, echo, app):
+    patch.object(Cli, 'write')
+    Cli.output('/path', 'hello.json', True, False, False, 'json', {})
+    Cli.write.assert_called_with('hello.json', '/path', False, 'json', {})
+    assert click.echo.call_count == 0
+
+
+def test_cli_output_binary(patch, echo, app):
+    patch.object(App, 'write')
+    patch.object(click, 'get_binary_stream')
+    Cli.output('/path', None, True, False, False, 'msgpack', {})
+    click.get_binary_stream.assert_called_with('stdout')
+    App.write.assert_called_with(click.get_binary_stream(), '/path',
+                                 format='msgpack')
+    assert click.echo.call_count == 0
+
+
+def test_cli_watch(patch, echo, app):
+    patch.object(Watcher, 'watch', return_value=[['one.story']])
+    patch.init(Watcher)
+    patch.object(Cli, 'output')
+    options = {'ignored_path': 'ignored'}
+    Cli.watch('/path', None, False, False, False, 'json', options)
+    Watcher.__init__.assert_called_with('/path', ignored_path='ignored')
+    Cli.output.assert_called_with('/path', None, False, False, False,
+                                  'json', options)
+
+
+def test_cli_watch_error(patch, echo, app):
+    """
+    Ensures that errors are printed without stopping the watch
+    """
+    patch.object(Watcher, 'watch', return_value=[['one.story'],
+                                                 ['one.story']])
+    ce = CompilerError(None, message='error')
+    app.compile.side_effect = StoryError(ce, None)
+    Cli.watch('/path', None, False, False, False, 'json',
+              {'ignored_path': None})
+    assert App.compile.call_count == 2
+    click.echo.assert_called_with('error', err=False)
 
 
 def test_cli_compile_ice(runner, echo, app):
@@ -280,7 +541,8 @@ def test_cli_compile_ice(runner, echo, app):
     assert e.exit_code == 1
     click.echo.assert_called_with((
         'Internal error occured: ICE\n'
-        'Please report at https://github.com/storyscript/storyscript/issues'))
+        'Please report at https://github.com/storyscript/storyscript/issues'),
+        err=False)
 
 
 def test_cli_compile_debug_ice(runner, echo, app):
@@ -302,7 +564,28 @@ def test_cli_compile_not_found(runner, echo, app):
     app.compile.side_effect = StoryError(ce, None)
     e = runner.invoke(Cli.compile, ['/a/non/existent/file'])
     assert e.exit_code == 1
-    click.echo.assert_called_with('error')
+    click.echo.assert_called_with('error', err=False)
+
+
+def test_cli_compile_json_error(patch, runner, echo, app):
+    """
+    Ensures errors are printed to stderr when stories are printed
+    """
+    ce = CompilerError(None, message='error')
+    patch.object(App, 'write', side_effect=StoryError(ce, None))
+    e = runner.invoke(Cli.compile, ['/path', '-j'])
+    assert e.exit_code == 1
+    click.echo.assert_called_with('error', err=True)
+
+
+@mark.parametrize('output, json, silent, prints', [
+    (None, True, False, True),
+    ('app.json', True, False, False),
+    (None, False, False, False),
+    (None, True, True, False)
+])
+def test_cli_prints(output, json, silent, prints):
+    assert Cli.prints(output, json, silent) is prints
 
 
 def test_cli_compile_not_found_debug(runner, echo, app):
@@ -356,7 +639,8 @@ def test_cli_lex_ice(patch, runner, echo, app):
     assert e.exit_code == 1
     click.echo.assert_called_with((
         'Internal error occured: ICE\n'
-        'Please report at https://github.com/storyscript/storyscript/issues'))
+        'Please report at https://github.com/storyscript/storyscript/issues'),
+        err=False)
 
 
 def test_cli_lex_debug_ice(patch, runner, echo, app):
@@ -379,7 +663,7 @@ def test_cli_lex_not_found(patch, runner, echo, app):
     App.lex.side_effect = StoryError(ce, None)
     e = runner.invoke(Cli.lex, ['/a/non/existent/file'])
     assert e.exit_code == 1
-    click.echo.assert_called_with('error')
+    click.echo.assert_called_with('error', err=False)
 
 
 def test_cli_lex_not_found_debug(patch, runner, echo, app):
@@ -411,6 +695,34 @@ def test_cli_new(patch, runner):
     Project.new.assert_called_with('project')
 
 
+def test_cli_serve(patch, runner, echo):
+    """
+    Ensures Cli.serve starts a server
+    """
+    patch.object(Client, 'socket_path', return_value='server.sock')
+    patch.object(Server, 'serve')
+    runner.invoke(Cli.serve, [])
+    click.echo.assert_called_with('Listening on server.sock', err=True)
+    assert Server.serve.call_count == 1
+
+
+def test_cli_serve_socket(patch, runner, echo):
+    patch.object(Server, 'serve')
+    runner.invoke(Cli.serve, ['--socket', 'other.sock'])
+    click.echo.assert_called_with('Listening on other.sock', err=True)
+
+
+def test_cli_serve_running(patch, runner, echo):
+    """
+    Ensures Cli.serve prints errors
+    """
+    ce = CompilerError(None, message='error')
+    patch.object(Server, 'serve', side_effect=StoryError(ce, None))
+    e = runner.invoke(Cli.serve, ['--socket', 'server.sock'])
+    assert e.exit_code == 1
+    click.echo.assert_called_with('error', err=False)
+
+
 def test_cli_help(patch, runner, echo):
     runner.invoke(Cli.help, [])
     # NOTE(vesuvium): another weird click thing. The context.parent.get_help
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import socket
+
+from pytest import fixture, raises
+
+from storyscript.Client import Client
+from storyscript.Server import Server
+from storyscript.Version import version
+from storyscript.exceptions import StoryError
+
+
+@fixture
+def client():
+    return Client(path='server.sock')
+
+
+def test_client_init(patch):
+    patch.object(Client, 'socket_path')
+    client = Client()
+    assert client.path == Client.socket_path()
+    assert client.timeout is None
+
+
+def test_client_init_options():
+    client = Client(path='server.sock', timeout=1)
+    assert client.path == 'server.sock'
+    assert client.timeout == 1
+
+
+def test_client_socket_path(patch):
+    patch.dict(os.environ, {'XDG_RUNTIME_DIR': 'run'})
+    name = 'storyscript-{}.sock'.format(version)
+    assert Client.socket_path() == os.path.join('run', name)
+
+
+def test_client_socket_path_cache(patch):
+    patch.dict(os.environ, {'XDG_CACHE_HOME': 'cache'})
+    os.environ.pop('XDG_RUNTIME_DIR', None)
+    name = 'storyscript-{}.sock'.format(version)
+    result = Client.socket_path()
+    assert result == os.path.join('cache', 'storyscript', name)
+
+
+def test_client_socket_path_home(patch):
+    patch.dict(os.environ)
+    os.environ.pop('XDG_RUNTIME_DIR', None)
+    os.environ.pop('XDG_CACHE_HOME', None)
+    patch.object(os.path, 'expanduser', return_value='home')
+    name = 'storyscript-{}.sock'.format(version)
+    result = Client.socket_path()
+    assert result == os.path.join('home', '.cache', 'storyscript', name)
+    os.path.expanduser.assert_called_with('~')
+
+
+def test_client_request(patch, client):
+    patch.object(socket, 'socket')
+    patch.object(json, 'loads')
+    result = client.request('loads', {'string': 'x = 0'})
+    socket.socket.assert_called_with(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection = socket.socket().__enter__()
+    connection.settimeout.assert_called_with(None)
+    connection.connect.assert_called_with('server.sock')
+    request = {'method': 'loads', 'params': {'string': 'x = 0'}}
+    data = json.dumps(request).encode('utf-8') + b'\n'
+    connection.sendall.assert_called_with(data)
+    connection.makefile.assert_called_with('rb')
+    stream = connection.makefile().__enter__()
+    json.loads.assert_called_with(stream.readline())
+    assert result == json.loads()
+
+
+def test_client_call(patch, client):
+    patch.object(Client, 'request', return_value={'result': 'result'})
+    assert client.call('loads', string='x = 0') == 'result'
+    Client.request.assert_called_with('loads', {'string': 'x = 0'})
+
+
+def test_client_call_error(patch, client):
+    patch.object(Client, 'request', return_value={'error': 'error'})
+    with raises(StoryError) as e:
+        client.call('loads', string='x = 0')
+    assert e.value.message() == 'error'
+
+
+@fixture(params=[FileNotFoundError, ConnectionRefusedError])
+def no_server(request):
+    return request.param
+
+
+def test_client_call_no_server(patch, client, no_server):
+    """
+    Ensures that requests are handled in process when there's no server
+    """
+    patch.object(Client, 'request', side_effect=no_server)
+    patch.object(Server, 'loads')
+    result = client.call('loads', string='x = 0')
+    Server.loads.assert_called_with(string='x = 0')
+    assert result == Server.loads()
+
+
+@fixture(params=['parse', 'lex'])
+def method(request):
+    return request.param
+
+
+def test_client_methods(patch, client, method):
+    patch.object(Client, 'call')
+    result = getattr(client, method)('x = 0')
+    Client.call.assert_called_with(method, source='x = 0')
+    assert result == Client.call()
+
+
+def test_client_loads(patch, client):
+    patch.object(Client, 'call')
+    result = client.loads('x = 0')
+    Client.call.assert_called_with('loads', string='x = 0')
+    assert result == Client.call()
+
+
+def test_client_load_map(patch, client):
+    patch.object(Client, 'call')
+    result = client.load_map('files')
+    Client.call.assert_called_with('load_map', files='files')
+    assert result == Client.call()
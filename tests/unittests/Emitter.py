@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+
+from pytest import fixture, mark, raises
+
+from storyscript.Emitter import Emitter
+from storyscript.Serializer import Serializer
+
+
+@fixture
+def emitter():
+    return Emitter('stream')
+
+
+@fixture
+def bundle(magic):
+    bundle = magic()
+    bundle.stories = {'one.story': {'tree': {'1': {'method': 'run'}}},
+                      'two.story': {'tree': {}}}
+    bundle.stream.return_value = bundle.stories.items()
+    bundle.services.return_value = ['alpine']
+    bundle.find_stories.return_value = ['one.story', 'two.story']
+    return bundle
+
+
+def test_emitter_init(emitter):
+    assert emitter.stream == 'stream'
+    assert emitter.indent == 2
+    assert emitter.separators == (',', ': ')
+    assert emitter.profiler is None
+    assert emitter.fast is False
+
+
+def test_emitter_init_compact():
+    emitter = Emitter('stream', compact=True)
+    assert emitter.indent is None
+    assert emitter.separators == (',', ':')
+
+
+def test_emitter_newline(emitter):
+    assert emitter.newline(0) == '\n'
+    assert emitter.newline(2) == '\n    '
+
+
+def test_emitter_newline_compact():
+    assert Emitter('stream', compact=True).newline(2) == ''
+
+
+def test_emitter_dumps(emitter):
+    assert emitter.dumps({'a': [1]}, 1) == '{\n    "a": [\n      1\n    ]\n  }'
+
+
+def test_emitter_dumps_fast(patch):
+    patch.object(Serializer, 'json', return_value='{}')
+    Emitter('stream', fast=True).dumps('data', 1)
+    Serializer.json.assert_called_with('data', compact=False, fast=True)
+
+
+def test_emitter_dumps_compact():
+    assert Emitter('stream', compact=True).dumps({'a': [1]}, 1) == '{"a":[1]}'
+
+
+def test_emitter_key():
+    emitter = Emitter(io.StringIO())
+    emitter.key('one.story', 1)
+    assert emitter.stream.getvalue() == '\n  "one.story": '
+
+
+def test_emitter_dump(patch, emitter):
+    patch.object(Emitter, 'dumps')
+    result = emitter.dump('one.story', 'story')
+    Emitter.dumps.assert_called_with('story', 2)
+    assert result == Emitter.dumps()
+
+
+def test_emitter_dump_profiler(patch, magic):
+    patch.object(Emitter, 'dumps')
+    emitter = Emitter('stream', profiler=magic())
+    result = emitter.dump('one.story', 'story')
+    emitter.profiler.phase.assert_called_with('one.story', 'json')
+    Emitter.dumps.assert_called_with('story', 2)
+    assert result == Emitter.dumps()
+
+
+def test_emitter_write(bundle):
+    emitter = Emitter(io.StringIO())
+    emitter.write(bundle, ebnf='ebnf', jobs=2)
+    bundle.stream.assert_called_with(ebnf='ebnf', jobs=2)
+    expected = {'stories': bundle.stories, 'services': ['alpine'],
+                'entrypoint': ['one.story', 'two.story']}
+    assert emitter.stream.getvalue() == json.dumps(expected, indent=2)
+
+
+def test_emitter_write_error(bundle):
+    """
+    Ensures nothing is written when the first story can't be compiled
+    """
+    bundle.stream.side_effect = Exception()
+    emitter = Emitter(io.StringIO())
+    with raises(Exception):
+        emitter.write(bundle)
+    assert emitter.stream.getvalue() == ''
+
+
+def test_emitter_write_error_truncated(bundle):
+    """
+    Ensures a truncated document is ended with a new line
+    """
+    def stream(ebnf, jobs):
+        yield 'one.story', {}
+        raise Exception()
+
+    bundle.stream.side_effect = stream
+    emitter = Emitter(io.StringIO(), compact=True)
+    with raises(Exception):
+        emitter.write(bundle)
+    assert emitter.stream.getvalue() == '{"stories":{"one.story":{}\n'
+
+
+@mark.parametrize('compact', [False, True])
+def test_emitter_write_empty(bundle, compact):
+    bundle.stories = {}
+    bundle.stream.return_value = []
+    bundle.services.return_value = []
+    bundle.find_stories.return_value = []
+    emitter = Emitter(io.StringIO(), compact=compact)
+    emitter.write(bundle)
+    expected = Emitter('stream', compact=compact).dumps(
+        {'stories': {}, 'services': [], 'entrypoint': []}, 0)
+    assert emitter.stream.getvalue() == expected
+
+
+def test_emitter_write_compact(bundle):
+    emitter = Emitter(io.StringIO(), compact=True)
+    emitter.write(bundle)
+    expected = {'stories': bundle.stories, 'services': ['alpine'],
+                'entrypoint': ['one.story', 'two.story']}
+    assert emitter.stream.getvalue() == json.dumps(expected,
+                                                   separators=(',', ':'))
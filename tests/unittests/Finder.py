@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+from pytest import fixture, mark
+
+from storyscript.Finder import Finder
+from storyscript.Gitignore import Gitignore
+
+
+@fixture
+def finder(magic):
+    return Finder(gitignore=magic())
+
+
+@fixture
+def directory(tmpdir):
+    """
+    A directory with stories, some of them in directories that are pruned.
+    """
+    tmpdir.join('one.story').write('')
+    tmpdir.join('two.txt').write('')
+    tmpdir.mkdir('a').join('two.story').write('')
+    tmpdir.join('a').mkdir('b').join('three.story').write('')
+    tmpdir.mkdir('c').join('four.story').write('')
+    tmpdir.mkdir('.hidden').join('five.story').write('')
+    tmpdir.mkdir('node_modules').join('six.story').write('')
+    return tmpdir
+
+
+def test_finder_init():
+    finder = Finder()
+    assert finder.prune is True
+    assert finder.gitignore is None
+    assert finder.mtimes == {}
+
+
+@mark.parametrize('name, pruned', [
+    ('.git', True),
+    ('node_modules', True),
+    ('__pycache__', True),
+    ('stories', False)
+])
+def test_finder_pruned(name, pruned):
+    assert Finder.pruned(name) is pruned
+
+
+def test_finder_child(magic):
+    entry = magic()
+    assert Finder.child('path', entry) == entry.path
+    assert Finder.child(os.curdir, entry) == entry.name
+
+
+@mark.parametrize('location, result', [
+    (None, None),
+    ('', 'name'),
+    ('dir', 'dir/name')
+])
+def test_finder_location(location, result):
+    assert Finder.location(location, 'name') == result
+
+
+def test_finder_ignored(finder):
+    result = finder.ignored('location', directory=True)
+    finder.gitignore.check.assert_called_with('location', directory=True)
+    assert result == finder.gitignore.check()
+
+
+def test_finder_ignored_outside(finder):
+    assert finder.ignored(None) is False
+    assert finder.gitignore.check.call_count == 0
+
+
+def test_finder_skipped(patch, finder):
+    patch.object(Finder, 'pruned', return_value=False)
+    patch.object(Finder, 'ignored')
+    result = finder.skipped('name', 'location')
+    Finder.pruned.assert_called_with('name')
+    Finder.ignored.assert_called_with('location', True)
+    assert result == Finder.ignored()
+
+
+def test_finder_skipped_pruned(patch, finder):
+    patch.object(Finder, 'ignored')
+    assert finder.skipped('.hidden', 'location') is True
+    assert Finder.ignored.call_count == 0
+
+
+def test_finder_skipped_not_pruning(patch):
+    patch.object(Finder, 'pruned')
+    assert Finder(prune=False).skipped('.hidden', None) is False
+    assert Finder.pruned.call_count == 0
+
+
+def test_finder_scan(directory):
+    finder = Finder()
+    stories, subdirs = finder.scan(str(directory), None)
+    assert stories == [str(directory.join('one.story'))]
+    assert sorted(subdirs) == [(str(directory.join('a')), None),
+                               (str(directory.join('c')), None)]
+    mtime = os.stat(str(directory)).st_mtime_ns
+    assert finder.mtimes == {str(directory): mtime}
+
+
+def test_finder_scan_gitignore(patch, directory):
+    """
+    Ensures that directories and stories ignored by git are left out
+    """
+    gitignore = Gitignore(root=str(directory))
+    patch.object(Gitignore, 'check', side_effect=lambda location,
+                 directory: location in ['one.story', 'a'])
+    stories, subdirs = Finder(gitignore=gitignore).scan(str(directory), '')
+    assert stories == []
+    assert subdirs == [(str(directory.join('c')), 'c')]
+    assert gitignore.groups[''] is None
+
+
+def test_finder_scan_curdir(directory):
+    with directory.as_cwd():
+        stories, subdirs = Finder().scan(os.curdir, None)
+    assert stories == ['one.story']
+    assert sorted(subdirs) == [('a', None), ('c', None)]
+
+
+def test_finder_scan_error(tmpdir):
+    finder = Finder()
+    path = str(tmpdir.join('missing'))
+    assert finder.scan(path, None) == ([], [])
+    assert finder.mtimes == {}
+
+
+def test_finder_walk(patch, finder):
+    """
+    Ensures that stories are found in the same order as os.walk would
+    """
+    scans = {
+        'root': (['root/one.story'], [('root/a', 'a'), ('root/b', 'b')]),
+        'root/a': (['root/a/two.story'], [('root/a/c', 'a/c')]),
+        'root/a/c': (['root/a/c/three.story'], []),
+        'root/b': (['root/b/four.story'], [])
+    }
+    patch.object(Finder, 'scan',
+                 side_effect=lambda path, location: scans[path])
+    result = finder.walk('root', '')
+    assert result == ['root/one.story', 'root/a/two.story',
+                      'root/a/c/three.story', 'root/b/four.story']
+
+
+def test_finder_find(patch, finder):
+    patch.object(os.path, 'relpath')
+    patch.object(Finder, 'walk')
+    result = finder.find('directory')
+    os.path.relpath.assert_called_with('directory')
+    finder.gitignore.relative.assert_called_with('directory')
+    Finder.walk.assert_called_with(os.path.relpath(),
+                                   finder.gitignore.relative())
+    assert result == Finder.walk()
+
+
+def test_finder_find_no_gitignore(patch):
+    patch.object(Finder, 'walk')
+    Finder(prune=False).find('directory')
+    Finder.walk.assert_called_with('directory', None)
+
+
+def test_finder_find_jobs(patch, finder):
+    subdirs = [('root/a', 'a'), ('root/b', 'b')]
+    patch.object(Finder, 'scan', return_value=(['root/one.story'], subdirs))
+    patch.object(Finder, 'walk',
+                 side_effect=lambda path, location: [path + '/two.story'])
+    result = finder.find('root', jobs=2)
+    assert result == ['root/one.story', 'root/a/two.story',
+                      'root/b/two.story']
+
+
+def test_finder_mtime(tmpdir):
+    mtime = os.stat(str(tmpdir)).st_mtime_ns
+    assert Finder.mtime(str(tmpdir)) == mtime
+    assert Finder.mtime(str(tmpdir.join('missing'))) is None
+
+
+def test_finder_stamps(patch, finder):
+    patch.object(Finder, 'mtime')
+    finder.mtimes = {'root': 1}
+    finder.gitignore.paths = ['.gitignore']
+    result = finder.stamps()
+    Finder.mtime.assert_called_with('.gitignore')
+    assert result == {'root': 1, '.gitignore': Finder.mtime()}
+
+
+def test_finder_stamps_no_gitignore():
+    finder = Finder()
+    finder.mtimes = {'root': 1}
+    assert finder.stamps() == {'root': 1}
+
+
+def test_finder_fresh(patch):
+    patch.object(Finder, 'mtime', return_value=1)
+    assert Finder.fresh({'root': 1, '.gitignore': 1}) is True
+    assert Finder.fresh({'root': 1, '.gitignore': None}) is False
+
+
+@mark.parametrize('mtime, racy', [
+    (None, False),
+    (8 * 10 ** 9, False),
+    (int(9.5 * 10 ** 9), True)
+])
+def test_finder_racy(mtime, racy):
+    assert Finder.racy({'root': mtime}, 10) is racy
+
+
+def test_finder_stories(patch, directory):
+    """
+    Ensures that stories are found, and their listing cached
+    """
+    patch.dict(Finder.cache, clear=True)
+    patch.object(Finder, 'racy', return_value=False)
+    result = Finder.stories(str(directory))
+    expected = [os.path.relpath(str(directory.join(path))) for path in
+                ['one.story', 'a/two.story', 'a/b/three.story',
+                 'c/four.story']]
+    assert sorted(result) == sorted(expected)
+    key = (str(directory), os.getcwd(), True)
+    assert Finder.cache[key][1] == result
+
+
+def test_finder_stories_ignored_directory(patch, directory):
+    """
+    Ensures no story is found in a directory ignored by git
+    """
+    patch.dict(Finder.cache, clear=True)
+    directory.mkdir('.git')
+    directory.join('.gitignore').write('a/\n')
+    assert Finder.stories(str(directory.join('a'))) == []
+
+
+def test_finder_stories_not_pruning(patch, directory):
+    patch.dict(Finder.cache, clear=True)
+    patch.object(Gitignore, 'from_path')
+    result = Finder.stories(str(directory), prune=False)
+    assert Gitignore.from_path.call_count == 0
+    assert len(result) == 6
+
+
+def test_finder_stories_cached(patch):
+    patch.dict(Finder.cache, clear=True)
+    patch.object(Finder, 'fresh', return_value=True)
+    patch.object(Finder, 'find')
+    key = (os.path.abspath('directory'), os.getcwd(), True)
+    Finder.cache[key] = ('stamps', ['one.story'])
+    assert Finder.stories('directory') == ['one.story']
+    Finder.fresh.assert_called_with('stamps')
+    assert Finder.find.call_count == 0
+
+
+def test_finder_stories_stale(patch, directory):
+    """
+    Ensures that stories are found again once a directory is changed
+    """
+    patch.dict(Finder.cache, clear=True)
+    past = time.time() - 10
+    directory.join('a').setmtime(past)
+    directory.setmtime(past)
+    patch.object(Finder, 'racy', return_value=False)
+    Finder.stories(str(directory))
+    directory.join('a', 'seven.story').write('')
+    result = Finder.stories(str(directory))
+    assert os.path.relpath(str(directory.join('a', 'seven.story'))) in result
+
+
+def test_finder_stories_racy(patch):
+    patch.dict(Finder.cache, clear=True)
+    patch.many(Finder, ['find', 'stamps'])
+    patch.object(Finder, 'racy', return_value=True)
+    assert Finder.stories('directory') == Finder.find()
+    assert Finder.cache == {}
@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import shutil
+import subprocess
+
+from pytest import fixture, mark
+
+from storyscript.Gitignore import Gitignore
+
+
+@fixture
+def gitignore(patch):
+    patch.many(Gitignore, ['read', 'compile', 'global_excludes'])
+    return Gitignore(root='root')
+
+
+@fixture
+def repository(tmpdir):
+    """
+    A repository with nested ignore files.
+    """
+    tmpdir.mkdir('.git').mkdir('info').join('exclude').write('excluded\n')
+    tmpdir.join('.gitignore').write('build/\n*.log\n!keep.log\n')
+    tmpdir.mkdir('src').join('.gitignore').write('!debug.log\n/local\n')
+    return tmpdir
+
+
+def track(repository, *paths, version=2, init=()):
+    """
+    Tracks files in a repository, writing its index with git.
+    """
+    for path in paths:
+        repository.join(path).write('', ensure=True)
+    git = ['git', '-C', str(repository)]
+    subprocess.run(git + ['init', '-q'] + list(init), check=True)
+    command = git + ['update-index', '--add', '--index-version', str(version)]
+    subprocess.run(command + list(paths), check=True)
+
+
+git = mark.skipif(shutil.which('git') is None, reason='git is needed')
+
+
+def test_gitignore_init():
+    gitignore = Gitignore()
+    assert gitignore.root is None
+    assert gitignore.excludes is None
+    assert gitignore.groups == {}
+    assert gitignore.directories == {}
+    assert gitignore.index is None
+    assert gitignore.paths == []
+
+
+def test_gitignore_init_root(gitignore):
+    exclude = os.path.join('root', '.git', 'info', 'exclude')
+    Gitignore.read.assert_called_with(exclude)
+    Gitignore.compile.assert_called_with(Gitignore.read() + Gitignore.read())
+    assert gitignore.root == 'root'
+    assert gitignore.paths == [Gitignore.global_excludes(), exclude]
+    assert gitignore.excludes == Gitignore.compile()
+
+
+def test_gitignore_global_excludes(patch):
+    patch.dict(os.environ, {'XDG_CONFIG_HOME': 'config'})
+    assert Gitignore.global_excludes() == os.path.join('config', 'git',
+                                                       'ignore')
+
+
+def test_gitignore_global_excludes_home(patch):
+    patch.dict(os.environ, clear=True)
+    patch.object(os.path, 'expanduser', return_value='home')
+    result = Gitignore.global_excludes()
+    assert result == os.path.join('home', '.config', 'git', 'ignore')
+
+
+def test_gitignore_find_root(repository):
+    path = repository.join('src')
+    assert Gitignore.find_root(str(path)) == str(repository)
+
+
+def test_gitignore_find_root_none(patch):
+    patch.object(os.path, 'exists', return_value=False)
+    assert Gitignore.find_root('path') is None
+
+
+def test_gitignore_from_path(patch):
+    patch.init(Gitignore)
+    patch.object(Gitignore, 'find_root')
+    result = Gitignore.from_path('path')
+    Gitignore.find_root.assert_called_with('path')
+    Gitignore.__init__.assert_called_with(root=Gitignore.find_root())
+    assert isinstance(result, Gitignore)
+
+
+@mark.parametrize('pattern, path, matches', [
+    ('*.log', 'debug.log', True),
+    ('*.log', 'logs/debug.log', False),
+    ('debug?.log', 'debug1.log', True),
+    ('debug[0-9].log', 'debug1.log', True),
+    ('debug[!0-9].log', 'debug1.log', False),
+    ('debug[!0-9].log', 'debug/log', False),
+    ('debug[.log', 'debug[.log', True),
+    ('**/logs', 'a/b/logs', True),
+    ('**/logs', 'logs', True),
+    ('logs/**', 'logs/a/debug.log', True),
+    ('logs/**', 'logs', False),
+    ('a/**/b', 'a/b', True),
+    ('a/**/b', 'a/x/y/b', True),
+    ('a**b', 'a/b', False),
+    ('\\#file', '#file', True),
+    ('a+b(c)', 'a+b(c)', True)
+])
+def test_gitignore_translate(pattern, path, matches):
+    regex = Gitignore.translate(pattern)
+    assert bool(re.fullmatch(regex, path)) is matches
+
+
+@mark.parametrize('line', ['', '   ', '# comment', '!', '/'])
+def test_gitignore_rule_none(line):
+    assert Gitignore.rule(line) is None
+
+
+def test_gitignore_rule():
+    assert Gitignore.rule('file') == ('(?:.*/)?file', False, False)
+
+
+def test_gitignore_rule_anchored():
+    assert Gitignore.rule('/dir/file') == ('dir/file', False, False)
+
+
+def test_gitignore_rule_negated():
+    assert Gitignore.rule('!file') == ('(?:.*/)?file', True, False)
+
+
+def test_gitignore_rule_directories():
+    assert Gitignore.rule('dir/') == ('(?:.*/)?dir', False, True)
+
+
+def test_gitignore_rule_spaces():
+    """
+    Ensures that trailing spaces are ignored, unless they are escaped
+    """
+    assert Gitignore.rule('file  ') == Gitignore.rule('file')
+    assert Gitignore.rule('file\\ ')[0] == '(?:.*/)?file\\ '
+
+
+def test_gitignore_read(tmpdir):
+    path = tmpdir.join('.gitignore')
+    path.write('# comment\nfile\n\n!dir/\n')
+    result = Gitignore.read(str(path))
+    assert result == [Gitignore.rule('file'), Gitignore.rule('!dir/')]
+
+
+def test_gitignore_read_missing(tmpdir):
+    assert Gitignore.read(str(tmpdir.join('.gitignore'))) == []
+
+
+def test_gitignore_compile():
+    rules = [('a', False, False), ('b', True, True)]
+    files, directories, negations = Gitignore.compile(rules)
+    assert files.pattern == '(?P<r0>a)'
+    assert directories.pattern == '(?P<r1>b)|(?P<r0>a)'
+    assert negations == [False, True]
+
+
+def test_gitignore_compile_directories():
+    result = Gitignore.compile([('a', False, True)])
+    assert result[0] is None
+
+
+def test_gitignore_compile_empty():
+    assert Gitignore.compile([]) is None
+
+
+@mark.parametrize('path, directory, result', [
+    ('file', False, True),
+    ('kept', False, False),
+    ('dir', False, None),
+    ('dir', True, True),
+    ('other', True, None)
+])
+def test_gitignore_match(path, directory, result):
+    rules = [Gitignore.rule(line) for line in ['k*', 'file', '!kept', 'dir/']]
+    group = Gitignore.compile(rules)
+    assert Gitignore.match(group, path, directory) is result
+
+
+@mark.parametrize('data, value', [
+    (b'\x05', 5),
+    (b'\x80\x00', 128),
+    (b'\x81\x01', 257)
+])
+def test_gitignore_varint(data, value):
+    assert Gitignore.varint(data + b'\xff', 0) == (value, len(data))
+
+
+def test_gitignore_hash_size(tmpdir):
+    tmpdir.mkdir('.git').join('config').write('[core]\n\tbare = false\n')
+    assert Gitignore.hash_size(str(tmpdir)) == 20
+
+
+@mark.parametrize('object_format, size', [
+    ('sha1', 20), ('sha256', 32), ('SHA256', 32), ('other', None)
+])
+def test_gitignore_hash_size_format(tmpdir, object_format, size):
+    config = '[extensions]\n\tobjectFormat = {}\n'.format(object_format)
+    tmpdir.mkdir('.git').join('config').write(config)
+    assert Gitignore.hash_size(str(tmpdir)) == size
+
+
+def test_gitignore_hash_size_missing(tmpdir):
+    assert Gitignore.hash_size(str(tmpdir)) is None
+
+
+@git
+@mark.parametrize('version', [2, 4])
+def test_gitignore_read_index(repository, version):
+    paths = ['a.story', 'build/b/c.story', 'build/b/d.story']
+    track(repository, *paths, version=version)
+    index = str(repository.join('.git', 'index'))
+    assert Gitignore.read_index(index) == [path.encode() for path in paths]
+
+
+@git
+def test_gitignore_read_index_sha256(repository):
+    paths = ['a.story', 'build/b.story']
+    track(repository, *paths, init=['--object-format=sha256'])
+    index = str(repository.join('.git', 'index'))
+    names = Gitignore.read_index(index, hash_size=32)
+    assert names == [path.encode() for path in paths]
+    assert Gitignore.read_index(index) is None
+
+
+@git
+def test_gitignore_read_index_split(repository):
+    """
+    Ensures that split indexes, whose entries are in a shared index, are
+    not read
+    """
+    track(repository, 'a.story')
+    git = ['git', '-C', str(repository)]
+    subprocess.run(git + ['update-index', '--split-index'], check=True)
+    assert Gitignore.read_index(str(repository.join('.git', 'index'))) is None
+
+
+@mark.parametrize('data', [None, b'', b'DIRC', b'XXXX\0\0\0\2\0\0\0\0',
+                           b'DIRC\0\0\0\2\0\0\0\1',
+                           b'DIRC\0\0\0\2\0\0\0\0'])
+def test_gitignore_read_index_invalid(tmpdir, data):
+    path = tmpdir.join('index')
+    if data is not None:
+        path.write_binary(data)
+    assert Gitignore.read_index(str(path)) is None
+
+
+def test_gitignore_ls_files(patch):
+    patch.object(subprocess, 'run')
+    subprocess.run().stdout = b'a\0b/c\0'
+    assert Gitignore.ls_files('root') == [b'a', b'b/c']
+    command = ['git', 'ls-files', '--cached', '-z']
+    subprocess.run.assert_called_with(command, cwd='root', check=True,
+                                      stdout=subprocess.PIPE,
+                                      stderr=subprocess.DEVNULL)
+
+
+@mark.parametrize('error', [
+    OSError, subprocess.CalledProcessError(128, 'git')
+])
+def test_gitignore_ls_files_error(patch, error):
+    patch.object(subprocess, 'run', side_effect=error)
+    assert Gitignore.ls_files('root') == []
+
+
+@git
+def test_gitignore_ls_files_split(repository):
+    track(repository, 'a.story', 'build/b.story')
+    git = ['git', '-C', str(repository)]
+    subprocess.run(git + ['update-index', '--split-index'], check=True)
+    names = Gitignore.ls_files(str(repository))
+    assert names == [b'a.story', b'build/b.story']
+
+
+def test_gitignore_tree():
+    files, directories = Gitignore.tree([b'a', b'b/c/d', b'b/e'])
+    assert files == {'a', 'b/c/d', 'b/e'}
+    assert directories == {'b', 'b/c'}
+
+
+def test_gitignore_tracked(patch, gitignore):
+    patch.object(Gitignore, 'hash_size', return_value=32)
+    patch.object(Gitignore, 'read_index', return_value=[b'a/b'])
+    patch.object(Gitignore, 'ls_files')
+    assert gitignore.tracked('a/b') is True
+    assert gitignore.tracked('a', directory=True) is True
+    assert gitignore.tracked('a') is False
+    path = os.path.join('root', '.git', 'index')
+    Gitignore.hash_size.assert_called_once_with('root')
+    Gitignore.read_index.assert_called_once_with(path, hash_size=32)
+    assert Gitignore.ls_files.call_count == 0
+    assert gitignore.paths[-1] == path
+
+
+def test_gitignore_tracked_unreadable(patch, gitignore):
+    """
+    Ensures that git is asked for the tracked files when the index can't be
+    read
+    """
+    patch.object(Gitignore, 'hash_size', return_value=20)
+    patch.object(Gitignore, 'read_index', return_value=None)
+    patch.object(Gitignore, 'ls_files', return_value=[b'a/b'])
+    assert gitignore.tracked('a/b') is True
+    Gitignore.ls_files.assert_called_once_with('root')
+
+
+def test_gitignore_tracked_unknown_format(patch, gitignore):
+    patch.object(Gitignore, 'hash_size', return_value=None)
+    patch.object(Gitignore, 'read_index')
+    patch.object(Gitignore, 'ls_files', return_value=[b'a/b'])
+    assert gitignore.tracked('a', directory=True) is True
+    assert Gitignore.read_index.call_count == 0
+    Gitignore.ls_files.assert_called_once_with('root')
+
+
+def test_gitignore_group(gitignore):
+    result = gitignore.group('dir')
+    path = os.path.join('root', 'dir', '.gitignore')
+    Gitignore.read.assert_called_with(path)
+    assert gitignore.paths[-1] == path
+    assert gitignore.groups['dir'] == Gitignore.compile()
+    assert result == Gitignore.compile()
+
+
+def test_gitignore_group_cached(gitignore):
+    gitignore.groups['dir'] = 'group'
+    assert gitignore.group('dir') == 'group'
+    assert Gitignore.read.call_count == 2
+
+
+def test_gitignore_missing(gitignore):
+    gitignore.missing('dir')
+    assert gitignore.group('dir') is None
+    assert Gitignore.read.call_count == 2
+
+
+def test_gitignore_missing_read(gitignore):
+    gitignore.groups['dir'] = 'group'
+    gitignore.missing('dir')
+    assert gitignore.groups['dir'] == 'group'
+
+
+def test_gitignore_relative_no_repository():
+    assert Gitignore().relative('path') is None
+
+
+@mark.parametrize('path, relative', [
+    ('', ''),
+    ('a', 'a'),
+    (os.path.join('a', 'b'), 'a/b'),
+    ('..', None),
+    (os.path.join('..', 'a'), None)
+])
+def test_gitignore_relative(repository, path, relative):
+    gitignore = Gitignore(root=str(repository))
+    assert gitignore.relative(str(repository.join(path))) == relative
+
+
+def test_gitignore_ignored_no_repository():
+    assert Gitignore().ignored('path') is False
+
+
+def test_gitignore_ignored_checks(patch, gitignore):
+    patch.object(Gitignore, 'relative', return_value='a/b')
+    patch.object(Gitignore, 'check')
+    result = gitignore.ignored('path', directory=True)
+    Gitignore.relative.assert_called_with('path')
+    Gitignore.check.assert_called_with('a/b', directory=True)
+    assert result == Gitignore.check()
+
+
+@mark.parametrize('path, directory, ignored', [
+    ('.', True, False),
+    ('..', True, False),
+    ('../file.log', False, False),
+    ('.git', True, True),
+    ('excluded', False, True),
+    ('build', True, True),
+    ('build', False, False),
+    ('debug.log', False, True),
+    ('keep.log', False, False),
+    ('src/debug.log', False, False),
+    ('src/other.log', False, True),
+    ('src/local', True, True),
+    ('local', True, False),
+    ('src/lib/debug.log', False, False),
+    ('build/a.story', False, True),
+    ('build/keep.log', False, True),
+    ('build/sub', True, True)
+])
+def test_gitignore_ignored(repository, path, directory, ignored):
+    """
+    Ensures that deeper ignore files and later rules take precedence
+    """
+    gitignore = Gitignore(root=str(repository))
+    path = str(repository.join(path))
+    assert gitignore.ignored(path, directory=directory) is ignored
+
+
+def test_gitignore_excluded_cached(patch, gitignore):
+    patch.object(Gitignore, 'matched', return_value=True)
+    assert gitignore.excluded('a', directory=True) is True
+    assert gitignore.excluded('a/b', directory=True) is True
+    assert gitignore.excluded('a/b/c') is True
+    Gitignore.matched.assert_called_once_with('a', True)
+    assert gitignore.directories == {'a': True, 'a/b': True}
+
+
+def test_gitignore_check_tracked(patch, gitignore):
+    patch.object(Gitignore, 'excluded', return_value=True)
+    patch.object(Gitignore, 'tracked', return_value=True)
+    assert gitignore.check('a', directory=True) is False
+    Gitignore.tracked.assert_called_with('a', directory=True)
+
+
+def test_gitignore_check_not_excluded(patch, gitignore):
+    patch.object(Gitignore, 'excluded', return_value=False)
+    patch.object(Gitignore, 'tracked')
+    assert gitignore.check('a') is False
+    assert Gitignore.tracked.call_count == 0
+
+
+@git
+def test_gitignore_ignored_tracked(repository):
+    """
+    Ensures that tracked files are not ignored, even in ignored directories
+    """
+    track(repository, 'debug.log', 'build/a.story')
+    gitignore = Gitignore(root=str(repository))
+    assert gitignore.ignored(str(repository.join('debug.log'))) is False
+    assert gitignore.ignored(str(repository.join('build')), True) is False
+    assert gitignore.ignored(str(repository.join('build', 'a.story'))) is False
+    assert gitignore.ignored(str(repository.join('build', 'b.story'))) is True
+    assert gitignore.ignored(str(repository.join('other.log'))) is True
+
+
+@git
+@mark.parametrize('init, split', [
+    (['--object-format=sha256'], False),
+    ([], True)
+])
+def test_gitignore_ignored_tracked_index(repository, init, split):
+    """
+    Ensures that tracked files are found in the indexes of SHA-256 and split
+    index repositories
+    """
+    track(repository, 'debug.log', 'build/a.story', init=init)
+    if split:
+        git = ['git', '-C', str(repository)]
+        subprocess.run(git + ['update-index', '--split-index'], check=True)
+    gitignore = Gitignore(root=str(repository))
+    assert gitignore.ignored(str(repository.join('debug.log'))) is False
+    assert gitignore.ignored(str(repository.join('build')), True) is False
+    assert gitignore.ignored(str(repository.join('build', 'b.story'))) is True
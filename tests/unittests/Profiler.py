@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import cProfile
+import time
+import tracemalloc
+
+from pytest import fixture
+
+from storyscript.Profiler import Profiler
+
+
+@fixture
+def profiler():
+    return Profiler()
+
+
+def test_profiler_init(profiler):
+    assert profiler.memory is False
+    assert profiler.pstats is None
+    assert profiler.profile is None
+    assert profiler.stories == {}
+
+
+def test_profiler_start(patch, profiler):
+    patch.object(tracemalloc, 'start')
+    patch.object(cProfile, 'Profile')
+    profiler.start()
+    assert tracemalloc.start.call_count == 0
+    assert cProfile.Profile.call_count == 0
+
+
+def test_profiler_start_memory(patch):
+    patch.object(tracemalloc, 'start')
+    Profiler(memory=True).start()
+    assert tracemalloc.start.call_count == 1
+
+
+def test_profiler_start_pstats(patch):
+    patch.object(cProfile, 'Profile')
+    profiler = Profiler(pstats='stats')
+    profiler.start()
+    assert cProfile.Profile().enable.call_count == 1
+    assert profiler.profile == cProfile.Profile()
+
+
+def test_profiler_stop(patch, magic):
+    patch.object(tracemalloc, 'stop')
+    profiler = Profiler(memory=True, pstats='stats')
+    profile = magic()
+    profiler.profile = profile
+    profiler.stop()
+    assert profile.disable.call_count == 1
+    profile.dump_stats.assert_called_with('stats')
+    assert profiler.profile is None
+    assert tracemalloc.stop.call_count == 1
+
+
+def test_profiler_context(patch, profiler):
+    patch.many(Profiler, ['start', 'stop'])
+    with profiler as context:
+        assert Profiler.start.call_count == 1
+        assert Profiler.stop.call_count == 0
+    assert Profiler.stop.call_count == 1
+    assert context == profiler
+
+
+def test_profiler_phase(patch, profiler):
+    patch.object(time, 'perf_counter', side_effect=[1, 3, 4, 5])
+    with profiler.phase('one.story', 'parse'):
+        pass
+    with profiler.phase('one.story', 'parse'):
+        pass
+    expected = {'one.story': {'parse': {'time': 3, 'memory': 0}}}
+    assert profiler.stories == expected
+
+
+def test_profiler_phase_memory(patch):
+    patch.object(tracemalloc, 'get_traced_memory',
+                 side_effect=[(10, 0), (25, 0)])
+    profiler = Profiler(memory=True)
+    with profiler.phase('one.story', 'parse'):
+        pass
+    assert profiler.stories['one.story']['parse']['memory'] == 15
+
+
+def test_profiler_totals(profiler):
+    profiler.stories = {
+        'one.story': {'parse': {'time': 1, 'memory': 2}},
+        'two.story': {'parse': {'time': 3, 'memory': 4},
+                      'compile': {'time': 5, 'memory': 6}}
+    }
+    expected = {'parse': {'time': 4, 'memory': 6},
+                'compile': {'time': 5, 'memory': 6}}
+    assert profiler.totals() == expected
+
+
+def test_profiler_results(patch, profiler):
+    patch.object(Profiler, 'totals')
+    expected = {'stories': profiler.stories, 'totals': Profiler.totals()}
+    assert profiler.results() == expected
+
+
+def test_profiler_cell():
+    phase = {'time': 0.0015, 'memory': 2048}
+    assert Profiler.cell(phase, 'time') == '1.50'
+    assert Profiler.cell(phase, 'memory') == '2.0'
+    assert Profiler.cell(None, 'time') == '-'
+
+
+def test_profiler_rows():
+    stories = {'b.story': {'parse': {'time': 0.001, 'memory': 0}},
+               'a.story': {}}
+    totals = {'parse': {'time': 0.001, 'memory': 0}}
+    result = Profiler.rows(stories, totals, ['parse'], 'time')
+    assert result == [['a.story', '-'], ['b.story', '1.00'],
+                      ['total', '1.00']]
+
+
+def test_profiler_table(profiler):
+    profiler.stories = {'one.story': {'parse': {'time': 0.01, 'memory': 0},
+                                      'lex': {'time': 0.002, 'memory': 0}}}
+    expected = ('story (ms)   lex  parse\n'
+                'one.story   2.00  10.00\n'
+                'total       2.00  10.00')
+    assert profiler.table() == expected
+
+
+def test_profiler_table_memory():
+    profiler = Profiler(memory=True)
+    profiler.stories = {'one.story': {'parse': {'time': 0, 'memory': 1024}}}
+    tables = profiler.table().split('\n\n')
+    assert len(tables) == 2
+    assert tables[1].startswith('story (KiB)')
+    assert tables[1].splitlines()[1].split() == ['one.story', '1.0']
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import importlib
+import json
+
+from pytest import raises
+
+from storyscript import Serializer as SerializerModule
+from storyscript.Serializer import Serializer
+from storyscript.exceptions import StoryError
+
+
+def test_serializer_json():
+    assert Serializer.json({'a': [1]}) == json.dumps({'a': [1]}, indent=2)
+    assert Serializer.json({'a': [1]}, compact=True) == '{"a":[1]}'
+
+
+def test_serializer_json_non_ascii(patch):
+    """
+    Ensures non-ASCII characters are escaped, even when orjson is installed
+    """
+    patch.object(SerializerModule, 'orjson')
+    data = {'message': 'caf\u00e9 \u2615', 'float': 1e16}
+    assert Serializer.json(data) == json.dumps(data, indent=2)
+    assert '\\u00e9' in Serializer.json(data, compact=True)
+    assert SerializerModule.orjson.dumps.call_count == 0
+
+
+def test_serializer_json_fast(patch):
+    patch.object(SerializerModule, 'orjson')
+    result = Serializer.json('data', fast=True)
+    option = SerializerModule.orjson.OPT_INDENT_2
+    SerializerModule.orjson.dumps.assert_called_with('data', option=option)
+    SerializerModule.orjson.dumps().decode.assert_called_with('utf-8')
+    assert result == SerializerModule.orjson.dumps().decode()
+
+
+def test_serializer_json_fast_compact(patch):
+    patch.object(SerializerModule, 'orjson')
+    Serializer.json('data', compact=True, fast=True)
+    SerializerModule.orjson.dumps.assert_called_with('data', option=0)
+
+
+def test_serializer_json_fast_missing(patch):
+    """
+    Ensures the standard library is used when orjson is not installed
+    """
+    patch.object(SerializerModule, 'orjson', None)
+    result = Serializer.json({'a': [1]}, fast=True)
+    assert result == json.dumps({'a': [1]}, indent=2)
+
+
+def test_serializer_json_fast_wide_integer(patch):
+    """
+    Ensures data orjson can't dump is dumped with the standard library
+    """
+    patch.object(SerializerModule, 'orjson')
+    SerializerModule.orjson.dumps.side_effect = TypeError()
+    result = Serializer.json(2 ** 64, compact=True, fast=True)
+    assert result == str(2 ** 64)
+
+
+def test_serializer_json_fast_identical():
+    data = {'stories': {'a.story': {'tree': {'1': {'args': []}}}},
+            'services': [], 'entrypoint': ['a.story']}
+    assert Serializer.json(data, fast=True) == json.dumps(data, indent=2)
+    expected = json.dumps(data, separators=(',', ':'))
+    assert Serializer.json(data, compact=True, fast=True) == expected
+
+
+def test_serializer_package(patch):
+    patch.object(importlib, 'import_module')
+    result = Serializer.package('msgpack')
+    importlib.import_module.assert_called_with('msgpack')
+    assert result == importlib.import_module()
+
+
+def test_serializer_package_missing(patch):
+    patch.object(importlib, 'import_module', side_effect=ImportError())
+    with raises(StoryError) as e:
+        Serializer.package('msgpack')
+    message = 'E0001: Missing package msgpack: pip install msgpack'
+    assert e.value.short_message() == message
+
+
+def test_serializer_msgpack(patch):
+    patch.object(Serializer, 'package')
+    result = Serializer.msgpack('data')
+    Serializer.package.assert_called_with('msgpack')
+    Serializer.package().packb.assert_called_with('data', use_bin_type=True)
+    assert result == Serializer.package().packb()
+
+
+def test_serializer_cbor(patch):
+    patch.object(Serializer, 'package')
+    result = Serializer.cbor('data')
+    Serializer.package.assert_called_with('cbor2')
+    Serializer.package().dumps.assert_called_with('data')
+    assert result == Serializer.package().dumps()
+
+
+def test_serializer_encoder(patch):
+    patch.object(Serializer, 'package')
+    assert Serializer.encoder('cbor') == Serializer.cbor
+    Serializer.package.assert_called_with('cbor2')
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import socket
+import threading
+
+from pytest import fixture, raises
+
+from storyscript.Api import Api
+from storyscript.Client import Client
+from storyscript.Server import Server
+from storyscript.Story import Story
+from storyscript.exceptions import StoryError
+from storyscript.parser import Parser
+
+
+@fixture
+def server():
+    return Server(path='server.sock')
+
+
+def test_server_init(patch):
+    patch.object(Client, 'socket_path')
+    server = Server()
+    assert server.path == Client.socket_path()
+    assert isinstance(server.lock, type(threading.Lock()))
+
+
+def test_server_init_path(server):
+    assert server.path == 'server.sock'
+
+
+def test_server_loads(patch):
+    patch.object(Api, 'loads')
+    result = Server.loads('string')
+    Api.loads.assert_called_with('string')
+    assert result == Api.loads()
+
+
+def test_server_load_map(patch):
+    patch.object(Api, 'load_map')
+    result = Server.load_map('files')
+    Api.load_map.assert_called_with('files')
+    assert result == Api.load_map()
+
+
+def test_server_parse(patch):
+    patch.init(Story)
+    patch.object(Story, 'parse')
+    Story.tree = None
+    patch.object(Story, 'tree')
+    result = Server.parse('source')
+    Story.__init__.assert_called_with('source')
+    assert Story.parse.call_count == 1
+    assert result == Story.tree.pretty()
+
+
+def test_server_lex(patch, magic):
+    patch.init(Story)
+    token = magic(type='NAME', value='x')
+    patch.object(Story, 'lex', return_value=[token])
+    assert Server.lex('source') == [['NAME', 'x']]
+    Story.__init__.assert_called_with('source')
+
+
+def test_server_call(patch):
+    patch.object(Server, 'loads')
+    request = {'method': 'loads', 'params': {'string': 'x = 0'}}
+    result = Server.call(request)
+    Server.loads.assert_called_with(string='x = 0')
+    assert result == {'result': Server.loads()}
+
+
+def test_server_call_unknown():
+    result = Server.call({'method': 'respond'})
+    assert result == {'error': 'Unknown method: respond'}
+
+
+def test_server_call_invalid_params():
+    result = Server.call({'method': 'loads', 'params': ['x = 0']})
+    assert result == {'error': 'Invalid params'}
+
+
+def test_server_call_story_error(patch, magic):
+    error = StoryError(None, None)
+    patch.object(StoryError, 'message', return_value='message')
+    patch.object(Server, 'loads', side_effect=error)
+    result = Server.call({'method': 'loads', 'params': {}})
+    assert error.with_color is False
+    assert result == {'error': 'message'}
+
+
+def test_server_call_internal_error(patch):
+    patch.object(Server, 'loads', side_effect=ValueError('ICE'))
+    patch.object(StoryError, 'internal_error')
+    result = Server.call({'method': 'loads', 'params': {}})
+    assert StoryError.internal_error.call_count == 1
+    assert result == {'error': StoryError.internal_error().message()}
+
+
+def test_server_respond(patch, server):
+    patch.object(Server, 'call')
+    result = server.respond(b'{"method": "loads"}')
+    Server.call.assert_called_with({'method': 'loads'})
+    assert result == Server.call()
+
+
+@fixture(params=[b'{', b'[]'])
+def invalid_request(request):
+    return request.param
+
+
+def test_server_respond_invalid(server, invalid_request):
+    assert server.respond(invalid_request) == {'error': 'Invalid request'}
+
+
+def test_server_handle(patch, magic, server):
+    patch.object(Server, 'respond', return_value={'result': 0})
+    connection = magic()
+    stream = connection.makefile().__enter__()
+    stream.__iter__.return_value = [b'line']
+    server.handle(connection)
+    connection.makefile.assert_called_with('rwb')
+    Server.respond.assert_called_with(b'line')
+    response = json.dumps({'result': 0}).encode('utf-8') + b'\n'
+    stream.write.assert_called_with(response)
+    assert stream.flush.call_count == 1
+
+
+def test_server_running(patch, server):
+    patch.object(socket, 'socket')
+    assert server.running() is True
+    client = socket.socket().__enter__()
+    client.connect.assert_called_with('server.sock')
+
+
+def test_server_running_not(patch, server):
+    patch.object(socket, 'socket')
+    socket.socket().__enter__().connect.side_effect = FileNotFoundError
+    assert server.running() is False
+
+
+def test_server_bind(patch, server):
+    patch.object(Server, 'running', return_value=False)
+    patch.object(os.path, 'exists', return_value=False)
+    patch.object(os, 'makedirs')
+    patch.object(socket, 'socket')
+    result = server.bind()
+    os.makedirs.assert_called_with('', mode=0o700, exist_ok=True)
+    socket.socket.assert_called_with(socket.AF_UNIX, socket.SOCK_STREAM)
+    socket.socket().bind.assert_called_with('server.sock')
+    assert socket.socket().listen.call_count == 1
+    assert result == socket.socket()
+
+
+def test_server_bind_stale(patch, server):
+    """
+    Ensures that sockets left by stopped servers are removed
+    """
+    patch.object(Server, 'running', return_value=False)
+    patch.object(os.path, 'exists', return_value=True)
+    patch.many(os, ['makedirs', 'remove'])
+    patch.object(socket, 'socket')
+    server.bind()
+    os.remove.assert_called_with('server.sock')
+
+
+def test_server_bind_running(patch, server):
+    patch.object(Server, 'running', return_value=True)
+    patch.object(socket, 'socket')
+    with raises(StoryError):
+        server.bind()
+    assert socket.socket.call_count == 0
+
+
+def test_server_serve(patch, magic, server):
+    patch.object(Parser, 'lark')
+    patch.object(Server, 'bind')
+    patch.object(threading, 'Thread')
+    patch.object(os, 'remove')
+    connection = magic()
+    Server.bind().accept.side_effect = [(connection, ''), KeyboardInterrupt]
+    with raises(KeyboardInterrupt):
+        server.serve()
+    assert Parser.lark.call_count == 1
+    threading.Thread.assert_called_with(target=server.handle,
+                                        args=(connection,), daemon=True)
+    assert threading.Thread().start.call_count == 1
+    assert Server.bind().close.call_count == 1
+    os.remove.assert_called_with('server.sock')
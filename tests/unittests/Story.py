@@ -1,14 +1,13 @@
 # -*- coding: utf-8 -*-
 import io
 import os
-import re
 
 from lark.exceptions import UnexpectedInput, UnexpectedToken
 
 from pytest import fixture, mark, raises
 
 from storyscript.Story import Story
-from storyscript.compiler import Compiler
+from storyscript.compiler import Compiler, Preprocessor
 from storyscript.exceptions import CompilerError, StoryError, StorySyntaxError
 from storyscript.parser import Parser
 
@@ -40,39 +39,75 @@ def test_story_init_path():
     assert story.path == 'path'
 
 
-def test_story_remove_comments(patch):
-    """
-    Ensures that remove_comments can remove inline comments.
-    """
-    patch.object(re, 'sub')
-    result = Story.remove_comments('source')
-    re.sub.assert_called_with(r'#[^#\n]+', '', 'source')
-    assert result == re.sub()
+def test_story_comment():
+    assert Story.comment('x = 0  # comment\ny = 1', 7) == (16, '')
 
 
-def test_story_delete_line(patch):
-    """
-    Ensures that delete_line can delete lines.
-    """
-    patch.object(re, 'sub')
-    patch.object(re, 'match')
-    result = Story.delete_line(re.match())
-    re.sub.assert_called_with(r'.*', '', re.match().group())
-    assert result == re.sub()
+def test_story_comment_end():
+    assert Story.comment('# comment', 0) == (9, '')
 
 
-def test_story_clean_source(patch):
-    """
-    Ensures that a story is cleaned correctly
-    """
-    patch.object(re, 'sub')
-    patch.object(Story, 'remove_comments')
-    patch.object(Story, 'delete_line')
-    result = Story.clean_source('source')
-    re.sub.assert_called_with(
-        r'###[^#]+###', Story.delete_line, Story.remove_comments()
-    )
-    assert result == re.sub()
+def test_story_comment_block():
+    result = Story.comment('###\nblock\n###\nx = 0', 0)
+    assert result == (13, '\n\n')
+
+
+def test_story_comment_block_unclosed():
+    assert Story.comment('###\nblock', 0) == (9, '\n')
+
+
+def test_story_clean_source_no_comments():
+    source = 'x = "text"'
+    assert Story.clean_source(source) is source
+
+
+def test_story_clean_source():
+    source = 'x = 0  # comment\n###\nblock\n###\ny = 1'
+    assert Story.clean_source(source) == 'x = 0  \n\n\n\ny = 1'
+
+
+@mark.parametrize('source', [
+    'x = "# text"',
+    "x = '# text'",
+    'x = "### text ###"',
+    'x = "text\n# text"',
+    'x = "\'# text"',
+    'x = "# text'
+])
+def test_story_clean_source_strings(source):
+    assert Story.clean_source(source) == source
+
+
+@mark.parametrize('source, operand', [
+    ('/', True),
+    ('x = /', True),
+    ('f(a: /', True),
+    ('x =\t /', True),
+    ('if /', True),
+    ('x = a and /', True),
+    ('x = 4 /', False),
+    ('x = a/', False),
+    ('x = (a) /', False),
+    ('x = wand /', False)
+])
+def test_story_operand(source, operand):
+    assert Story.operand(source, len(source) - 1) is operand
+
+
+@mark.parametrize('source, result', [
+    ("x = /'#/  # c'", "x = /'#/  "),
+    ('x = /"/\n# comment\ny = "#"', 'x = /"/\n\ny = "#"'),
+    ("x = 4 / 2  # 'comment", 'x = 4 / 2  '),
+    ('x = /a # comment', 'x = /a '),
+    ("x = a/b  # 'comment", 'x = a/b  ')
+])
+def test_story_clean_source_regular_expressions(source, result):
+    assert Story.clean_source(source) == result
+
+
+def test_story_clean_source_strings_comment():
+    source = 'x = "#" + \'#\'  # comment'
+    assert Story.clean_source(source) == 'x = "#" + \'#\'  '
 
 
 def test_story_read(patch):
@@ -137,6 +172,63 @@ def test_story_parse(patch, story, parser):
     assert story.tree == Parser.parse()
 
 
+def test_story_parse_profiler(patch, story, parser):
+    patch.object(Story, 'profile_parse')
+    story.parse(profiler='profiler')
+    parser, profiler = Story.profile_parse.call_args[0]
+    assert isinstance(parser, Parser)
+    assert profiler == 'profiler'
+    assert story.tree == Story.profile_parse()
+
+
+def test_story_profile_parse(patch, magic, story):
+    patch.init(Parser)
+    patch.many(Parser, ['lark', 'lex', 'lark_parse', 'transform'])
+    patch.object(Parser, 'transforms_inline', return_value=False)
+    profiler = magic()
+    result = story.profile_parse(Parser(), profiler)
+    Parser.lex.assert_called_with('story')
+    Parser.lark_parse.assert_called_with('story')
+    Parser.transform.assert_called_with(Parser.lark_parse())
+    names = [call[0][0] for call in profiler.call_args_list]
+    assert names == ['lex', 'parse', 'transform']
+    assert result == Parser.transform()
+
+
+def test_story_profile_parse_tables(patch, magic, story):
+    """
+    Ensures the parse tables are loaded before any phase is recorded
+    """
+    patch.init(Parser)
+    patch.many(Parser, ['lark', 'lex', 'lark_parse', 'transforms_inline'])
+    profiler = magic()
+    Parser.lark.side_effect = lambda: profiler.assert_not_called()
+    story.profile_parse(Parser(), profiler)
+    assert Parser.lark.call_count == 1
+
+
+def test_story_profile_parse_inline(patch, magic, story):
+    patch.init(Parser)
+    patch.many(Parser, ['lark', 'lex', 'lark_parse', 'transform'])
+    patch.object(Parser, 'transforms_inline', return_value=True)
+    profiler = magic()
+    result = story.profile_parse(Parser(), profiler)
+    names = [call[0][0] for call in profiler.call_args_list]
+    assert names == ['lex', 'parse']
+    assert Parser.transform.call_count == 0
+    assert result == Parser.lark_parse()
+
+
+def test_story_profile_parse_empty(patch, magic):
+    patch.init(Parser)
+    patch.many(Parser, ['parse', 'lex'])
+    profiler = magic()
+    result = Story('').profile_parse(Parser(), profiler)
+    Parser.parse.assert_called_with('')
+    assert profiler.call_count == 0
+    assert result == Parser.parse()
+
+
 def test_story_parse_ebnf(patch, story, parser):
     story.parse(ebnf='ebnf')
     Parser.__init__.assert_called_with(ebnf='ebnf')
@@ -163,21 +255,37 @@ def test_story_parse_error(patch, story, parser, error):
     Story.error.assert_called_with(error)
 
 
-def test_story_modules(magic, story):
+def test_story_imports(magic, story):
     import_tree = magic()
     story.tree = magic()
     story.tree.find_data.return_value = [import_tree]
-    result = story.modules()
-    assert result == [import_tree.string.child().value[1:-1]]
+    result = story.imports()
+    story.tree.find_data.assert_called_with('imports')
+    assert result == {import_tree.string.child().value[1:-1]: import_tree}
 
 
-def test_story_modules_no_extension(magic, story):
+def test_story_imports_no_extension(magic, story):
     import_tree = magic()
     import_tree.string.child.return_value = magic(value='"hello"')
     story.tree = magic()
     story.tree.find_data.return_value = [import_tree]
-    result = story.modules()
-    assert result == ['hello.story']
+    result = story.imports()
+    assert result == {'hello.story': import_tree}
+
+
+def test_story_imports_duplicate(magic, story):
+    first = magic()
+    first.string.child.return_value = magic(value='"hello"')
+    second = magic()
+    second.string.child.return_value = magic(value='"hello.story"')
+    story.tree = magic()
+    story.tree.find_data.return_value = [first, second]
+    assert story.imports() == {'hello.story': first}
+
+
+def test_story_modules(patch, story):
+    patch.object(Story, 'imports', return_value={'hello.story': 'tree'})
+    assert story.modules() == ['hello.story']
 
 
 def test_story_compile(patch, story, compiler):
@@ -186,6 +294,27 @@ def test_story_compile(patch, story, compiler):
     assert story.compiled == Compiler.compile()
 
 
+def test_story_compile_profiler(patch, story, compiler):
+    patch.object(Story, 'profile_compile')
+    story.compile(profiler='profiler')
+    Story.profile_compile.assert_called_with('profiler')
+    assert story.compiled == Story.profile_compile()
+    assert Compiler.compile.call_count == 0
+
+
+def test_story_profile_compile(patch, magic, story):
+    patch.object(Preprocessor, 'process')
+    patch.object(Compiler, 'compile_tree')
+    story.tree = 'tree'
+    profiler = magic()
+    result = story.profile_compile(profiler)
+    Preprocessor.process.assert_called_with('tree')
+    Compiler.compile_tree.assert_called_with(Preprocessor.process())
+    names = [call[0][0] for call in profiler.call_args_list]
+    assert names == ['preprocess', 'compile']
+    assert result == Compiler.compile_tree()
+
+
 @mark.parametrize('error', [StorySyntaxError('error'), CompilerError('error')])
 def test_story_compiler_error(patch, story, compiler, error):
     """
@@ -214,8 +343,8 @@ def test_story_process(patch, story):
     patch.many(Story, ['parse', 'compile'])
     story.compiled = 'compiled'
     result = story.process()
-    Story.parse.assert_called_with(ebnf=None)
-    Story.compile.assert_called_with()
+    Story.parse.assert_called_with(ebnf=None, profiler=None)
+    Story.compile.assert_called_with(profiler=None)
     assert result == story.compiled
 
 
@@ -223,4 +352,12 @@ def test_story_process_ebnf(patch, story):
     patch.many(Story, ['parse', 'compile'])
     story.compiled = 'compiled'
     story.process(ebnf='ebnf')
-    Story.parse.assert_called_with(ebnf='ebnf')
+    Story.parse.assert_called_with(ebnf='ebnf', profiler=None)
+
+
+def test_story_process_profiler(patch, story):
+    patch.many(Story, ['parse', 'compile'])
+    story.compiled = 'compiled'
+    story.process(profiler='profiler')
+    Story.parse.assert_called_with(ebnf=None, profiler='profiler')
+    Story.compile.assert_called_with(profiler='profiler')
@@ -1,4 +1,9 @@
 # -*- coding: utf-8 -*-
+import types
+
+from pytest import raises
+
+import storyscript
 from storyscript import load, load_map, loads, version
 from storyscript.Api import Api
 from storyscript.Version import version as real_version
@@ -18,3 +23,42 @@ def test_storyscript_load_map():
 
 def test_storyscript_version():
     assert version == real_version
+
+
+def test_storyscript_api():
+    """
+    Ensures that the package exposes the Api class, not its module
+    """
+    from storyscript import Api as PackageApi
+    assert PackageApi is Api
+    assert PackageApi.loads('a = 1') == Api.loads('a = 1')
+
+
+def test_storyscript_patch(patch):
+    """
+    Ensures that the attributes of the package can be patched
+    """
+    patch.object(storyscript, 'loads')
+    assert storyscript.loads('a = 1') == storyscript.loads()
+    patch('storyscript.Api')
+    assert storyscript.Api.loads() == storyscript.Api.loads()
+
+
+def test_storyscript_patch_restored():
+    assert storyscript.loads == Api.loads
+    assert storyscript.Api is Api
+
+
+def test_storyscript_api_module(patch):
+    """
+    Ensures that setting the Api module on the package sets its class
+    """
+    module = types.ModuleType('storyscript.Api')
+    module.Api = 'api'
+    patch.object(storyscript, 'Api', module)
+    assert storyscript.Api == 'api'
+
+
+def test_storyscript_missing():
+    with raises(AttributeError):
+        storyscript.missing
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+from pytest import fixture
+
+from storyscript.Bundle import Bundle
+from storyscript.Watcher import Watcher
+
+
+@fixture
+def watcher():
+    return Watcher('path')
+
+
+def test_watcher_init(watcher):
+    assert watcher.path == 'path'
+    assert watcher.ignored_path is None
+    assert watcher.interval == 0.5
+    assert watcher.snapshot == {}
+
+
+def test_watcher_init_options():
+    watcher = Watcher('path', ignored_path='ignored', interval=1)
+    assert watcher.ignored_path == 'ignored'
+    assert watcher.interval == 1
+
+
+def test_watcher_stories(patch, watcher):
+    patch.object(os.path, 'isdir', return_value=False)
+    assert watcher.stories() == ['path']
+
+
+def test_watcher_stories_directory(patch, watcher):
+    patch.object(os.path, 'isdir', return_value=True)
+    patch.object(Bundle, 'parse_directory')
+    result = watcher.stories()
+    Bundle.parse_directory.assert_called_with('path', ignored_path=None)
+    assert result == Bundle.parse_directory()
+
+
+def test_watcher_take_snapshot(patch, watcher):
+    patch.object(Watcher, 'stories', return_value=['one.story'])
+    patch.object(os, 'stat')
+    result = watcher.take_snapshot()
+    os.stat.assert_called_with('one.story')
+    stat = os.stat()
+    assert result == {'one.story': (stat.st_mtime_ns, stat.st_size)}
+
+
+def test_watcher_take_snapshot_removed(patch, watcher):
+    """
+    Ensures that stories removed while taking the snapshot are skipped
+    """
+    patch.object(Watcher, 'stories', return_value=['one.story'])
+    patch.object(os, 'stat', side_effect=FileNotFoundError)
+    assert watcher.take_snapshot() == {}
+
+
+def test_watcher_changes(patch, watcher):
+    snapshot = {'one.story': (2, 1), 'two.story': (1, 1),
+                'three.story': (1, 1)}
+    patch.object(Watcher, 'take_snapshot', return_value=snapshot)
+    watcher.snapshot = {'one.story': (1, 1), 'two.story': (1, 1),
+                        'four.story': (1, 1)}
+    result = watcher.changes()
+    assert result == ['four.story', 'one.story', 'three.story']
+    assert watcher.snapshot == snapshot
+
+
+def test_watcher_watch(patch, watcher):
+    patch.object(time, 'sleep')
+    patch.object(Watcher, 'changes', side_effect=[['one.story'], [],
+                                                  ['two.story']])
+    watcher.snapshot = {'one.story': (1, 1)}
+    watch = watcher.watch()
+    assert next(watch) == ['one.story']
+    assert next(watch) == ['two.story']
+    time.sleep.assert_called_with(0.5)
+    assert time.sleep.call_count == 2
@@ -26,9 +26,7 @@ def get_entity(obj):
     """
     returns the entity for an expression
     """
-    return obj.or_expression.and_expression.cmp_expression.arith_expression. \
-        mul_expression.unary_expression.pow_expression.primary_expression. \
-        entity
+    return obj.or_expression.entity
 
 
 def test_compiler_init(patch):
@@ -721,10 +719,17 @@ def test_compiler_compiler(patch):
 
 def test_compiler_compile(patch):
     patch.object(Preprocessor, 'process')
-    patch.many(Compiler, ['parse_tree', 'compiler'])
+    patch.object(Compiler, 'compile_tree')
     result = Compiler.compile('tree')
     Preprocessor.process.assert_called_with('tree')
-    Compiler.compiler().parse_tree.assert_called_with(Preprocessor.process())
+    Compiler.compile_tree.assert_called_with(Preprocessor.process())
+    assert result == Compiler.compile_tree()
+
+
+def test_compiler_compile_tree(patch):
+    patch.many(Compiler, ['parse_tree', 'compiler'])
+    result = Compiler.compile_tree('tree')
+    Compiler.compiler().parse_tree.assert_called_with('tree')
     lines = Compiler.compiler().lines
     expected = {'tree': lines.lines, 'version': version,
                 'services': lines.get_services(), 'functions': lines.functions,
@@ -93,6 +93,7 @@ def test_faketree_add_assignment(patch, fake_tree, block):
     result = fake_tree.add_assignment('value')
     FakeTree.assignment.assert_called_with('value')
     assert block.children == [FakeTree.assignment(), block.child()]
+    assert block.reset_position.call_count == 1
     assert result == FakeTree.assignment()
 
 
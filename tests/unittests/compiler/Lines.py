@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import math
+
 from pytest import fixture, mark, raises
 
 from storyscript.compiler import Lines
@@ -12,6 +14,7 @@ def lines():
 
 def test_lines_init(lines):
     assert lines.lines == {}
+    assert lines.ordered == []
     assert lines.variables == []
     assert lines.services == []
     assert lines.functions == {}
@@ -19,25 +22,42 @@ def test_lines_init(lines):
     assert lines.modules == {}
 
 
+def add_lines(lines, *line_numbers):
+    for line in line_numbers:
+        lines.make('method', line)
+
+
+def test_lines_sort_key():
+    assert Lines.sort_key('1.2') == (1, 2, math.inf)
+
+
+def test_lines_index(lines):
+    lines.index('1')
+    lines.index('2')
+    assert lines.ordered == [(Lines.sort_key('1'), '1'),
+                             (Lines.sort_key('2'), '2')]
+
+
+def test_lines_index_insert(lines):
+    lines.index('2')
+    lines.index('2.1')
+    assert lines.sort() == ['2.1', '2']
+
+
 def test_lines_sort(lines):
-    lines.lines = {'1': '1', '2': '2', '2.1': '2'}
+    add_lines(lines, '1', '2', '2.1')
     assert lines.sort() == ['1', '2.1', '2']
 
 
 def test_lines_sort_complex(lines):
-    lines.lines = {'1': '.', '1.0': '.', '1.1': '.'}
+    add_lines(lines, '1', '1.0', '1.1')
     assert lines.sort() == ['1.0', '1.1', '1']
 
 
 def test_lines_sort_more_complex(lines):
-    lines.lines = {
-        '1': '.', '1.0': '.', '1.1': '.',
-        '0': '.', '2': '.', '2.1': '.',
-        '1.9.0': '.', '1.6': '.', '1.4.1': '.',
-        '1.1.0': '.', '1.0.0': '.', '1.0.1': '.',
-        '1.1.26': '.', '1.1.3': '.',
-        '1.0.9': '.', '1.0.22': '.',
-    }
+    add_lines(lines, '1', '1.0', '1.1', '0', '2', '2.1', '1.9.0', '1.6',
+              '1.4.1', '1.1.0', '1.0.0', '1.0.1', '1.1.26', '1.1.3', '1.0.9',
+              '1.0.22')
     assert lines.sort() == [
         '0',
         '1.0.0',
@@ -58,20 +78,18 @@ def test_lines_sort_more_complex(lines):
     ]
 
 
-def test_lines_first(patch, lines):
-    patch.object(Lines, 'sort')
-    lines.lines = {'1': '1'}
-    assert lines.first() == lines.sort()[0]
+def test_lines_first(lines):
+    add_lines(lines, '2', '1.1', '1')
+    assert lines.first() == '1.1'
 
 
 def test_lines_first_none(lines):
     assert lines.first() is None
 
 
-def test_lines_last(patch, lines):
-    patch.object(Lines, 'sort')
-    lines.lines = {'1': '1'}
-    assert lines.last() == lines.sort()[-1]
+def test_lines_last(lines):
+    add_lines(lines, '1', '2.1', '2')
+    assert lines.last() == '2'
 
 
 def test_lines_last_no_lines(lines):
@@ -93,11 +111,19 @@ def test_lines_set_next(patch, lines):
 
 
 @mark.parametrize('method', ['if', 'elif', 'try', 'catch'])
-def test_lines_set_exit(patch, lines, method):
-    patch.object(Lines, 'sort', return_value=['1', '2'])
-    lines.lines = {'1': {}, '2': {'method': method}}
+def test_lines_set_exit(lines, method):
+    lines.make(method, '1')
+    lines.make('method', '2')
+    lines.set_exit('3')
+    assert lines.lines['1']['exit'] == '3'
+    assert lines.lines['2']['exit'] is None
+
+
+def test_lines_set_exit_last(lines):
+    lines.make('if', '1')
+    lines.make('elif', '2')
     lines.set_exit('3')
-    assert lines.sort.call_count == 1
+    assert lines.lines['1']['exit'] is None
     assert lines.lines['2']['exit'] == '3'
 
 
@@ -136,6 +162,13 @@ def test_lines_make(lines):
                       'parent': None}}
     lines.make('method', '1')
     assert lines.lines == expected
+    assert lines.sort() == ['1']
+
+
+def test_lines_make_existing(lines):
+    lines.make('method', '1')
+    lines.make('method', '1')
+    assert lines.sort() == ['1']
 
 
 @mark.parametrize('keywords', ['service', 'command', 'function', 'output',
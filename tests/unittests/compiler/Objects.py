@@ -319,6 +319,14 @@ def test_objects_expression_type(operator, expression, tree):
     assert Objects.expression_type(operator, tree) == expression
 
 
+def test_objects_operand(patch, tree):
+    patch.object(Objects, 'entity')
+    tree.data = 'entity'
+    result = Objects.operand(tree)
+    Objects.entity.assert_called_with(tree)
+    assert result == Objects.entity()
+
+
 def test_objects_expression(patch, tree):
     """
     Ensures Objects.expression calls or_expression
@@ -395,26 +403,14 @@ def test_objects_build_binary_expression(patch, tree, magic):
     }
 
 
-def test_objects_primary_expression_entity(patch, tree):
-    """
-    Ensures Objects.primary_expression works with an entity node
-    """
-    patch.many(Objects, ['entity'])
-    tree.child(0).data = 'entity'
-    r = Objects.primary_expression(tree)
-    Objects.entity.assert_called_with(tree.entity)
-    assert r == Objects.entity()
-
-
-def test_objects_primary_expression_two(patch, tree):
+def test_objects_primary_expression(patch, tree):
     """
-    Ensures Objects.primary_expression works with a or_expression node
+    Ensures Objects.primary_expression compiles its operand
     """
-    patch.many(Objects, ['entity', 'or_expression'])
-    tree.child(0).data = 'or_expression'
+    patch.object(Objects, 'operand')
     r = Objects.primary_expression(tree)
-    Objects.or_expression.assert_called_with(tree.child(0))
-    assert r == Objects.or_expression()
+    Objects.operand.assert_called_with(tree.child(0))
+    assert r == Objects.operand()
 
 
 def test_objects_pow_expression_one(patch, tree):
@@ -433,15 +429,14 @@ def test_objects_pow_expression_two(patch, tree):
     """
     Ensures Objects.pow_expression works with two nodes
     """
-    patch.many(Objects, ['build_binary_expression', 'primary_expression',
-                         'unary_expression'])
+    patch.many(Objects, ['build_binary_expression', 'operand'])
     tree.child(1).type = 'POWER'
     tree.children = [1, '+', 2]
     r = Objects.pow_expression(tree)
     Objects.build_binary_expression.assert_called_with(
         tree, tree.child(1),
-        Objects.primary_expression(tree.child(0)),
-        Objects.unary_expression(tree.child(2)))
+        Objects.operand(tree.child(0)),
+        Objects.operand(tree.child(2)))
     assert r == Objects.build_binary_expression()
 
 
@@ -487,16 +482,14 @@ def test_objects_mul_expression_two(patch, tree):
     """
     Ensures Objects.mul_expression works with two nodes
     """
-    patch.many(Objects, ['build_binary_expression', 'unary_expression'])
+    patch.many(Objects, ['build_binary_expression', 'operand'])
     tree.child(1).data = 'mul_operator'
     tree.children = [1, '*', 2]
-    mul_expression = Objects.mul_expression
-    patch.object(Objects, 'mul_expression')
-    r = mul_expression(tree)
+    r = Objects.mul_expression(tree)
     Objects.build_binary_expression.assert_called_with(
         tree, tree.child(1).child(0),
-        Objects.mul_expression(tree.child(0)),
-        Objects.unary_expression(tree.child(2)))
+        Objects.operand(tree.child(0)),
+        Objects.operand(tree.child(2)))
     assert r == Objects.build_binary_expression()
 
 
@@ -516,16 +509,14 @@ def test_objects_arith_expression_two(patch, tree):
     """
     Ensures Objects.arith_expression works with two nodes
     """
-    patch.many(Objects, ['build_binary_expression', 'mul_expression'])
+    patch.many(Objects, ['build_binary_expression', 'operand'])
     tree.child(1).data = 'arith_operator'
     tree.children = [1, '+', 2]
-    arith_expression = Objects.arith_expression
-    patch.object(Objects, 'arith_expression')
-    r = arith_expression(tree)
+    r = Objects.arith_expression(tree)
     Objects.build_binary_expression.assert_called_with(
         tree, tree.child(1).child(0),
-        Objects.arith_expression(tree.child(0)),
-        Objects.mul_expression(tree.child(2)))
+        Objects.operand(tree.child(0)),
+        Objects.operand(tree.child(2)))
     assert r == Objects.build_binary_expression()
 
 
@@ -545,16 +536,14 @@ def test_objects_or_expression_two(patch, tree):
     """
     Ensures Objects.or_expression works with two nodes
     """
-    patch.many(Objects, ['build_binary_expression', 'and_expression'])
+    patch.many(Objects, ['build_binary_expression', 'operand'])
     tree.child(1).type = 'OR'
     tree.children = [1, 'or', 2]
-    or_expression = Objects.or_expression
-    patch.object(Objects, 'or_expression')
-    r = or_expression(tree)
+    r = Objects.or_expression(tree)
     Objects.build_binary_expression.assert_called_with(
         tree, tree.child(1),
-        Objects.or_expression(tree.child(0)),
-        Objects.and_expression(tree.child(2)))
+        Objects.operand(tree.child(0)),
+        Objects.operand(tree.child(2)))
     assert r == Objects.build_binary_expression()
 
 
@@ -574,16 +563,14 @@ def test_objects_and_expression_two(patch, tree):
     """
     Ensures Objects.and_expression works with two nodes
     """
-    patch.many(Objects, ['build_binary_expression', 'cmp_expression'])
+    patch.many(Objects, ['build_binary_expression', 'operand'])
     tree.child(1).type = 'AND'
     tree.children = [1, 'and', 2]
-    and_expression = Objects.and_expression
-    patch.object(Objects, 'and_expression')
-    r = and_expression(tree)
+    r = Objects.and_expression(tree)
     Objects.build_binary_expression.assert_called_with(
         tree, tree.child(1),
-        Objects.and_expression(tree.child(0)),
-        Objects.cmp_expression(tree.child(2)))
+        Objects.operand(tree.child(0)),
+        Objects.operand(tree.child(2)))
     assert r == Objects.build_binary_expression()
 
 
@@ -603,14 +590,12 @@ def test_objects_cmp_expression_two(patch, tree):
     """
     Ensures Objects.and_expression works with two nodes
     """
-    patch.many(Objects, ['build_binary_expression', 'arith_expression'])
+    patch.many(Objects, ['build_binary_expression', 'operand'])
     tree.child(1).data = 'cmp_operator'
     tree.children = [1, '==', 2]
-    cmp_expression = Objects.cmp_expression
-    patch.object(Objects, 'cmp_expression')
-    r = cmp_expression(tree)
+    r = Objects.cmp_expression(tree)
     Objects.build_binary_expression.assert_called_with(
         tree, tree.child(1).child(0),
-        Objects.cmp_expression(tree.child(0)),
-        Objects.arith_expression(tree.child(2)))
+        Objects.operand(tree.child(0)),
+        Objects.operand(tree.child(2)))
     assert r == Objects.build_binary_expression()
@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
+import sys
 from unittest import mock
 
+from lark.lexer import Token
+
 from pytest import fixture
 
 from storyscript.compiler import FakeTree, Preprocessor
+from storyscript.parser import Tree
 
 
 @fixture
@@ -278,3 +282,44 @@ def test_preprocessor_visit_nested_same_fake_tree(patch, magic, preprocessor):
         mock.call(cs[1], preprocessor.fake_tree(tree), cs[0]),
         mock.call(cs[0], preprocessor.fake_tree(tree), tree),
     ]
+
+
+def test_preprocessor_visit_fake_tree_lazy(magic, preprocessor):
+    """
+    Check that fake trees are only created for blocks with inline_expressions
+    """
+    inline = Tree('inline_expression', [Token('NAME', 'a')])
+    inner = Tree('block', [Tree('entity', [inline])])
+    block = Tree('block', [Tree('line', [Token('NAME', 'b')]), inner])
+    tree = Tree('start', [block, Tree('block', [Token('NAME', 'c')])])
+    replace = magic()
+    preprocessor.visit(tree, None, None,
+                       Preprocessor.is_inline_expression, replace)
+    preprocessor.fake_tree.assert_called_once_with(inner)
+    replace.assert_called_with(inline, preprocessor.fake_tree(),
+                               inner.children[0])
+
+
+def test_preprocessor_visit_fake_tree_once(magic, preprocessor):
+    """
+    Check that a block has a single fake tree
+    """
+    entity = Tree('entity', [Tree('inline_expression', [Token('NAME', 'a')]),
+                             Tree('inline_expression', [Token('NAME', 'b')])])
+    block = Tree('block', [entity])
+    preprocessor.visit(block, None, None, Preprocessor.is_inline_expression,
+                       magic())
+    preprocessor.fake_tree.assert_called_once_with(block)
+
+
+def test_preprocessor_visit_deep(magic, preprocessor):
+    """
+    Check that deeply nested trees don't exceed the recursion limit
+    """
+    tree = Tree('inline_expression', [Token('NAME', 'a')])
+    for i in range(sys.getrecursionlimit()):
+        tree = Tree('block', [Tree('entity', [tree])])
+    replace = magic()
+    preprocessor.visit(tree, None, None, Preprocessor.is_inline_expression,
+                       replace)
+    assert replace.call_count == 1
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import os
+
 from pytest import fixture
 
 
@@ -38,6 +40,20 @@ def patch(mocker, patch_init, patch_many):
     return mocker.patch
 
 
+@fixture(scope='session')
+def cache_home(tmpdir_factory):
+    return str(tmpdir_factory.mktemp('cache'))
+
+
+@fixture(autouse=True)
+def cache_directory(mocker, cache_home):
+    """
+    Stores parse tables in a temporary directory, rather than in the user's
+    cache.
+    """
+    mocker.patch.dict(os.environ, {'XDG_CACHE_HOME': cache_home})
+
+
 @fixture
 def call_count():
     """
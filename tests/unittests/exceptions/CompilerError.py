@@ -33,6 +33,15 @@ def test_const_dict():
         d.bar
 
 
+def test_const_dict_special_attribute():
+    """
+    Ensures that special attributes are never looked up in the data
+    """
+    d = ConstDict({'__setstate__': 'data'})
+    with raises(AttributeError):
+        d.__setstate__
+
+
 def test_compiler_error_extra_parameters():
     e2 = CompilerError('my_custom_error', my_param='p1', my_param2='p2')
     assert e2.extra.my_param == 'p1'
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import copyreg
 import os
 
 import click
@@ -311,7 +312,14 @@ def test_storyerror_echo(patch, storyerror):
     patch.object(click, 'echo')
     patch.object(StoryError, 'message')
     storyerror.echo()
-    click.echo.assert_called_with(StoryError.message())
+    click.echo.assert_called_with(StoryError.message(), err=False)
+
+
+def test_storyerror_echo_err(patch, storyerror):
+    patch.object(click, 'echo')
+    patch.object(StoryError, 'message')
+    storyerror.echo(err=True)
+    click.echo.assert_called_with(StoryError.message(), err=True)
 
 
 def test_storyerror_unnamed_error(patch):
@@ -335,3 +343,15 @@ def test_storyerror_internal(patch):
         'Please report at https://github.com/storyscript/storyscript/issues')
     StoryError.unnamed_error.assert_called_with(msg)
     assert error == StoryError.unnamed_error()
+
+
+def test_storyerror_reduce_error(magic):
+    error = UnexpectedToken(magic(), ['NAME'])
+    result = StoryError.reduce_error(error)
+    assert result == (copyreg.__newobj__, (UnexpectedToken, ), error.__dict__)
+
+
+def test_storyerror_reduce_error_registered():
+    assert copyreg.dispatch_table[UnexpectedToken] == StoryError.reduce_error
+    reduce_error = StoryError.reduce_error
+    assert copyreg.dispatch_table[UnexpectedCharacters] == reduce_error
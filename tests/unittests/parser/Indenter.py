@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
 from lark.indenter import Indenter
+from lark.lexer import Token
 
 from storyscript.parser import CustomIndenter
 
 
+def token(type, value):
+    return Token(type, value, line=1, column=1)
+
+
 def test_indenter():
     assert issubclass(CustomIndenter, Indenter)
     assert CustomIndenter.NL_type == '_NL'
@@ -12,3 +17,24 @@ def test_indenter():
     assert CustomIndenter.INDENT_type == '_INDENT'
     assert CustomIndenter.DEDENT_type == '_DEDENT'
     assert CustomIndenter.tab_len == 8
+
+
+def test_indenter_process():
+    indenter = CustomIndenter()
+    stream = [token('_NL', '\n  '), token('NAME', 'a')]
+    result = [t.type for t in indenter.process(stream)]
+    assert result == ['_NL', '_INDENT', 'NAME', '_DEDENT']
+    assert indenter.indent_level == [0]
+
+
+def test_indenter_process_failed():
+    """
+    Ensures that an interrupted process does not affect the following ones
+    """
+    indenter = CustomIndenter()
+    stream = indenter.process([token('_NL', '\n  '), token('NAME', 'a')])
+    next(stream)
+    next(stream)
+    stream = [token('_NL', '\n'), token('NAME', 'a')]
+    result = [t.type for t in indenter.process(stream)]
+    assert result == ['_NL', 'NAME']
@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import io
+import os
 
 from lark import Lark
 
 from pytest import fixture
 
-from storyscript.parser import (CustomIndenter, Grammar, Parser, Transformer,
-                                Tree)
+from storyscript.parser import (CustomIndenter, Grammar, Parser, Tables,
+                                Transformer, Tree)
 
 
 @fixture
@@ -14,6 +16,12 @@ def parser():
     return Parser()
 
 
+@fixture(autouse=True)
+def parser_cache(patch):
+    patch.object(Parser, 'cache', {})
+    patch.object(Parser, 'grammars', {})
+
+
 def test_parser_init(parser):
     assert parser.algo == 'lalr'
     assert parser.ebnf is None
@@ -56,29 +64,166 @@ def test_parser_grammar_ebnf(patch, parser):
     assert result == io.open().__enter__().read()
 
 
-def test_parser_lark(patch, parser):
+def test_parser_clear_cache():
+    Parser.cache['key'] = 'lark'
+    Parser.grammars[None] = ('grammar', 'digest')
+    Parser.clear_cache()
+    assert Parser.cache == {}
+    assert Parser.grammars == {}
+
+
+def test_parser_digest():
+    result = Parser.digest('grammar')
+    assert result == hashlib.sha1(b'grammar').hexdigest()
+
+
+def test_parser_grammar_key(parser):
+    assert parser.grammar_key() is None
+
+
+def test_parser_grammar_key_ebnf(patch, parser):
+    patch.object(os.path, 'getmtime')
+    parser.ebnf = 'test.ebnf'
+    result = parser.grammar_key()
+    os.path.getmtime.assert_called_with('test.ebnf')
+    assert result == (os.path.abspath('test.ebnf'), os.path.getmtime())
+
+
+def test_parser_hashed_grammar(patch, parser):
+    patch.many(Parser, ['grammar_key', 'grammar', 'digest'])
+    result = parser.hashed_grammar()
+    Parser.digest.assert_called_with(Parser.grammar())
+    assert Parser.grammars[Parser.grammar_key()] == result
+    assert result == (Parser.grammar(), Parser.digest())
+
+
+def test_parser_hashed_grammar_cached(patch, parser):
+    """
+    Ensures the grammar is built and hashed only once
+    """
+    patch.many(Parser, ['grammar', 'digest'])
+    result = parser.hashed_grammar()
+    assert parser.hashed_grammar() == result
+    assert Parser.grammar.call_count == 1
+    assert Parser.digest.call_count == 1
+
+
+def test_parser_hashed_grammar_ebnf_changed(patch, parser):
+    """
+    Ensures the grammar is read again when its file is changed
+    """
+    patch.object(os.path, 'getmtime', side_effect=[1, 2])
+    patch.many(Parser, ['grammar', 'digest'])
+    parser.ebnf = 'test.ebnf'
+    parser.hashed_grammar()
+    parser.hashed_grammar()
+    assert Parser.grammar.call_count == 2
+
+
+def test_parser_cache_key(patch, parser):
+    patch.object(Parser, 'grammar_key')
+    assert parser.cache_key() == ('lalr', Parser.grammar_key())
+
+
+def test_parser_transforms_inline(parser):
+    assert parser.transforms_inline() is True
+    assert Parser(algo='earley').transforms_inline() is False
+
+
+def test_parser_build_lark(patch, parser):
     """
-    Ensures Parser.lark can produce the correct Lark instance.
+    Ensures Parser.build_lark can produce the correct Lark instance.
     """
     patch.init(Lark)
-    patch.many(Parser, ['indenter', 'grammar'])
-    result = parser.lark()
-    kwargs = {'parser': parser.algo, 'postlex': Parser.indenter()}
-    Lark.__init__.assert_called_with(parser.grammar(), **kwargs)
+    patch.many(Parser, ['indenter', 'transformer'])
+    result = parser.build_lark('grammar')
+    kwargs = {'parser': parser.algo, 'postlex': Parser.indenter(),
+              'transformer': Parser.transformer(), 'tree_class': Tree}
+    Lark.__init__.assert_called_with('grammar', **kwargs)
     assert isinstance(result, Lark)
 
 
+def test_parser_build_lark_earley(patch):
+    patch.init(Lark)
+    patch.object(Parser, 'indenter')
+    parser = Parser(algo='earley')
+    parser.build_lark('grammar')
+    kwargs = {'parser': 'earley', 'postlex': Parser.indenter()}
+    Lark.__init__.assert_called_with('grammar', **kwargs)
+
+
+def test_parser_load_lark(patch, parser):
+    patch.many(Tables, ['path', 'load', 'dump'])
+    patch.object(Parser, 'build_lark')
+    result = parser.load_lark('grammar', 'digest')
+    Tables.path.assert_called_with('lalr', 'digest')
+    Tables.load.assert_called_with(Tables.path())
+    assert Parser.build_lark.call_count == 0
+    assert result == Tables.load()
+
+
+def test_parser_load_lark_build(patch, parser):
+    patch.many(Tables, ['path', 'load', 'dump'])
+    patch.object(Parser, 'build_lark')
+    Tables.load.return_value = None
+    result = parser.load_lark('grammar', 'digest')
+    Parser.build_lark.assert_called_with('grammar')
+    Tables.dump.assert_called_with(Parser.build_lark(), Tables.path())
+    assert result == Parser.build_lark()
+
+
+def test_parser_lark(patch, parser):
+    patch.many(Parser, ['cache_key', 'load_lark'])
+    patch.object(Parser, 'hashed_grammar', return_value=('grammar', 'digest'))
+    result = parser.lark()
+    Parser.load_lark.assert_called_with('grammar', 'digest')
+    assert Parser.cache[Parser.cache_key()] == Parser.load_lark()
+    assert result == Parser.load_lark()
+
+
+def test_parser_lark_cached(patch, parser):
+    """
+    Ensures the grammar is not built again once its Lark instance is cached
+    """
+    patch.many(Parser, ['hashed_grammar', 'cache_key', 'load_lark'])
+    Parser.cache[Parser.cache_key()] = 'lark'
+    assert parser.lark() == 'lark'
+    assert Parser.hashed_grammar.call_count == 0
+    assert Parser.load_lark.call_count == 0
+
+
 def test_parser_parse(patch, parser):
     """
     Ensures the build method can build the grammar
     """
-    patch.many(Parser, ['lark', 'transformer'])
+    patch.many(Parser, ['lark', 'transform'])
     result = parser.parse('source')
     Parser.lark().parse.assert_called_with('source\n')
+    assert Parser.transform.call_count == 0
+    assert result == Parser.lark().parse()
+
+
+def test_parser_parse_earley(patch):
+    patch.many(Parser, ['lark', 'transformer'])
+    result = Parser(algo='earley').parse('source')
     Parser.transformer().transform.assert_called_with(Parser.lark().parse())
     assert result == Parser.transformer().transform()
 
 
+def test_parser_lark_parse(patch, parser):
+    patch.object(Parser, 'lark')
+    result = parser.lark_parse('source')
+    Parser.lark().parse.assert_called_with('source\n')
+    assert result == Parser.lark().parse()
+
+
+def test_parser_transform(patch, parser):
+    patch.object(Parser, 'transformer')
+    result = parser.transform('tree')
+    Parser.transformer().transform.assert_called_with('tree')
+    assert result == Parser.transformer().transform()
+
+
 def test_parser_parse_empty(patch, parser):
     """
     Ensures that empty stories are parsed correctly
@@ -88,6 +233,7 @@ def test_parser_parse_empty(patch, parser):
 
 def test_parser_lex(patch, parser):
     patch.many(Parser, ['lark', 'indenter'])
+    Parser.lark().lex.return_value = ['token']
     result = parser.lex('source')
     Parser.lark().lex.assert_called_with('source')
-    assert result == Parser.lark().lex()
+    assert result == ['token']
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+
+import lark
+from lark.parsers import lalr_analysis
+
+from storyscript.Version import version
+from storyscript.parser import Parser, Tables, Transformer
+
+
+def test_tables_directory(patch):
+    patch.dict(os.environ, {'XDG_CACHE_HOME': 'cache'})
+    assert Tables.directory() == os.path.join('cache', 'storyscript')
+
+
+def test_tables_directory_home(patch):
+    patch.dict(os.environ)
+    os.environ.pop('XDG_CACHE_HOME', None)
+    home = os.path.expanduser('~')
+    result = Tables.directory()
+    assert result == os.path.join(home, '.cache', 'storyscript')
+
+
+def test_tables_hooks():
+    hooks = [name for name in vars(Transformer) if not name.startswith('__')]
+    names = ' '.join(sorted(hooks))
+    expected = hashlib.sha1(names.encode('utf-8')).hexdigest()[:8]
+    assert Tables.hooks() == expected
+
+
+def test_tables_hooks_pickled(patch):
+    """
+    Ensures the hash is kept when pickling adds special names to the class
+    """
+    hooks = Tables.hooks()
+    patch.object(Transformer, '__slotnames__', [], create=True)
+    assert Tables.hooks() == hooks
+
+
+def test_tables_prefix(patch):
+    patch.object(Tables, 'hooks', return_value='hooks')
+    expected = 'tables-{}-{}-r{}-hooks-'.format(version, lark.__version__,
+                                                Tables.revision)
+    assert Tables.prefix() == expected
+
+
+def test_tables_path(patch):
+    patch.object(Tables, 'directory', return_value='cache')
+    patch.object(Tables, 'prefix', return_value='prefix-')
+    result = Tables.path('lalr', 'digest')
+    assert result == os.path.join('cache', 'prefix-lalr-digest.pickle')
+
+
+def test_tables_prune(patch, tmpdir):
+    """
+    Ensures that only the files stored with another prefix are removed
+    """
+    for name in ['tables-old-lalr.pickle', 'tables-new-lalr.pickle',
+                 'tables-new-earley.pickle', 'other']:
+        tmpdir.join(name).write('')
+    Tables.prune(str(tmpdir), 'tables-new-')
+    names = sorted(path.basename for path in tmpdir.listdir())
+    assert names == ['other', 'tables-new-earley.pickle',
+                     'tables-new-lalr.pickle']
+
+
+def test_tables_prune_missing(tmpdir):
+    Tables.prune(str(tmpdir.join('missing')), 'tables-new-')
+
+
+def test_tables_action():
+    assert Tables.action('Shift') is lalr_analysis.Shift
+    assert Tables.action('Reduce') is lalr_analysis.Reduce
+
+
+def test_tables_reduce_action():
+    result = Tables.reduce_action(lalr_analysis.Shift)
+    assert result == (Tables.action, ('Shift',))
+
+
+def test_tables_load_missing(tmpdir):
+    assert Tables.load(str(tmpdir.join('missing'))) is None
+
+
+def test_tables_load_broken(tmpdir):
+    path = tmpdir.join('broken')
+    path.write('broken')
+    assert Tables.load(str(path)) is None
+
+
+def test_tables_dump_load(tmpdir):
+    """
+    Ensures that loaded tables can parse stories.
+    """
+    parser = Parser()
+    path = tmpdir.join('tables', 'lark.pickle')
+    Tables.dump(parser.build_lark(parser.grammar()), str(path))
+    result = Tables.load(str(path))
+    tree = result.parse('a = 1\n')
+    assert tree.children[0].data == 'block'
+    assert tmpdir.join('tables').listdir() == [path]
+
+
+def test_tables_dump_prune(patch, tmpdir):
+    patch.object(Tables, 'prune')
+    patch.object(Tables, 'prefix')
+    Tables.dump('lark', str(tmpdir.join('lark.pickle')))
+    Tables.prune.assert_called_with(str(tmpdir), Tables.prefix())
+
+
+def test_tables_dump_kept(patch, tmpdir):
+    """
+    Ensures that tables dumped by a process are loaded by the next one
+    """
+    patch.dict(os.environ, {'XDG_CACHE_HOME': str(tmpdir)})
+    if '__slotnames__' in vars(Transformer):
+        # as in a new process, where Transformer has not been pickled yet
+        patch.object(Transformer, '__slotnames__')
+        del Transformer.__slotnames__
+    Parser.clear_cache()
+    Parser().lark()
+    Parser.clear_cache()
+    patch.object(Parser, 'build_lark')
+    patch.object(Tables, 'load', wraps=Tables.load)
+    Parser().lark()
+    Parser.clear_cache()
+    path = Tables.path('lalr', Parser().hashed_grammar()[1])
+    Tables.load.assert_called_with(path)
+    assert Parser.build_lark.call_count == 0
+    assert os.path.exists(path)
+
+
+def test_tables_dump_unwritable(patch, tmpdir):
+    patch.object(os, 'makedirs', side_effect=PermissionError)
+    Tables.dump('lark', str(tmpdir.join('tables', 'lark.pickle')))
+    assert tmpdir.listdir() == []
+
+
+def test_tables_dump_error(tmpdir):
+    """
+    Ensures that temporary files are removed when lark can't be pickled
+    """
+    Tables.dump(lambda: 0, str(tmpdir.join('lark.pickle')))
+    assert tmpdir.listdir() == []
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from lark import Transformer as LarkTransformer
 from lark.lexer import Token
+from lark.tree import Tree as LarkTree
 
 from pytest import fixture, mark, raises
 
@@ -52,10 +53,9 @@ def test_transformer_implicit_output(tree):
     Ensures Transformer.implicit_output adds an output tree when needed
     """
     tree.service_fragment.output = None
-    tree.service_fragment.children = []
     Transformer.implicit_output(tree)
     expected = Tree('output', [tree.service_fragment.command.child()])
-    assert tree.service_fragment.children[-1] == expected
+    tree.service_fragment.append.assert_called_with(expected)
 
 
 def test_transformer_implicit_output_none(tree):
@@ -134,10 +134,25 @@ def test_transformer_service_block_indented_args(tree, magic):
     block = magic()
     matches = [block, tree]
     result = Transformer.service_block(matches)
-    block.service_fragment.children.append.assert_called_with('argument')
+    block.service_fragment.append.assert_called_with('argument')
     assert result == Tree('service_block', [block])
 
 
+def test_transformer_service_block_indented_args_line():
+    """
+    Ensures that the arguments moved to an empty service fragment give its
+    position
+    """
+    fragment = Tree('service_fragment', [])
+    service = Tree('service', [Tree('path', [Token('NAME', 'alpine')]),
+                               fragment])
+    arguments = Tree('arguments', [Token('NAME', 'key', line=2)])
+    block = Tree('block', [Tree('rules', [arguments])])
+    assert fragment.line() is None
+    Transformer.service_block([service, Tree('nested_block', [block])])
+    assert fragment.line() == '2'
+
+
 def test_transformer_when_block(patch, tree):
     """
     Ensures when_block nodes are transformed correctly
@@ -150,12 +165,43 @@ def test_transformer_when_block(patch, tree):
 
 @mark.parametrize('rule', ['start', 'line', 'block', 'statement'])
 def test_transformer_rules(rule):
-    result = getattr(Transformer(), rule)(['matches'])
+    result = Transformer().__default__(rule, ['matches'], 'meta')
     assert isinstance(result, Tree)
     assert result.data == rule
     assert result.children == ['matches']
 
 
+def test_transformer_transform():
+    tree = LarkTree('start', [LarkTree('line', ['token'])])
+    result = Transformer().transform(tree)
+    assert isinstance(result, Tree)
+    assert isinstance(result.child(0), Tree)
+    assert result == Tree('start', [Tree('line', ['token'])])
+
+
+def test_transformer_collapse():
+    assert Transformer.collapse('arith_expression', ['entity']) == 'entity'
+
+
+def test_transformer_collapse_operation():
+    result = Transformer.collapse('arith_expression', ['a', '+', 'b'])
+    assert result == Tree('arith_expression', ['a', '+', 'b'])
+
+
+@mark.parametrize('rule', ['and_expression', 'cmp_expression',
+                           'arith_expression', 'mul_expression',
+                           'unary_expression', 'pow_expression'])
+def test_transformer_expressions(patch, rule):
+    patch.object(Transformer, 'collapse')
+    result = getattr(Transformer, rule)(['matches'])
+    Transformer.collapse.assert_called_with(rule, ['matches'])
+    assert result == Transformer.collapse()
+
+
+def test_transformer_primary_expression(tree):
+    assert Transformer.primary_expression([tree]) == tree
+
+
 def test_transformer_absolute_expression(patch, tree):
     """
     Ensures absolute_expression are untouched when they don't contain
@@ -47,6 +47,74 @@ def test_tree_node(patch):
     assert result == Tree.walk()
 
 
+def test_tree_children_index():
+    first = Tree('inner', [])
+    tree = Tree('rule', [Token('test', 'test'), first, Tree('inner', [])])
+    assert tree.children_index() == {'inner': first}
+    assert tree.children_index() is tree.children_index()
+
+
+def test_tree_children_index_append():
+    """
+    Ensures that the index is built again when children are appended
+    """
+    tree = Tree('rule', [])
+    tree.children_index()
+    inner_tree = Tree('inner', [])
+    tree.children.append(inner_tree)
+    assert tree.children_index() == {'inner': inner_tree}
+
+
+def test_tree_children_index_children():
+    """
+    Ensures that the index is built again when children are reassigned
+    """
+    tree = Tree('rule', [Tree('old', [])])
+    tree.children_index()
+    inner_tree = Tree('inner', [])
+    tree.children = [inner_tree]
+    assert tree.children_index() == {'inner': inner_tree}
+
+
+def test_tree_reset_index():
+    tree = Tree('rule', [])
+    tree.children_index()
+    tree.reset_index()
+    assert tree._index is None
+
+
+def test_tree_walk_index(patch):
+    """
+    Ensures that trees with many children are walked using the index
+    """
+    patch.object(Tree, 'index_size', 0)
+    patch.object(Tree, 'children_index', return_value={})
+    tree = Tree('rule', [Tree('inner', [])])
+    assert Tree.walk(tree, 'inner') is None
+
+
+def test_tree_walk_renamed(patch):
+    patch.object(Tree, 'index_size', 0)
+    inner_tree = Tree('inner', [])
+    tree = Tree('rule', [inner_tree])
+    tree.walk(tree, 'inner')
+    inner_tree.rename('new')
+    assert Tree.walk(tree, 'inner') is None
+    assert Tree.walk(tree, 'new') == inner_tree
+
+
+def test_tree_walk_renamed_duplicate():
+    """
+    Ensures that a child renamed like a later child is found first
+    """
+    kids = [Tree('k{}'.format(i), []) for i in range(9)]
+    tree = Tree('rule', kids)
+    assert tree.k5 is kids[5]
+    kids[1].rename('k5')
+    assert tree.k5 is kids[1]
+    assert tree.k1 is None
+
+
 def test_tree_child():
     tree = Tree('rule', ['child'])
     assert tree.child(0) == 'child'
@@ -57,6 +125,66 @@ def test_tree_child_overflow():
     assert tree.child(1) is None
 
 
+def test_tree_first_token():
+    token = Token('WORD', 'word')
+    tree = Tree('outer', [Tree('path', [token]), Token('WORD', 'other')])
+    assert tree.first_token() is token
+
+
+def test_tree_first_token_empty():
+    assert Tree('outer', [Tree('empty', [])]).first_token() is None
+
+
+def test_tree_first_token_cached():
+    token = Token('WORD', 'word')
+    tree = Tree('outer', [Tree('path', [token])])
+    assert tree.first_token() is token
+    tree.children = []
+    assert tree.first_token() is token
+
+
+def test_tree_first_token_lazy():
+    """
+    Ensures that the first token is not looked for until it's needed, so
+    that children appended to empty trees are found
+    """
+    tree = Tree('service_fragment', [])
+    tree.children.append(Token('WORD', 'word'))
+    assert tree.first_token() is tree.children[0]
+
+
+def test_tree_first_token_replaced():
+    """
+    Ensures that the first token is found again after a tree it was found
+    through has been changed, and only by the trees it was found through
+    """
+    inner = Tree('path', [Token('WORD', 'word')])
+    tree = Tree('outer', [inner])
+    other = Tree('other', [Tree('path', [Token('WORD', 'other')])])
+    tree.first_token()
+    other_token = other.first_token()
+    token = Token('WORD', 'new')
+    inner.replace(0, token)
+    assert tree.first_token() is token
+    assert other._first_token == (other_token,)
+
+
+def test_tree_reset_position():
+    tree = Tree('outer', [Tree('path', [Token('WORD', 'word')])])
+    tree.first_token()
+    tree.reset_position()
+    assert tree._first_token is None
+
+
+def test_tree_reset_position_heads():
+    inner = Tree('path', [Token('WORD', 'word')])
+    tree = Tree('outer', [Tree('middle', [inner])])
+    tree.first_token()
+    inner.reset_position()
+    assert tree._first_token is None
+    assert inner._heads is None
+
+
 def test_tree_line():
     tree = Tree('outer', [Tree('path', [Token('WORD', 'word', line=1)])])
     assert tree.line() == '1'
@@ -70,6 +198,20 @@ def test_tree_column():
     assert tree.column() == '1'
 
 
+def test_tree_line_token_changed():
+    """
+    Ensures that the position follows changes to the first token
+    """
+    tree = Tree('outer', [Tree('path', [Token('WORD', 'word', line=1)])])
+    tree.line()
+    tree.child(0).child(0).line = '1.1'
+    assert tree.line() == '1.1'
+
+
+def test_tree_line_empty():
+    assert Tree('empty', []).line() is None
+
+
 def test_tree_end_column():
     """
     Ensures Tree.end_column can find the end column of a tree.
@@ -80,25 +222,53 @@ def test_tree_end_column():
     assert tree.end_column() == '1'
 
 
-def test_tree_insert():
+def test_tree_insert(patch):
+    patch.object(Tree, 'reset_position')
     tree = Tree('tree', [])
-    tree.insert('child')
-    assert tree.children == ['child']
+    tree.children_index()
+    tree.insert(Tree('inner', []))
+    assert Tree.reset_position.call_count == 1
+    assert tree.children == [Tree('inner', [])]
+    assert tree.inner == Tree('inner', [])
+
+
+def test_tree_append(patch):
+    patch.object(Tree, 'reset_position')
+    tree = Tree('tree', [Tree('first', [])])
+    tree.children_index()
+    tree.append(Tree('inner', []))
+    assert Tree.reset_position.call_count == 1
+    assert tree.children == [Tree('first', []), Tree('inner', [])]
+    assert tree.inner == Tree('inner', [])
+
+
+def test_tree_append_position():
+    tree = Tree('service_fragment', [])
+    assert tree.line() is None
+    tree.append(Tree('arguments', [Token('NAME', 'key', line=1)]))
+    assert tree.line() == '1'
 
 
 def test_tree_rename():
     """
     Ensures Tree.rename can rename the current tree
     """
+    renames = Tree.renames
     tree = Tree('tree', [])
     tree.rename('new')
     assert tree.data == 'new'
+    assert Tree.renames == renames + 1
 
 
-def test_tree_replace():
-    tree = Tree('tree', ['old'])
-    tree.replace(0, 'new')
-    assert tree.children == ['new']
+def test_tree_replace(patch):
+    patch.object(Tree, 'reset_position')
+    tree = Tree('tree', [Tree('old', [])])
+    tree.children_index()
+    tree.replace(0, Tree('new', []))
+    assert Tree.reset_position.call_count == 1
+    assert tree.children == [Tree('new', [])]
+    assert tree.old is None
+    assert tree.new == Tree('new', [])
 
 
 def test_tree_extract_path():
@@ -113,11 +283,21 @@ def test_tree_extract_path_fragments():
 
 
 def test_tree_attributes(patch):
-    patch.object(Tree, 'node')
+    patch.object(Tree, 'walk')
     tree = Tree('master', [])
     result = tree.branch
-    Tree.node.assert_called_with('branch')
-    assert result == Tree.node()
+    Tree.walk.assert_called_with(tree, 'branch')
+    assert result == Tree.walk()
+
+
+def test_tree_attributes_special(patch):
+    """
+    Ensures that special attributes are not looked up as nodes
+    """
+    patch.object(Tree, 'walk')
+    with raises(AttributeError):
+        Tree('master', []).__setstate__
+    assert Tree.walk.call_count == 0
 
 
 def test_tree_find():
@@ -141,24 +321,8 @@ def test_tree_is_unary_leaf():
     """
     tree = Tree('expression', [
         Tree('or_expression', [
-            Tree('and_expression', [
-                Tree('cmp_expression', [
-                    Tree('arith_expression', [
-                        Tree('mul_expression', [
-                            Tree('unary_expression', [
-                                Tree('pow_expression', [
-                                    Tree('primary_expression', [
-                                        Tree('entity', [
-                                            Tree('values', [
-                                                0
-                                            ])
-                                        ])
-                                    ])
-                                ])
-                            ])
-                        ])
-                    ])
-                ])
+            Tree('entity', [
+                Tree('values', [0])
             ])
         ])
     ])
@@ -167,6 +331,10 @@ def test_tree_is_unary_leaf():
 
 @mark.parametrize('tree', [
     Tree('any', []),
+    Tree('expression', [Tree('or_expression', [Tree('entity', [1, 2])])]),
+    Tree('expression',
+         [Tree('or_expression',
+               [Tree('or_expression', [Tree('entity', [1])])])]),
     Tree('arith_expression', [1, 2]),
     Tree('arith_expression', [Tree('unary_expression', [1, 2])]),
     Tree('arith_expression',